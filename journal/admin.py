@@ -1,7 +1,16 @@
+import tempfile
+from collections import defaultdict
+
 from django.apps import apps
 from django.contrib import admin, messages
-from django.db import transaction
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Max
+from django.http import FileResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
 from .models import (
+    Attachment,
     Concept,
     DayJournal,
     JournalSlotItem,
@@ -11,8 +20,55 @@ from .models import (
     StepCheck,
     StepImage,
     Strategy,
+    Task,
+    TaskStatus,
     Trade,
 )
+from .archive import archive_run, restore_run
+from .bars import normalize_symbol
+from .bundles import write_bundle
+from .tasks import enqueue
+
+
+def estimated_row_count(queryset) -> int | None:
+    """
+    Cheap row count estimate for an unfiltered queryset: PostgreSQL planner
+    statistics, or the highest primary key elsewhere. None when filtered.
+    """
+    if queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] >= 0 else None
+    return queryset.order_by().aggregate(highest=Max("pk"))["highest"] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator for big tables: above exact_below rows an unfiltered
+    list is paged from an estimate instead of a full COUNT(*).
+    """
+    exact_below = 10_000
+
+    @cached_property
+    def count(self):
+        estimate = estimated_row_count(self.object_list)
+        if estimate is None or estimate < self.exact_below:
+            return super().count
+        return estimate
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) the changelist runs for "x of y selected".
+    show_full_result_count = False
+    list_per_page = 50
+
 
 @admin.register(Concept)
 class ConceptAdmin(admin.ModelAdmin):
@@ -23,12 +79,16 @@ class ConceptAdmin(admin.ModelAdmin):
 class JournalSlotItemInline(admin.TabularInline):
     model = JournalSlotItem
     extra = 0
+    autocomplete_fields = ("concept",)
 
 @admin.register(DayJournal)
-class DayJournalAdmin(admin.ModelAdmin):
+class DayJournalAdmin(LargeTableAdmin):
     list_display = ("user", "date", "session", "symbol", "trade_taken", "updated_at")
-    list_filter = ("session", "trade_taken", "date")
+    list_filter = ("session", "trade_taken")
+    list_select_related = ("user",)
     search_fields = ("user__username", "symbol")
+    date_hierarchy = "date"
+    autocomplete_fields = ("user",)
     inlines = [JournalSlotItemInline]
 
 
@@ -45,7 +105,14 @@ class StrategyAdmin(admin.ModelAdmin):
     list_filter = ("is_active",)
     search_fields = ("name",)
     inlines = [SectionInline]
-    actions = ["clone_selected_strategies"]
+    actions = ["clone_selected_strategies", "export_bundle"]
+
+    @admin.action(description="Export selected strategies as a bundle (.zip)")
+    def export_bundle(self, request, queryset):
+        bundle = tempfile.TemporaryFile()
+        write_bundle(bundle, queryset)
+        bundle.seek(0)
+        return FileResponse(bundle, as_attachment=True, filename="strategies.zip", content_type="application/zip")
 
     @admin.action(description="Clone selected strategies (deep copy)")
     def clone_selected_strategies(self, request, queryset):
@@ -132,8 +199,10 @@ class StrategyAdmin(admin.ModelAdmin):
 class SectionAdmin(admin.ModelAdmin):
     list_display = ("name", "strategy", "order")
     list_filter = ("strategy",)
+    list_select_related = ("strategy",)
     search_fields = ("name", "strategy__name")
     ordering = ("strategy", "order", "id")
+    autocomplete_fields = ("strategy",)
 
 
 class StepImageInline(admin.TabularInline):
@@ -146,29 +215,104 @@ class StepImageInline(admin.TabularInline):
 @admin.register(Step)
 class StepAdmin(admin.ModelAdmin):
     list_display = ("title", "section", "order", "required")
-    list_filter = ("section__strategy", "section", "required")
+    list_filter = ("section__strategy", "required")
+    list_select_related = ("section__strategy",)
     search_fields = ("title", "section__name", "section__strategy__name")
     ordering = ("section", "order", "id")
+    autocomplete_fields = ("section",)
     inlines = [StepImageInline]
 
 
 @admin.register(SessionRun)
-class SessionRunAdmin(admin.ModelAdmin):
-    list_display = ("user", "strategy", "symbol", "started_at", "completed", "trade_taken")
-    list_filter = ("completed", "trade_taken", "strategy")
+class SessionRunAdmin(LargeTableAdmin):
+    list_display = ("user", "strategy", "symbol", "started_at", "completed", "trade_taken", "archived_at")
+    list_filter = ("completed", "trade_taken", "market_session", "killzone", "strategy")
+    list_select_related = ("user", "strategy")
     search_fields = ("user__username", "symbol", "strategy__name")
     ordering = ("-started_at",)
+    date_hierarchy = "started_at"
+    autocomplete_fields = ("user", "strategy")
+    actions = ["archive_checks", "restore_checks"]
+
+    @admin.action(description="Archive checklist state (cold storage)")
+    def archive_checks(self, request, queryset):
+        archived = sum(archive_run(run) for run in queryset.filter(completed=True, archived_checks__isnull=True))
+        self.message_user(request, f"Archived {archived} runs.", level=messages.SUCCESS)
+
+    @admin.action(description="Restore archived checklist state")
+    def restore_checks(self, request, queryset):
+        restored = sum(restore_run(run) for run in queryset.filter(archived_checks__isnull=False))
+        self.message_user(request, f"Restored {restored} runs.", level=messages.SUCCESS)
 
 
 @admin.register(StepCheck)
-class StepCheckAdmin(admin.ModelAdmin):
+class StepCheckAdmin(LargeTableAdmin):
     list_display = ("session_run", "step", "checked", "checked_at")
-    list_filter = ("checked", "step__section__strategy")
+    # A run's checks all belong to its strategy, so filter through the run (one join, not three).
+    list_filter = ("checked", "session_run__strategy")
+    list_select_related = ("session_run__user", "session_run__strategy")
     search_fields = ("session_run__user__username", "step__title")
+    ordering = ("-id",)
+    date_hierarchy = "checked_at"
+    raw_id_fields = ("session_run", "step")
+
+    def get_queryset(self, request):
+        # step has no FK constraint and may point at a deleted step; a join would
+        # drop those rows, so steps are fetched in one separate query instead.
+        return super().get_queryset(request).prefetch_related("step__section")
 
 
 @admin.register(Trade)
-class TradeAdmin(admin.ModelAdmin):
-    list_display = ("session_run", "direction", "entry_time", "result_r")
-    list_filter = ("direction",)
+class TradeAdmin(LargeTableAdmin):
+    list_display = ("session_run", "direction", "entry_time", "result_r", "verified_r", "mfe_r", "mae_r")
+    list_filter = ("direction", "market_session", "killzone")
+    list_select_related = ("session_run__user", "session_run__strategy")
     search_fields = ("session_run__user__username", "session_run__symbol", "notes")
+    date_hierarchy = "entry_time"
+    raw_id_fields = ("session_run",)
+    actions = ["recompute_excursions"]
+
+    @admin.action(description="Recompute MFE/MAE from bar data (background)")
+    def recompute_excursions(self, request, queryset):
+        trade_ids = defaultdict(list)
+        skipped = 0
+        for trade_id, symbol in queryset.values_list("id", "session_run__symbol"):
+            try:
+                trade_ids[normalize_symbol(symbol)].append(trade_id)
+            except ValueError:
+                # No (valid) symbol on the run: there are no bars to compare against.
+                skipped += 1
+        task_ids = [
+            enqueue("bars.compute_excursions", {"symbol": symbol, "trade_ids": ids}, user=request.user).id
+            for symbol, ids in sorted(trade_ids.items())
+        ]
+        message = f"Queued {len(task_ids)} tasks ({', '.join(f'#{i}' for i in task_ids)}). Run `manage.py runworker` to process them."
+        if skipped:
+            message += f" Skipped {skipped} trades without a symbol."
+        self.message_user(request, message, level=messages.SUCCESS)
+
+
+@admin.register(Task)
+class TaskAdmin(LargeTableAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_after", "claimed_by", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "claimed_by")
+    readonly_fields = ("claimed_by", "claimed_at", "finished_at", "result", "error", "created_at")
+    actions = ["retry_tasks"]
+
+    @admin.action(description="Retry selected tasks now")
+    def retry_tasks(self, request, queryset):
+        count = queryset.exclude(status=TaskStatus.RUNNING).update(
+            status=TaskStatus.QUEUED, run_after=timezone.now(), attempts=0
+        )
+        self.message_user(request, f"Requeued {count} tasks.", level=messages.SUCCESS)
+
+
+@admin.register(Attachment)
+class AttachmentAdmin(LargeTableAdmin):
+    list_display = ("original_name", "user", "trade", "journal", "size", "created_at")
+    list_select_related = ("user", "trade", "journal__user")
+    search_fields = ("original_name", "caption", "user__username", "sha256")
+    date_hierarchy = "created_at"
+    raw_id_fields = ("user", "trade", "journal")
+    readonly_fields = ("sha256", "size", "content_type")
@@ -0,0 +1,113 @@
+"""
+Concept analytics built from JournalSlotItem placements.
+
+Everything is computed from one values_list scan into dense numpy arrays
+and cached per user until their next slot or review save.
+"""
+import numpy as np
+from django.core.cache import cache
+
+from .cache_versions import bump_model_version, model_version
+from .killzones import market_buckets
+from .models import JournalSlotItem, Timeframe, Trade
+from .routers import analytics_reads
+
+CONCEPT_MATRIX_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _user_version_name(user_id: int) -> str:
+    return f"concept-matrix:{user_id}"
+
+
+def invalidate_concept_matrix(user_id: int) -> None:
+    bump_model_version(_user_version_name(user_id))
+
+
+def concept_matrix(user_id: int) -> dict:
+    version = model_version(_user_version_name(user_id))
+    key = f"journal:concept-matrix:{user_id}:{version}"
+    data = cache.get(key)
+    if data is None:
+        data = build_concept_matrix(user_id)
+        cache.set(key, data, CONCEPT_MATRIX_CACHE_TIMEOUT)
+    return data
+
+
+@analytics_reads()
+def build_concept_matrix(user_id: int) -> dict:
+    """
+    Returns concept names (most used first) and, aligned to them:
+      days:        journal days each concept appears on
+      cooccurrence: concept x concept count of days both appear on
+      timeframes:  concept x timeframe placement counts
+      outcomes:    per concept, trade days / total R / avg R / winning days, where a
+                   trade counts for the journal day of its New York trading date
+    """
+    rows = list(
+        JournalSlotItem.objects.filter(journal__user_id=user_id).values_list(
+            "journal_id", "journal__date", "timeframe", "concept_id", "concept__name"
+        )
+    )
+    timeframe_values = [value for value, _ in Timeframe.choices]
+    if not rows:
+        return {"concepts": [], "timeframes": [label for _, label in Timeframe.choices], "total_days": 0}
+
+    journal_ids, dates, timeframes, concept_ids, names = zip(*rows)
+    day_keys, day_idx = np.unique(np.array(journal_ids, dtype=np.int64), return_inverse=True)
+    concept_keys, concept_idx = np.unique(np.array(concept_ids, dtype=np.int64), return_inverse=True)
+    tf_lookup = {value: i for i, value in enumerate(timeframe_values)}
+    tf_idx = np.array([tf_lookup.get(tf, -1) for tf in timeframes], dtype=np.int64)
+
+    n_days, n_concepts = day_keys.shape[0], concept_keys.shape[0]
+    presence = np.zeros((n_days, n_concepts), dtype=np.int32)
+    presence[day_idx, concept_idx] = 1
+    cooccurrence = presence.T @ presence
+
+    by_timeframe = np.zeros((n_concepts, len(timeframe_values)), dtype=np.int32)
+    known_tf = tf_idx >= 0
+    np.add.at(by_timeframe, (concept_idx[known_tf], tf_idx[known_tf]), 1)
+
+    # Same-day trade outcomes, aligned to the dense day index.
+    day_dates = {}
+    for i, journal_id in enumerate(journal_ids):
+        day_dates.setdefault(journal_id, dates[i])
+    date_to_day = {day_dates[int(journal_id)]: i for i, journal_id in enumerate(day_keys)}
+    day_r = np.zeros(n_days, dtype=np.float64)
+    day_traded = np.zeros(n_days, dtype=bool)
+    trades = Trade.objects.filter(session_run__user_id=user_id)
+    for trading_date, entry_time, result_r in trades.values_list("trading_date", "entry_time", "result_r"):
+        # Journal days are trading days, which roll at 18:00 New York time (journal.killzones).
+        # Trades saved before the bucket columns existed may not be backfilled yet.
+        day = date_to_day.get(trading_date or market_buckets(entry_time)["trading_date"])
+        if day is not None:
+            day_r[day] += float(result_r)
+            day_traded[day] = True
+
+    traded = presence[day_traded]
+    trade_days = traded.sum(axis=0)
+    total_r = presence.T @ day_r
+    winning_days = presence[day_traded & (day_r > 0)].sum(axis=0)
+
+    concept_names = {}
+    for i, concept_id in enumerate(concept_ids):
+        concept_names.setdefault(concept_id, names[i])
+    days = presence.sum(axis=0)
+    order = np.argsort(-days, kind="stable")
+
+    return {
+        "concepts": [concept_names[int(concept_keys[i])] for i in order],
+        "timeframes": [label for _, label in Timeframe.choices],
+        "total_days": int(n_days),
+        "days": days[order].tolist(),
+        "cooccurrence": cooccurrence[np.ix_(order, order)].tolist(),
+        "by_timeframe": by_timeframe[order].tolist(),
+        "outcomes": [
+            {
+                "trade_days": int(trade_days[i]),
+                "total_r": round(float(total_r[i]), 2),
+                "avg_r": round(float(total_r[i] / trade_days[i]), 2) if trade_days[i] else None,
+                "winning_days": int(winning_days[i]),
+            }
+            for i in order
+        ],
+    }
@@ -0,0 +1,167 @@
+"""
+Cold storage for the checklist state of completed runs.
+
+Archiving packs a run's StepCheck rows into SessionRun.archived_checks and
+deletes the rows, so the hot StepCheck table only holds recent runs. The blob
+is laid out against the run's pinned snapshot step order:
+
+    header  "<BH"  format, step count
+    bitmap  ceil(step count / 8) bytes, bit i set = i-th snapshot step checked
+    extras  zlib-compressed compact JSON, only present when non-empty:
+            {"t": [checked_at for each set bit, epoch microseconds or null],
+             "n": [[step index, notes], ...],
+             "o": [[step_id, checked, notes, checked_at], ...]}  # rows outside the snapshot
+
+load_checks() reads either form transparently, and a POST to an archived
+run restores its rows first, so views and analytics never need to know.
+"""
+import json
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from .checklists import run_template, template_steps
+from .models import SessionRun, StepCheck
+
+ARCHIVE_FORMAT = 1
+_HEADER = struct.Struct("<BH")
+
+
+def _to_micros(value):
+    return int(value.timestamp() * 1_000_000) if value else None
+
+
+def _from_micros(value):
+    return datetime.fromtimestamp(value / 1_000_000, tz=dt_timezone.utc) if value is not None else None
+
+
+def snapshot_step_ids(run: SessionRun) -> list[int]:
+    return [step.id for _, step in template_steps(run_template(run))]
+
+
+def pack_checks(step_ids: list[int], checks) -> bytes:
+    position = {step_id: i for i, step_id in enumerate(step_ids)}
+    bitmap = bytearray((len(step_ids) + 7) // 8)
+    checked_at = {}
+    notes = []
+    orphans = []
+
+    for check in checks:
+        i = position.get(check.step_id)
+        if i is None:
+            orphans.append([check.step_id, check.checked, check.notes, _to_micros(check.checked_at)])
+            continue
+        if check.checked:
+            bitmap[i >> 3] |= 1 << (i & 7)
+            checked_at[i] = _to_micros(check.checked_at)
+        if check.notes:
+            notes.append([i, check.notes])
+
+    extras = {}
+    if checked_at:
+        extras["t"] = [checked_at[i] for i in sorted(checked_at)]
+    if notes:
+        extras["n"] = sorted(notes)
+    if orphans:
+        extras["o"] = orphans
+
+    blob = _HEADER.pack(ARCHIVE_FORMAT, len(step_ids)) + bytes(bitmap)
+    if extras:
+        blob += zlib.compress(json.dumps(extras, separators=(",", ":")).encode("utf-8"), 9)
+    return blob
+
+
+def _unpack(blob) -> tuple[int, bytes, dict]:
+    blob = bytes(blob)
+    version, n_steps = _HEADER.unpack_from(blob)
+    if version != ARCHIVE_FORMAT:
+        raise ValueError(f"Unknown archived checks format {version}")
+    start = _HEADER.size
+    end = start + (n_steps + 7) // 8
+    extras = json.loads(zlib.decompress(blob[end:]).decode("utf-8")) if len(blob) > end else {}
+    return n_steps, blob[start:end], extras
+
+
+def _checked_positions(bitmap: bytes, n_steps: int) -> list[int]:
+    return [i for i in range(n_steps) if bitmap[i >> 3] >> (i & 7) & 1]
+
+
+def archived_checked_step_ids(blob, step_ids: list[int]) -> list[int]:
+    """
+    Step ids checked in an archived blob, without materializing StepChecks.
+    """
+    n_steps, bitmap, extras = _unpack(blob)
+    checked = [step_ids[i] for i in _checked_positions(bitmap, n_steps)]
+    checked.extend(step_id for step_id, is_checked, _, _ in extras.get("o", []) if is_checked)
+    return checked
+
+
+def unpack_checks(run: SessionRun, step_ids: list[int], blob) -> list[StepCheck]:
+    n_steps, bitmap, extras = _unpack(blob)
+    if n_steps != len(step_ids):
+        raise ValueError(f"Archived checks of run {run.pk} do not match its snapshot")
+
+    rows = {}
+    for i, micros in zip(_checked_positions(bitmap, n_steps), extras.get("t", [])):
+        rows[i] = StepCheck(session_run=run, step_id=step_ids[i], checked=True, checked_at=_from_micros(micros))
+    for i, notes in extras.get("n", []):
+        row = rows.setdefault(i, StepCheck(session_run=run, step_id=step_ids[i]))
+        row.notes = notes
+    checks = [rows[i] for i in sorted(rows)]
+    for step_id, checked, notes, micros in extras.get("o", []):
+        checks.append(
+            StepCheck(session_run=run, step_id=step_id, checked=checked, notes=notes, checked_at=_from_micros(micros))
+        )
+    return checks
+
+
+def load_checks(run: SessionRun) -> list[StepCheck]:
+    """
+    A run's StepChecks, from the hot table or its archived blob.
+    """
+    if run.archived_checks is None:
+        return list(run.step_checks.all())
+    return unpack_checks(run, snapshot_step_ids(run), run.archived_checks)
+
+
+def archive_run(run: SessionRun) -> bool:
+    with transaction.atomic():
+        run = SessionRun.objects.select_for_update().select_related("strategy", "snapshot").get(pk=run.pk)
+        if run.archived_checks is not None:
+            return False
+        checks = list(StepCheck.objects.filter(session_run=run))
+        run.archived_checks = pack_checks(snapshot_step_ids(run), checks)
+        run.archived_at = timezone.now()
+        run.save(update_fields=["archived_checks", "archived_at"])
+        StepCheck.objects.filter(session_run=run).delete()
+    return True
+
+
+def restore_run(run: SessionRun) -> bool:
+    """
+    Move an archived run's checks back into StepCheck so it can be edited.
+    """
+    with transaction.atomic():
+        run = SessionRun.objects.select_for_update().select_related("strategy", "snapshot").get(pk=run.pk)
+        if run.archived_checks is None:
+            return False
+        StepCheck.objects.bulk_create(unpack_checks(run, snapshot_step_ids(run), run.archived_checks))
+        run.archived_checks = None
+        run.archived_at = None
+        run.save(update_fields=["archived_checks", "archived_at"])
+    return True
+
+
+def archive_candidates(older_than_days: int):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return SessionRun.objects.filter(completed=True, archived_checks__isnull=True, started_at__lt=cutoff)
+
+
+def archive_completed_runs(older_than_days: int = 30, limit: int | None = None) -> int:
+    run_ids = archive_candidates(older_than_days).order_by("id").values_list("id", flat=True)
+    if limit:
+        run_ids = run_ids[:limit]
+    return sum(archive_run(SessionRun(pk=run_id)) for run_id in list(run_ids))
@@ -0,0 +1,52 @@
+"""
+Authentication backend that keeps recently seen users in process memory.
+
+AuthenticationMiddleware resolves request.user through the backend's
+get_user() on every request; ModelBackend answers that with a user table
+query. CachedModelBackend serves it from a small per-process cache instead.
+Entries expire after AUTH_USER_CACHE_SECONDS. Saving or deleting a user
+drops its entry in the saving process and bumps a shared cache version
+(journal.cache_versions), which every process compares against.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from .cache_versions import bump_model_version, model_version
+
+USERS = "users"
+MAX_CACHED_USERS = 1000
+
+_users = {}
+_lock = threading.Lock()
+
+
+def forget_user(user_id) -> None:
+    with _lock:
+        _users.pop(str(user_id), None)
+    bump_model_version(USERS)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        ttl = getattr(settings, "AUTH_USER_CACHE_SECONDS", 60)
+        version = model_version(USERS)
+        now = time.monotonic()
+
+        # Sessions store the pk as a string; key by that form whatever the caller passes.
+        key = str(user_id)
+        entry = _users.get(key)
+        if entry is not None and entry[1] > now and entry[2] == version:
+            # A copy, so one request changing attributes cannot leak into another.
+            return copy.copy(entry[0])
+
+        user = super().get_user(user_id)
+        if user is not None and ttl:
+            with _lock:
+                if len(_users) >= MAX_CACHED_USERS:
+                    _users.clear()
+                _users[key] = (copy.copy(user), now + ttl, version)
+        return user
@@ -0,0 +1,407 @@
+"""
+Online, incremental, compressed backups of the database and MEDIA_ROOT.
+
+Layout under BACKUP_ROOT:
+    chunks/ab/<sha256>.z          zlib-compressed chunk, stored once
+    snapshots/<name>.json         manifest naming the chunks of one backup
+
+SQLite is copied with the online backup API a few hundred pages at a time,
+so writers only wait for one short step, never for the whole copy (see
+_sqlite_copy for busy databases). The copy is cut into page-aligned
+chunks; chunks whose content did not change since an earlier backup are
+already in the store, so each backup only writes the pages that changed.
+With TC_DB_PROFILE=postgres the database part is an uncompressed
+`pg_dump -Fc` stream, chunked the same way.
+
+Media files are chunked per file. A file whose size and mtime match the
+previous manifest reuses its hash instead of being read again.
+
+Retention keeps the newest BACKUP_KEEP snapshots, then deletes chunks that
+no remaining manifest references.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+FORMAT = "trading-companion-backup"
+FORMAT_VERSION = 1
+PAGES_PER_STEP = 512
+STEP_SLEEP_SECONDS = 0.005
+MAX_STEP_RESTARTS = 3
+MAX_BACKOFF_RESTARTS = 12
+MAX_BACKOFF_SECONDS = 1.0
+PAGES_PER_CHUNK = 256
+MEDIA_CHUNK_SIZE = 4 * 1024 * 1024
+COMPRESSION_LEVEL = 6
+PRUNE_MIN_AGE_SECONDS = 3600
+
+
+class BackupError(Exception):
+    pass
+
+
+def backup_root() -> Path:
+    return Path(settings.BACKUP_ROOT)
+
+
+def _chunk_path(sha256: str) -> Path:
+    return backup_root() / "chunks" / sha256[:2] / f"{sha256}.z"
+
+
+def _snapshot_dir() -> Path:
+    return backup_root() / "snapshots"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as temp:
+            temp.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def put_chunk(data: bytes, stats: dict) -> str:
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = _chunk_path(sha256)
+    if path.exists():
+        # Touch it, so a concurrent prune sees it as in use (see prune_backups).
+        os.utime(path)
+        stats["reused"] += 1
+    else:
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        _write_atomic(path, compressed)
+        stats["written"] += 1
+        stats["written_bytes"] += len(compressed)
+    return sha256
+
+
+def get_chunk(sha256: str) -> bytes:
+    try:
+        data = zlib.decompress(_chunk_path(sha256).read_bytes())
+    except FileNotFoundError:
+        raise BackupError(f"Missing chunk {sha256}.")
+    except zlib.error as exc:
+        raise BackupError(f"Corrupt chunk {sha256}: {exc}")
+    if hashlib.sha256(data).hexdigest() != sha256:
+        raise BackupError(f"Chunk {sha256} does not match its hash.")
+    return data
+
+
+def _chunk_file(path, chunk_size: int, stats: dict) -> list[str]:
+    chunks = []
+    with open(path, "rb") as source:
+        for data in iter(lambda: source.read(chunk_size), b""):
+            chunks.append(put_chunk(data, stats))
+    return chunks
+
+
+# Database
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _sqlite_copy(alias: str, target: str) -> int:
+    """
+    Online copy of the live database; returns the page size.
+
+    The copy runs PAGES_PER_STEP pages at a time, and writers can commit
+    between steps. SQLite restarts a stepped copy whenever the source changes.
+    In WAL mode a busy database falls back to a single step: it reads one
+    snapshot and writers carry on beside it. In rollback-journal mode that
+    step would lock writers out for the whole copy, so the copy keeps
+    stepping, backing off after each restart, and gives up after
+    MAX_BACKOFF_RESTARTS.
+    """
+    source = sqlite3.connect(str(connections[alias].settings_dict["NAME"]), timeout=30)
+    destination = sqlite3.connect(target)
+    wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    progress_state = {"copied": 0, "restarts": 0}
+
+    def progress(status, remaining, total):
+        copied = total - remaining
+        # A restart begins again from page one, so the count stops advancing.
+        if copied <= progress_state["copied"]:
+            progress_state["restarts"] += 1
+            restarts = progress_state["restarts"]
+            if restarts > (MAX_STEP_RESTARTS if wal else MAX_BACKOFF_RESTARTS):
+                raise _TooManyRestarts
+            if not wal:
+                time.sleep(min(STEP_SLEEP_SECONDS * 2**restarts, MAX_BACKOFF_SECONDS))
+        progress_state["copied"] = copied
+
+    try:
+        try:
+            source.backup(destination, pages=PAGES_PER_STEP, progress=progress, sleep=STEP_SLEEP_SECONDS)
+        except _TooManyRestarts:
+            if not wal:
+                raise BackupError(
+                    "The database kept changing during the copy. Try again when it is quieter, "
+                    "or switch it to WAL mode (PRAGMA journal_mode=WAL)."
+                )
+            source.backup(destination)
+        return destination.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        destination.close()
+        source.close()
+
+
+def _pg_dump(alias: str, target: str) -> None:
+    db = connections[alias].settings_dict
+    # -Z0: leave compression to the chunk store, so unchanged stretches dedupe.
+    command = ["pg_dump", "-Fc", "-Z0", "-f", target, "--dbname", db["NAME"]]
+    for flag, key in (("--host", "HOST"), ("--port", "PORT"), ("--username", "USER")):
+        if db.get(key):
+            command += [flag, str(db[key])]
+    env = {**os.environ, "PGPASSWORD": db.get("PASSWORD") or ""}
+    try:
+        subprocess.run(command, check=True, env=env, capture_output=True)
+    except FileNotFoundError:
+        raise BackupError("pg_dump is not installed.")
+    except subprocess.CalledProcessError as exc:
+        raise BackupError(f"pg_dump failed: {exc.stderr.decode(errors='replace').strip()}")
+
+
+def _backup_database(alias: str, stats: dict) -> dict:
+    vendor = connections[alias].vendor
+    with tempfile.TemporaryDirectory(dir=backup_root()) as temp_dir:
+        target = os.path.join(temp_dir, "database")
+        if vendor == "sqlite":
+            page_size = _sqlite_copy(alias, target)
+            chunk_size = page_size * PAGES_PER_CHUNK
+        elif vendor == "postgresql":
+            _pg_dump(alias, target)
+            chunk_size = 1024 * 1024
+        else:
+            raise BackupError(f"Backups are not supported for {vendor}.")
+        return {
+            "vendor": vendor,
+            "size": os.path.getsize(target),
+            "chunk_size": chunk_size,
+            "chunks": _chunk_file(target, chunk_size, stats),
+        }
+
+
+# Media
+
+
+def _backup_media(previous: dict, stats: dict) -> list:
+    """
+    [[relative path, size, mtime_ns, [chunk, ...]], ...] for every media file.
+    """
+    root = Path(settings.MEDIA_ROOT)
+    known = {entry[0]: entry for entry in previous.get("media", [])}
+    files = []
+    if not root.is_dir():
+        return files
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Half-finished uploads are not worth keeping.
+        dirnames[:] = sorted(d for d in dirnames if d not in (".uploads", ".cas-tmp"))
+        for filename in sorted(filenames):
+            path = Path(dirpath) / filename
+            relative = path.relative_to(root).as_posix()
+            stat = path.stat()
+            entry = known.get(relative)
+            if entry and entry[1] == stat.st_size and entry[2] == stat.st_mtime_ns:
+                if all(_chunk_path(sha).exists() for sha in entry[3]):
+                    stats["media_unchanged"] += 1
+                    files.append(entry)
+                    continue
+            files.append([relative, stat.st_size, stat.st_mtime_ns, _chunk_file(path, MEDIA_CHUNK_SIZE, stats)])
+    return files
+
+
+# Snapshots
+
+
+def list_snapshots() -> list[str]:
+    directory = _snapshot_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(p.stem for p in directory.glob("*.json"))
+
+
+def load_manifest(name: str) -> dict:
+    path = _snapshot_dir() / f"{name}.json"
+    try:
+        manifest = json.loads(path.read_text())
+    except FileNotFoundError:
+        raise BackupError(f"No backup named {name}.")
+    if manifest.get("format") != FORMAT or manifest.get("version", 0) > FORMAT_VERSION:
+        raise BackupError(f"{name} is not a backup this version can read.")
+    return manifest
+
+
+def create_backup(alias: str = "default", include_media: bool = True, keep: int | None = None) -> dict:
+    """
+    Take a backup and apply retention. Returns the manifest plus "stats".
+    """
+    backup_root().mkdir(parents=True, exist_ok=True)
+    stats = {"written": 0, "reused": 0, "written_bytes": 0, "media_unchanged": 0}
+    existing = list_snapshots()
+    previous = load_manifest(existing[-1]) if existing else {}
+
+    now = timezone.now()
+    name = now.strftime("%Y%m%dT%H%M%S%fZ")
+    manifest = {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "name": name,
+        "created_at": now.isoformat(),
+        "database": _backup_database(alias, stats),
+        "media": _backup_media(previous, stats) if include_media else [],
+        "includes_media": include_media,
+    }
+    _write_atomic(_snapshot_dir() / f"{name}.json", json.dumps(manifest, separators=(",", ":")).encode())
+
+    manifest["pruned"] = prune_backups(keep if keep is not None else settings.BACKUP_KEEP)
+    manifest["stats"] = stats
+    return manifest
+
+
+def _referenced_chunks() -> set[str]:
+    referenced = set()
+    for name in list_snapshots():
+        manifest = load_manifest(name)
+        referenced.update(manifest["database"]["chunks"])
+        for entry in manifest["media"]:
+            referenced.update(entry[3])
+    return referenced
+
+
+def prune_backups(keep: int) -> dict:
+    """
+    Keep the newest `keep` snapshots and delete chunks nothing references any more.
+    """
+    names = list_snapshots()
+    removed = names[:-keep] if keep > 0 else []
+    for name in removed:
+        (_snapshot_dir() / f"{name}.json").unlink()
+
+    referenced = _referenced_chunks()
+    # Chunks touched recently may belong to a backup still being written.
+    cutoff = time.time() - PRUNE_MIN_AGE_SECONDS
+    deleted = 0
+    for path in (backup_root() / "chunks").glob("*/*.z"):
+        if path.stem not in referenced and path.stat().st_mtime < cutoff:
+            path.unlink()
+            deleted += 1
+    return {"snapshots": len(removed), "chunks": deleted}
+
+
+def _assemble(chunks: list[str], target) -> int:
+    size = 0
+    with open(target, "wb") as output:
+        for sha256 in chunks:
+            data = get_chunk(sha256)
+            output.write(data)
+            size += len(data)
+    return size
+
+
+def verify_backup(name: str) -> dict:
+    """
+    Decompress and hash every chunk; for SQLite also run an integrity check on the rebuilt file.
+    """
+    manifest = load_manifest(name)
+    database = manifest["database"]
+    with tempfile.TemporaryDirectory(dir=backup_root()) as temp_dir:
+        target = os.path.join(temp_dir, "database")
+        size = _assemble(database["chunks"], target)
+        if size != database["size"]:
+            raise BackupError(f"Database is {size} bytes, manifest says {database['size']}.")
+        if database["vendor"] == "sqlite":
+            check = sqlite3.connect(target)
+            try:
+                result = check.execute("PRAGMA integrity_check").fetchone()[0]
+            finally:
+                check.close()
+            if result != "ok":
+                raise BackupError(f"SQLite integrity check failed: {result}")
+
+    media_bytes = 0
+    for relative, size, _, chunks in manifest["media"]:
+        media_bytes += sum(len(get_chunk(sha256)) for sha256 in chunks)
+    return {"database_bytes": database["size"], "media_files": len(manifest["media"]), "media_bytes": media_bytes}
+
+
+def restore_backup(name: str, database_path=None, media_root=None, restore_media: bool = True) -> dict:
+    """
+    Rebuild the database file (SQLite) or a pg_restore archive, and MEDIA_ROOT.
+    The database is written beside its target and renamed into place; the old
+    file's -wal/-shm/-journal files go first, so SQLite never replays them
+    into the restored database.
+    """
+    manifest = load_manifest(name)
+    database = manifest["database"]
+    result = {}
+
+    if database["vendor"] == "sqlite":
+        target = Path(database_path or connections["default"].settings_dict["NAME"])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=target.parent, suffix=".restore")
+        os.close(fd)
+        try:
+            _assemble(database["chunks"], temp_path)
+            connections.close_all()
+            for suffix in ("-wal", "-shm", "-journal"):
+                target.with_name(target.name + suffix).unlink(missing_ok=True)
+            os.replace(temp_path, target)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        result["database"] = str(target)
+    else:
+        # A pg_restore archive; loading it into a server is left to pg_restore.
+        target = Path(database_path or backup_root() / f"{name}.dump")
+        _assemble(database["chunks"], target)
+        result["database"] = f"{target} (load with: pg_restore --clean --if-exists -d <db> {target})"
+
+    restored = skipped = 0
+    if restore_media:
+        root = Path(media_root or settings.MEDIA_ROOT)
+        for relative, size, _, chunks in manifest["media"]:
+            path = root / relative
+            if path.is_file() and path.stat().st_size == size and _file_chunks_match(path, chunks):
+                skipped += 1
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(path.name + ".restore")
+            try:
+                _assemble(chunks, temp_path)
+                os.replace(temp_path, path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+            restored += 1
+    result["media_restored"] = restored
+    result["media_unchanged"] = skipped
+    return result
+
+
+def _file_chunks_match(path: Path, chunks: list[str]) -> bool:
+    with open(path, "rb") as source:
+        for sha256 in chunks:
+            if hashlib.sha256(source.read(MEDIA_CHUNK_SIZE)).hexdigest() != sha256:
+                return False
+        return source.read(1) == b""
+
+
+def backup_size() -> int:
+    root = backup_root()
+    return sum(p.stat().st_size for p in root.rglob("*") if p.is_file()) if root.is_dir() else 0
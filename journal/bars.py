@@ -0,0 +1,343 @@
+"""
+Local 1-minute OHLC bar store and trade excursion (MFE/MAE) computation.
+
+Each symbol lives in one binary columnar file:
+
+    header:  8s magic, uint64 bar count
+    columns: ts (int64 epoch seconds, ascending, unique), open, high, low, close (float64)
+
+Files are memory-mapped read-only, so columns are zero-copy numpy views and
+lookups by time are a binary search over the sorted ts column.
+"""
+import csv
+import os
+import re
+import struct
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone as dj_timezone
+
+MAGIC = b"TCBARS01"
+HEADER = struct.Struct("<8sQ")
+PRICE_COLUMNS = ("open", "high", "low", "close")
+BAR_SECONDS = 60
+
+TIME_HEADERS = ("timestamp", "time", "datetime", "date", "ts")
+
+
+class BarFormatError(ValueError):
+    pass
+
+
+class Bars:
+    """
+    Memory-mapped bars for one symbol. Columns are read-only numpy views.
+    """
+    def __init__(self, path: Path):
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        if raw.size < HEADER.size:
+            raise BarFormatError(f"{path} is too small to be a bar file")
+        magic, count = HEADER.unpack(bytes(raw[: HEADER.size]))
+        if magic != MAGIC:
+            raise BarFormatError(f"{path} is not a bar file")
+
+        column_bytes = count * 8
+        expected = HEADER.size + column_bytes * (1 + len(PRICE_COLUMNS))
+        if raw.size != expected:
+            raise BarFormatError(f"{path} is truncated ({raw.size} != {expected} bytes)")
+
+        offset = HEADER.size
+        self.ts = raw[offset : offset + column_bytes].view("<i8")
+        offset += column_bytes
+        for name in PRICE_COLUMNS:
+            setattr(self, name, raw[offset : offset + column_bytes].view("<f8"))
+            offset += column_bytes
+        self.path = path
+        self._raw = raw
+
+    def __len__(self) -> int:
+        return int(self.ts.shape[0])
+
+    def index_at(self, epoch_seconds):
+        """
+        Index of the first bar starting at or after each timestamp (O(log n) each).
+        """
+        return np.searchsorted(self.ts, epoch_seconds, side="left")
+
+
+class BarStore:
+    def __init__(self, root=None):
+        self.root = Path(root or settings.BAR_STORE_DIR)
+
+    def path(self, symbol: str) -> Path:
+        return self.root / f"{normalize_symbol(symbol)}.bars"
+
+    def symbols(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.stem for p in self.root.glob("*.bars"))
+
+    def load(self, symbol: str) -> Bars | None:
+        path = self.path(symbol)
+        if not path.exists():
+            return None
+        return Bars(path)
+
+    def write(self, symbol: str, ts, opens, highs, lows, closes) -> Path:
+        """
+        Atomically replace a symbol's file. Inputs must already be sorted and unique by ts.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(symbol)
+        tmp = path.with_suffix(".bars.tmp")
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(ts)))
+            f.write(np.ascontiguousarray(ts, dtype="<i8").tobytes())
+            for column in (opens, highs, lows, closes):
+                f.write(np.ascontiguousarray(column, dtype="<f8").tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return path
+
+    def ingest_csv(self, symbol: str, csv_path) -> int:
+        """
+        Merge a 1-minute OHLC CSV into the symbol's file. Rows from the CSV win
+        over existing bars with the same timestamp. Returns the new bar count.
+        """
+        ts, opens, highs, lows, closes = read_ohlc_csv(csv_path)
+
+        existing = self.load(symbol)
+        if existing is not None and len(existing):
+            ts = np.concatenate([existing.ts, ts])
+            opens = np.concatenate([existing.open, opens])
+            highs = np.concatenate([existing.high, highs])
+            lows = np.concatenate([existing.low, lows])
+            closes = np.concatenate([existing.close, closes])
+            del existing  # release the mapping before the file is replaced
+
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        # Keep the last occurrence of each timestamp (stable sort keeps CSV rows after existing ones).
+        keep = np.ones(ts.shape[0], dtype=bool)
+        keep[:-1] = ts[1:] != ts[:-1]
+        order = order[keep]
+
+        self.write(symbol, ts[keep], opens[order], highs[order], lows[order], closes[order])
+        return int(keep.sum())
+
+
+def normalize_symbol(symbol: str) -> str:
+    cleaned = re.sub(r"[^A-Z0-9_!-]", "", (symbol or "").strip().upper())
+    if not cleaned:
+        raise ValueError(f"Invalid symbol: {symbol!r}")
+    return cleaned
+
+
+def _parse_time(value: str) -> int:
+    value = value.strip()
+    if re.fullmatch(r"\d+(\.\d+)?", value):
+        seconds = float(value)
+        # Millisecond epochs are common in vendor exports.
+        return int(seconds / 1000) if seconds > 1e11 else int(seconds)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return int(parsed.timestamp())
+
+
+def read_ohlc_csv(csv_path):
+    """
+    Parse a CSV with a header row containing a time column plus open/high/low/close.
+    """
+    ts, opens, highs, lows, closes = [], [], [], [], []
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader, [])]
+        try:
+            time_col = next(header.index(h) for h in TIME_HEADERS if h in header)
+            cols = [header.index(name) for name in PRICE_COLUMNS]
+        except (StopIteration, ValueError):
+            raise BarFormatError(f"{csv_path}: expected a time column and open/high/low/close headers")
+
+        for line_no, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            try:
+                ts.append(_parse_time(row[time_col]))
+                opens.append(float(row[cols[0]]))
+                highs.append(float(row[cols[1]]))
+                lows.append(float(row[cols[2]]))
+                closes.append(float(row[cols[3]]))
+            except (IndexError, ValueError) as exc:
+                raise BarFormatError(f"{csv_path}:{line_no}: {exc}")
+
+    return (
+        np.array(ts, dtype="<i8"),
+        np.array(opens, dtype="<f8"),
+        np.array(highs, dtype="<f8"),
+        np.array(lows, dtype="<f8"),
+        np.array(closes, dtype="<f8"),
+    )
+
+
+def compute_excursions(bars: Bars, entry_ts, directions, stops, targets, horizon_minutes: int = 390) -> dict:
+    """
+    Vectorized excursion stats for many trades on one symbol.
+
+    entry_ts are epoch seconds, directions +1 (long) / -1 (short). The entry
+    price is the open of the bar for the minute containing the entry (the
+    entry is floored to the minute, so 09:30:40 uses the 09:30 bar). Trades
+    are followed bar by bar until the stop or target is hit (stop wins a bar
+    that touches both) or horizon_minutes elapse.
+
+    Returns arrays (NaN / -1 where a trade has no bar data or no risk):
+    mfe_r, mae_r, verified_r, seconds_to_stop, seconds_to_target.
+    """
+    entry_ts = np.asarray(entry_ts, dtype="<i8")
+    sign = np.asarray(directions, dtype="<f8")
+    stops = np.asarray(stops, dtype="<f8")
+    targets = np.asarray(targets, dtype="<f8")
+    n = entry_ts.shape[0]
+    n_bars = len(bars)
+
+    result = {
+        "mfe_r": np.full(n, np.nan),
+        "mae_r": np.full(n, np.nan),
+        "verified_r": np.full(n, np.nan),
+        "seconds_to_stop": np.full(n, -1, dtype="<i8"),
+        "seconds_to_target": np.full(n, -1, dtype="<i8"),
+    }
+    if n == 0 or n_bars == 0:
+        return result
+
+    entry_minute = entry_ts - entry_ts % BAR_SECONDS
+    start = bars.index_at(entry_minute)
+    has_bar = start < n_bars
+    start_c = np.minimum(start, n_bars - 1)
+    has_bar &= bars.ts[start_c] == entry_minute
+
+    entry = bars.open[start_c]
+    risk = np.abs(entry - stops)
+    valid = has_bar & (risk > 0)
+
+    offsets = np.arange(horizon_minutes)
+    idx = start_c[:, None] + offsets[None, :]
+    in_window = idx < n_bars
+    idx = np.minimum(idx, n_bars - 1)
+    bar_ts = bars.ts[idx]
+    in_window &= bar_ts < (entry_minute[:, None] + horizon_minutes * BAR_SECONDS)
+    in_window &= valid[:, None]
+
+    highs = bars.high[idx]
+    lows = bars.low[idx]
+    is_long = (sign > 0)[:, None]
+
+    stop_hit = np.where(is_long, lows <= stops[:, None], highs >= stops[:, None]) & in_window
+    target_hit = np.where(is_long, highs >= targets[:, None], lows <= targets[:, None]) & in_window
+
+    never = horizon_minutes
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), never)
+    first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), never)
+    exit_at = np.minimum(first_stop, first_target)
+
+    live = in_window & (offsets[None, :] <= exit_at[:, None])
+    favourable = np.where(is_long, highs - entry[:, None], entry[:, None] - lows)
+    adverse = np.where(is_long, entry[:, None] - lows, highs - entry[:, None])
+    safe_risk = np.where(risk > 0, risk, 1.0)
+    mfe = np.where(live, favourable, 0.0).max(axis=1).clip(min=0) / safe_risk
+    mae = np.where(live, adverse, 0.0).max(axis=1).clip(min=0) / safe_risk
+
+    # Mark-to-market at the last bar in the window when neither level was reached.
+    last_in_window = np.where(in_window.any(axis=1), in_window.sum(axis=1) - 1, 0)
+    last_close = bars.close[idx[np.arange(n), last_in_window]]
+    stopped = first_stop <= first_target
+    exit_price = np.where(
+        exit_at < never,
+        np.where(stopped, stops, targets),
+        last_close,
+    )
+    verified = (exit_price - entry) * sign / safe_risk
+
+    rows = np.arange(n)
+    stop_seconds = bar_ts[rows, np.minimum(first_stop, never - 1)] - entry_ts
+    target_seconds = bar_ts[rows, np.minimum(first_target, never - 1)] - entry_ts
+
+    result["mfe_r"] = np.where(valid, mfe, np.nan)
+    result["mae_r"] = np.where(valid, mae, np.nan)
+    result["verified_r"] = np.where(valid & in_window.any(axis=1), verified, np.nan)
+    result["seconds_to_stop"] = np.where(valid & (first_stop < never), np.maximum(stop_seconds, 0), -1)
+    result["seconds_to_target"] = np.where(valid & (first_target < never), np.maximum(target_seconds, 0), -1)
+    return result
+
+
+def _decimal_or_none(value):
+    if value is None or np.isnan(value):
+        return None
+    return Decimal(f"{value:.2f}")
+
+
+def update_trade_excursions(store: BarStore | None = None, symbol: str | None = None,
+                            horizon_minutes: int = 390, only_missing: bool = False, chunk_size: int = 2048,
+                            trade_ids=None) -> dict:
+    """
+    Compute and store MFE/MAE, time-to-stop/target and verified R for every trade
+    (optionally one symbol / the given trade ids / only trades never computed).
+    One vectorized pass per symbol chunk; returns {symbol: trades_updated}.
+    """
+    from .models import Trade, TradeDirection
+
+    store = store or BarStore()
+    if symbol is not None:
+        symbol = normalize_symbol(symbol)
+    trades = Trade.objects.select_related("session_run").exclude(session_run__symbol="")
+    if only_missing:
+        trades = trades.filter(excursions_computed_at__isnull=True)
+    if trade_ids is not None:
+        trades = trades.filter(pk__in=trade_ids)
+
+    by_symbol = {}
+    for trade in trades.iterator(chunk_size=chunk_size):
+        try:
+            key = normalize_symbol(trade.session_run.symbol)
+        except ValueError:
+            continue
+        if symbol is None or key == symbol:
+            by_symbol.setdefault(key, []).append(trade)
+
+    now = dj_timezone.now()
+    updated = {}
+    for key, symbol_trades in by_symbol.items():
+        bars = store.load(key)
+        if bars is None:
+            continue
+        for i in range(0, len(symbol_trades), chunk_size):
+            chunk = symbol_trades[i : i + chunk_size]
+            stats = compute_excursions(
+                bars,
+                [int(t.entry_time.timestamp()) for t in chunk],
+                [1 if t.direction == TradeDirection.LONG else -1 for t in chunk],
+                [float(t.stop) for t in chunk],
+                [float(t.target) for t in chunk],
+                horizon_minutes,
+            )
+            for j, trade in enumerate(chunk):
+                trade.mfe_r = _decimal_or_none(stats["mfe_r"][j])
+                trade.mae_r = _decimal_or_none(stats["mae_r"][j])
+                trade.verified_r = _decimal_or_none(stats["verified_r"][j])
+                to_stop = int(stats["seconds_to_stop"][j])
+                to_target = int(stats["seconds_to_target"][j])
+                trade.time_to_stop = timedelta(seconds=to_stop) if to_stop >= 0 else None
+                trade.time_to_target = timedelta(seconds=to_target) if to_target >= 0 else None
+                trade.excursions_computed_at = now
+            Trade.objects.bulk_update(
+                chunk,
+                ["mfe_r", "mae_r", "verified_r", "time_to_stop", "time_to_target", "excursions_computed_at"],
+                batch_size=500,
+            )
+        updated[key] = len(symbol_trades)
+    return updated
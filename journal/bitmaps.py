@@ -0,0 +1,190 @@
+"""
+In-memory bitmap index over checklist state for "what-if" filtering.
+
+One bitset of run ids per step (a plain Python int, bit n set = run n had
+the step checked), plus bitsets of runs per user and per strategy, so a
+filter like "FVG and Liquidity Sweep but not Displacement" is a few integer
+AND/OR/NOT operations instead of a multi-join StepCheck query.
+
+The index is built once per process from StepCheck (plus the packed checks
+of archived runs, see journal.archive) and then kept current by tailing the
+append-only RunEvent log (journal.events), which every checklist and review
+write appends to. Any worker therefore sees writes from any other.
+
+Ids are handed out before commit, so on Postgres an event can commit after
+one with a higher id. Each refresh therefore re-reads the last
+ID_SAFETY_WINDOW ids below its high-water mark and applies any it has not
+seen. A write held open for longer than that window is picked up by the
+next full rebuild (FULL_REBUILD_SECONDS), so until then results for it can
+be stale.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from .archive import archived_checked_step_ids
+from .checklists import snapshot_template, template_steps
+from .models import RunEvent, RunEventAction, SessionRun, StepCheck, StrategyVersion, Trade
+from .routers import analytics_reads
+
+FULL_REBUILD_SECONDS = 15 * 60
+ID_SAFETY_WINDOW = 500
+
+
+def iter_bits(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class StepBitmapIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.step_bits = {}
+        self.user_bits = {}
+        self.strategy_bits = {}
+        self.results = {}
+        self.last_event_id = 0
+        self.last_run_id = 0
+        # Event ids applied within ID_SAFETY_WINDOW of last_event_id.
+        self.recent_event_ids = set()
+        self.built_at = None
+
+    # Building / refreshing
+
+    def rebuild(self) -> None:
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        # The full scan may read a lagging replica; refresh() catches up from the primary.
+        with analytics_reads():
+            self._reset()
+            # Read the log position first so nothing written during the scan is missed.
+            self.last_event_id = RunEvent.objects.order_by("-id").values_list("id", flat=True).first() or 0
+            window = RunEvent.objects.filter(pk__gt=self.last_event_id - ID_SAFETY_WINDOW, pk__lte=self.last_event_id)
+            self.recent_event_ids = set(window.values_list("id", flat=True))
+            self._add_runs(SessionRun.objects.all())
+            for run_id, step_id in StepCheck.objects.filter(checked=True).values_list("session_run_id", "step_id"):
+                self._set(step_id, run_id, True)
+            self._add_archived()
+            for run_id, result_r in Trade.objects.values_list("session_run_id", "result_r"):
+                self.results[run_id] = float(result_r)
+            self.built_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """
+        Apply runs and checklist/review events written since the last refresh.
+        """
+        with self._lock:
+            # Checked under the lock, so threads that waited on a rebuild do not repeat it.
+            if self.built_at is None or time.monotonic() - self.built_at > FULL_REBUILD_SECONDS:
+                # Periodic full rebuild also picks up deletes, which are not logged.
+                self._rebuild()
+                return
+
+            # Adding a run is idempotent, so the window is simply read again.
+            self._add_runs(SessionRun.objects.filter(pk__gt=self.last_run_id - ID_SAFETY_WINDOW))
+
+            reviewed = set()
+            floor = self.last_event_id - ID_SAFETY_WINDOW
+            events = RunEvent.objects.filter(pk__gt=floor).order_by("id")
+            for event_id, run_id, step_id, action in events.values_list("id", "session_run_id", "step_id", "action"):
+                if event_id in self.recent_event_ids:
+                    continue
+                if action == RunEventAction.CHECKED:
+                    self._set(step_id, run_id, True)
+                elif action == RunEventAction.UNCHECKED:
+                    self._set(step_id, run_id, False)
+                elif action in (RunEventAction.REVIEWED, RunEventAction.ENTRY, RunEventAction.ENTRY_REMOVED):
+                    reviewed.add(run_id)
+                self.recent_event_ids.add(event_id)
+                self.last_event_id = max(self.last_event_id, event_id)
+            floor = self.last_event_id - ID_SAFETY_WINDOW
+            self.recent_event_ids = {event_id for event_id in self.recent_event_ids if event_id > floor}
+
+            if reviewed:
+                for run_id in reviewed:
+                    self.results.pop(run_id, None)
+                trades = Trade.objects.filter(session_run_id__in=reviewed)
+                for run_id, result_r in trades.values_list("session_run_id", "result_r"):
+                    self.results[run_id] = float(result_r)
+
+    def _add_runs(self, runs) -> None:
+        for run_id, user_id, strategy_id in runs.order_by("id").values_list("id", "user_id", "strategy_id"):
+            bit = 1 << run_id
+            self.user_bits[user_id] = self.user_bits.get(user_id, 0) | bit
+            self.strategy_bits[strategy_id] = self.strategy_bits.get(strategy_id, 0) | bit
+            self.last_run_id = max(self.last_run_id, run_id)
+
+    def _add_archived(self) -> None:
+        archived = SessionRun.objects.filter(archived_checks__isnull=False).order_by("snapshot_id")
+        step_ids = {}
+        for run_id, snapshot_id, blob in archived.values_list("id", "snapshot_id", "archived_checks"):
+            if snapshot_id not in step_ids:
+                snapshot = StrategyVersion.objects.get(pk=snapshot_id)
+                step_ids[snapshot_id] = [step.id for _, step in template_steps(snapshot_template(snapshot))]
+            for step_id in archived_checked_step_ids(blob, step_ids[snapshot_id]):
+                self._set(step_id, run_id, True)
+
+    def _set(self, step_id: int, run_id: int, checked: bool) -> None:
+        bits = self.step_bits.get(step_id, 0)
+        bit = 1 << run_id
+        self.step_bits[step_id] = bits | bit if checked else bits & ~bit
+
+    # Querying
+
+    def match(self, user_id: int, strategy_id=None, all_of=(), any_of=(), none_of=()) -> int:
+        """
+        Bitset of the user's runs with every step in all_of checked, at least
+        one of any_of checked (if given) and none of none_of checked.
+        """
+        bits = self.user_bits.get(user_id, 0)
+        if strategy_id is not None:
+            bits &= self.strategy_bits.get(strategy_id, 0)
+        for step_id in all_of:
+            bits &= self.step_bits.get(step_id, 0)
+        if any_of:
+            either = 0
+            for step_id in any_of:
+                either |= self.step_bits.get(step_id, 0)
+            bits &= either
+        for step_id in none_of:
+            bits &= ~self.step_bits.get(step_id, 0)
+        return bits
+
+    def query(self, user_id: int, strategy_id=None, all_of=(), any_of=(), none_of=()) -> dict:
+        """
+        Matching run ids (newest first) plus Trade.result_r stats for them.
+        """
+        started = time.perf_counter()
+        bits = self.match(user_id, strategy_id, all_of, any_of, none_of)
+        run_ids = sorted(iter_bits(bits), reverse=True)
+
+        results = [self.results[run_id] for run_id in run_ids if run_id in self.results]
+        wins = sum(1 for r in results if r > 0)
+        stats = {
+            "runs": len(run_ids),
+            "trades": len(results),
+            "wins": wins,
+            "win_rate": round(100 * wins / len(results), 1) if results else None,
+            "expectancy_r": Decimal(f"{sum(results) / len(results):.2f}") if results else None,
+            "total_r": Decimal(f"{sum(results):.2f}"),
+        }
+        return {
+            "run_ids": run_ids,
+            "stats": stats,
+            "elapsed_us": round((time.perf_counter() - started) * 1_000_000),
+        }
+
+
+step_index = StepBitmapIndex()
+
+
+def get_step_index() -> StepBitmapIndex:
+    step_index.refresh()
+    return step_index
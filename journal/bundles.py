@@ -0,0 +1,369 @@
+"""
+Strategy bundles: a zip with a JSON manifest plus the example images.
+
+    manifest.json
+        {"format": "trading-companion-bundle", "version": 1,
+         "concepts": [{"name", "description", "is_active"}, ...],
+         "strategies": [{"name", "description", "is_active", "sections": [
+             {"name", "order", "steps": [
+                 {"title", "description", "order", "required", "images": [
+                     {"path": "images/...", "caption", "order"}, ...]}]}]}]}
+    images/...
+
+Images are streamed in and out of the archive in chunks, never loaded whole.
+The admin export action, `manage.py export_strategy`/`import_strategy` and
+the bundles.export/bundles.import tasks (journal.tasks) all go through here.
+Importing first validates the whole manifest (names present, no duplicate
+concept, strategy, section or step names, every other field of the right
+type, every image in the archive), so a bad bundle is rejected before any
+file or row is written. It then
+upserts each level with one bulk_create(update_conflicts=True) on its
+natural key (Concept.name, Strategy.name, (strategy, Section.name),
+(section, Step.title)) and re-reads the ids with one query per level, so
+a whole library loads in a handful of queries. Bulk writes skip the model
+signals, so the import ends with journal.signals.library_bulk_changed.
+"""
+import json
+import os
+import zipfile
+
+from django.core.files import File
+from django.db import transaction
+
+from .models import Concept, Section, Step, StepImage, Strategy
+from .routers import analytics_reads
+from .signals import library_bulk_changed
+
+BUNDLE_FORMAT = "trading-companion-bundle"
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 64 * 1024
+
+
+class BundleError(ValueError):
+    pass
+
+
+# Export
+
+
+def build_manifest(strategies, concepts=()) -> tuple[dict, dict]:
+    """
+    Returns the manifest and {archive path: storage name} for every image it references.
+    """
+    images = {}
+    manifest_strategies = []
+    strategies = strategies.prefetch_related("sections__steps__images").order_by("name")
+    for strategy in strategies:
+        sections = []
+        for section in strategy.sections.all():
+            steps = []
+            for step in section.steps.all():
+                step_images = []
+                for image in step.images.all():
+                    path = f"images/{image.image.name}"
+                    images[path] = image.image.name
+                    step_images.append({"path": path, "caption": image.caption, "order": image.order})
+                steps.append(
+                    {
+                        "title": step.title,
+                        "description": step.description,
+                        "order": step.order,
+                        "required": step.required,
+                        "images": step_images,
+                    }
+                )
+            sections.append({"name": section.name, "order": section.order, "steps": steps})
+        manifest_strategies.append(
+            {
+                "name": strategy.name,
+                "description": strategy.description,
+                "is_active": strategy.is_active,
+                "sections": sections,
+            }
+        )
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "concepts": [{"name": c.name, "description": c.description, "is_active": c.is_active} for c in concepts],
+        "strategies": manifest_strategies,
+    }
+    return manifest, images
+
+
+def write_bundle(fileobj, strategies, concepts=()) -> dict:
+    """
+    Write a bundle for the given Strategy queryset (and Concepts) to a
+    seekable binary file object. Returns the manifest.
+    """
+    with analytics_reads():
+        manifest, images = build_manifest(strategies, concepts)
+    storage = StepImage._meta.get_field("image").storage
+    with zipfile.ZipFile(fileobj, "w") as archive:
+        archive.writestr(
+            MANIFEST_NAME,
+            json.dumps(manifest, indent=1, ensure_ascii=False),
+            compress_type=zipfile.ZIP_DEFLATED,
+        )
+        for path, name in sorted(images.items()):
+            # Images are already compressed; store them as-is.
+            info = zipfile.ZipInfo(path)
+            info.compress_type = zipfile.ZIP_STORED
+            with storage.open(name, "rb") as source, archive.open(info, "w", force_zip64=True) as target:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    target.write(chunk)
+    return manifest
+
+
+# Import
+
+
+def read_manifest(archive: zipfile.ZipFile) -> dict:
+    try:
+        manifest = json.loads(archive.read(MANIFEST_NAME).decode("utf-8"))
+    except KeyError:
+        raise BundleError(f"Bundle has no {MANIFEST_NAME}.")
+    except ValueError as exc:
+        raise BundleError(f"Invalid {MANIFEST_NAME}: {exc}")
+    if not isinstance(manifest, dict) or manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError("Not a strategy bundle.")
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise BundleError(f"Unsupported bundle version {manifest.get('version')!r}.")
+    return manifest
+
+
+def _name(entry, key: str, where: str, model) -> str:
+    value = entry.get(key) if isinstance(entry, dict) else None
+    if not isinstance(value, str) or not value.strip():
+        raise BundleError(f"{where}: missing {key}.")
+    max_length = model._meta.get_field(key).max_length
+    if len(value) > max_length:
+        raise BundleError(f"{where}: {key} {value!r} is longer than {max_length} characters.")
+    return value
+
+
+def _text(entry: dict, key: str, where: str, model) -> None:
+    value = entry.get(key, "")
+    if not isinstance(value, str):
+        raise BundleError(f"{where}: {key} must be a string.")
+    max_length = model._meta.get_field(key).max_length
+    if max_length is not None and len(value) > max_length:
+        raise BundleError(f"{where}: {key} is longer than {max_length} characters.")
+
+
+def _flag(entry: dict, key: str, where: str) -> None:
+    if not isinstance(entry.get(key, True), bool):
+        raise BundleError(f"{where}: {key} must be true or false.")
+
+
+def _order(entry: dict, where: str) -> None:
+    value = entry.get("order", 0)
+    # bool is an int subclass, but true/false is not an order.
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise BundleError(f"{where}: order must be a non-negative integer.")
+
+
+def _list(entry: dict, key: str, where: str) -> list:
+    value = entry.get(key, [])
+    if not isinstance(value, list):
+        raise BundleError(f"{where}: {key} must be a list.")
+    return value
+
+
+def _unique(names: list[str], what: str, where: str) -> None:
+    seen = set()
+    for name in names:
+        if name in seen:
+            raise BundleError(f"{where}: duplicate {what} {name!r}.")
+        seen.add(name)
+
+
+def validate_manifest(manifest: dict, archive: zipfile.ZipFile) -> set[str]:
+    """
+    Check everything import_bundle relies on. Returns the image paths to store.
+    """
+    concepts = _list(manifest, "concepts", "Bundle")
+    concept_names = [_name(c, "name", f"Concept {i + 1}", Concept) for i, c in enumerate(concepts)]
+    _unique(concept_names, "concept", "Bundle")
+    for concept, name in zip(concepts, concept_names):
+        _text(concept, "description", name, Concept)
+        _flag(concept, "is_active", name)
+
+    strategies = _list(manifest, "strategies", "Bundle")
+    strategy_names = [_name(s, "name", f"Strategy {i + 1}", Strategy) for i, s in enumerate(strategies)]
+    _unique(strategy_names, "strategy", "Bundle")
+    for strategy, name in zip(strategies, strategy_names):
+        _text(strategy, "description", name, Strategy)
+        _flag(strategy, "is_active", name)
+
+    archived = set(archive.namelist())
+    image_paths = set()
+    for strategy, strategy_name in zip(strategies, strategy_names):
+        sections = _list(strategy, "sections", strategy_name)
+        section_names = [
+            _name(section, "name", f"{strategy_name} section {i + 1}", Section) for i, section in enumerate(sections)
+        ]
+        _unique(section_names, "section", strategy_name)
+        for section, section_name in zip(sections, section_names):
+            where = f"{strategy_name} / {section_name}"
+            _order(section, where)
+            steps = _list(section, "steps", where)
+            titles = [_name(step, "title", f"{where} step {i + 1}", Step) for i, step in enumerate(steps)]
+            _unique(titles, "step", where)
+            for step, title in zip(steps, titles):
+                step_where = f"{where} / {title}"
+                _text(step, "description", step_where, Step)
+                _order(step, step_where)
+                _flag(step, "required", step_where)
+                for image in _list(step, "images", step_where):
+                    path = image.get("path") if isinstance(image, dict) else None
+                    if not isinstance(path, str) or path not in archived:
+                        raise BundleError(f"{step_where}: image {path!r} is missing from the bundle.")
+                    _text(image, "caption", f"{step_where} image {path}", StepImage)
+                    _order(image, f"{step_where} image {path}")
+                    image_paths.add(path)
+    return image_paths
+
+
+def _store_image(archive: zipfile.ZipFile, path: str) -> str:
+    """
+    Stream one archived image into StepImage storage. That storage is
+    content-addressed, so importing the same bundle twice reuses the file.
+    """
+    storage = StepImage._meta.get_field("image").storage
+    with archive.open(path) as source:
+        return storage.save(os.path.basename(path), File(source, name=os.path.basename(path)))
+
+
+def import_bundle(fileobj, prune: bool = False) -> dict:
+    """
+    Upsert everything in a bundle. Each imported step's images are replaced
+    by the bundle's; with prune=True, sections and steps of the imported
+    strategies that are not in the bundle are deleted too.
+    Returns row counts per model.
+    """
+    with zipfile.ZipFile(fileobj) as archive:
+        manifest = read_manifest(archive)
+        image_paths = validate_manifest(manifest, archive)
+        concepts = manifest.get("concepts", [])
+        strategies = manifest.get("strategies", [])
+
+        # Files before rows: a failed import leaves at most unreferenced media behind, never dangling rows.
+        stored = {path: _store_image(archive, path) for path in sorted(image_paths)}
+
+    with transaction.atomic():
+        if concepts:
+            Concept.objects.bulk_create(
+                [
+                    Concept(name=c["name"], description=c.get("description", ""), is_active=c.get("is_active", True))
+                    for c in concepts
+                ],
+                update_conflicts=True,
+                unique_fields=["name"],
+                update_fields=["description", "is_active"],
+            )
+
+        Strategy.objects.bulk_create(
+            [
+                Strategy(name=s["name"], description=s.get("description", ""), is_active=s.get("is_active", True))
+                for s in strategies
+            ],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["description", "is_active", "updated_at"],
+        )
+        strategy_ids = dict(Strategy.objects.filter(name__in=[s["name"] for s in strategies]).values_list("name", "id"))
+
+        Section.objects.bulk_create(
+            [
+                Section(strategy_id=strategy_ids[s["name"]], name=sec["name"], order=sec.get("order", i))
+                for s in strategies
+                for i, sec in enumerate(s.get("sections", []))
+            ],
+            update_conflicts=True,
+            unique_fields=["strategy", "name"],
+            update_fields=["order"],
+        )
+        section_ids = {
+            (strategy_id, name): pk
+            for pk, strategy_id, name in Section.objects.filter(strategy_id__in=strategy_ids.values()).values_list(
+                "id", "strategy_id", "name"
+            )
+        }
+
+        steps = []
+        images = []
+        for s in strategies:
+            for sec in s.get("sections", []):
+                section_id = section_ids[(strategy_ids[s["name"]], sec["name"])]
+                for i, step in enumerate(sec.get("steps", [])):
+                    steps.append(
+                        Step(
+                            section_id=section_id,
+                            title=step["title"],
+                            description=step.get("description", ""),
+                            order=step.get("order", i),
+                            required=step.get("required", True),
+                        )
+                    )
+                    for j, image in enumerate(step.get("images", [])):
+                        images.append((section_id, step["title"], image, j))
+        Step.objects.bulk_create(
+            steps,
+            update_conflicts=True,
+            unique_fields=["section", "title"],
+            update_fields=["description", "order", "required"],
+        )
+        step_ids = {
+            (section_id, title): pk
+            for pk, section_id, title in Step.objects.filter(section_id__in=section_ids.values()).values_list(
+                "id", "section_id", "title"
+            )
+        }
+
+        # StepImage has no natural key: the bundle's image list replaces the step's,
+        # keeping rows that are already identical so a re-import deletes nothing.
+        imported_step_ids = {step_ids[(step.section_id, step.title)] for step in steps}
+        wanted = {
+            (step_ids[(section_id, title)], stored[image["path"]], image.get("caption", ""), image.get("order", j))
+            for section_id, title, image, j in images
+        }
+        existing = {
+            row[1:]: row[0]
+            for row in StepImage.objects.filter(step_id__in=imported_step_ids).values_list(
+                "id", "step_id", "image", "caption", "order"
+            )
+        }
+        stale = [pk for key, pk in existing.items() if key not in wanted]
+        if stale:
+            StepImage.objects.filter(pk__in=stale).delete()
+        StepImage.objects.bulk_create(
+            [
+                StepImage(step_id=step_id, image=name, caption=caption, order=order)
+                for step_id, name, caption, order in sorted(wanted)
+                if (step_id, name, caption, order) not in existing
+            ]
+        )
+
+        pruned = 0
+        if prune:
+            imported_section_ids = {
+                section_ids[(strategy_ids[s["name"]], sec["name"])] for s in strategies for sec in s.get("sections", [])
+            }
+            stale_steps = Step.objects.filter(section_id__in=section_ids.values()).exclude(pk__in=imported_step_ids)
+            stale_sections = Section.objects.filter(strategy_id__in=strategy_ids.values()).exclude(
+                pk__in=imported_section_ids
+            )
+            pruned = stale_steps.delete()[0] + stale_sections.delete()[0]
+
+        library_bulk_changed(strategy_ids.values(), concepts=bool(concepts))
+
+    return {
+        "concepts": len(concepts),
+        "strategies": len(strategies),
+        "sections": sum(len(s.get("sections", [])) for s in strategies),
+        "steps": len(steps),
+        "images": len(images),
+        "pruned": pruned,
+    }
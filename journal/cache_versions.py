@@ -0,0 +1,37 @@
+"""
+Per-model version counters kept in the default cache.
+
+Cache keys and ETags that embed a counter go stale on the next bump, so
+nothing ever has to be deleted explicitly. Counters are bumped by signal
+handlers (journal.signals) whenever admin or code saves the model.
+"""
+import time
+
+from django.core.cache import cache
+
+STRATEGIES = "strategies"
+CONCEPTS = "concepts"
+
+
+def _key(name: str) -> str:
+    return f"journal:model-version:{name}"
+
+
+def _fresh_version() -> int:
+    # Never restart from 1 after an eviction, or old fragments would be served again.
+    return time.time_ns()
+
+
+def model_version(name: str) -> int:
+    version = cache.get(_key(name))
+    if version is None:
+        cache.add(_key(name), _fresh_version(), None)
+        version = cache.get(_key(name), 0)
+    return version
+
+
+def bump_model_version(name: str) -> None:
+    try:
+        cache.incr(_key(name))
+    except ValueError:
+        cache.set(_key(name), _fresh_version(), None)
@@ -0,0 +1,149 @@
+"""
+Published strategy snapshots and sparse StepCheck merging.
+
+Every run pins an immutable StrategyVersion. Its checklist (sections, steps
+and example images) is stored as one zlib-compressed compact JSON blob, so
+rendering a run never joins the live Section/Step tables and later edits in
+admin cannot change what a past run appears to have checked.
+
+Strategy.version is only ever bumped with F() (journal.signals), so it
+never goes back to a number that was already seen. The snapshot for a
+version is looked up in the cache; on a miss the live checklist is hashed
+and an earlier snapshot with the same content is reused.
+
+A run only stores StepCheck rows for steps that were actually touched, so
+every read merges those rows against the decoded snapshot.
+"""
+import hashlib
+import json
+import zlib
+from functools import lru_cache
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+
+from .models import Section, SessionRun, StepImage, Strategy, StrategyVersion
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_ID_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def build_snapshot_payload(strategy_id: int) -> dict:
+    """
+    Serialize the live checklist of a strategy:
+    {"v": 1, "s": [[section_id, name, [[step_id, title, description, required, [[image, caption], ...]], ...]], ...]}
+    """
+    sections = (
+        Section.objects.filter(strategy_id=strategy_id)
+        .prefetch_related("steps__images")
+        .order_by("order", "id")
+    )
+    payload = []
+    for section in sections:
+        steps = []
+        for step in sorted(section.steps.all(), key=lambda s: (s.order, s.id)):
+            images = [[img.image.name, img.caption] for img in step.images.all()]
+            steps.append([step.id, step.title, step.description, step.required, images])
+        payload.append([section.id, section.name, steps])
+    return {"v": SNAPSHOT_FORMAT, "s": payload}
+
+
+def _snapshot_json(payload: dict) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def encode_snapshot(payload: dict) -> bytes:
+    return zlib.compress(_snapshot_json(payload), 9)
+
+
+def decode_snapshot(blob) -> dict:
+    return json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+
+
+def snapshot_hash(payload: dict) -> str:
+    return hashlib.sha256(_snapshot_json(payload)).hexdigest()
+
+
+def _snapshot_key(strategy_id: int, version: int) -> str:
+    return f"journal:published-snapshot:{strategy_id}:{version}"
+
+
+def current_snapshot(strategy: Strategy) -> tuple[int, int]:
+    """
+    (StrategyVersion id, step count) for the strategy's current version,
+    publishing it from the live tables the first time it is needed. A
+    checklist that was published before (same content hash) is reused.
+    """
+    key = _snapshot_key(strategy.id, strategy.version)
+    cached = cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+
+    payload = build_snapshot_payload(strategy.id)
+    content_hash = snapshot_hash(payload)
+    published = StrategyVersion.objects.filter(strategy=strategy, content_hash=content_hash).order_by("id")
+    snapshot_id = published.values_list("id", flat=True).first()
+    while snapshot_id is None:
+        number = StrategyVersion.objects.filter(strategy=strategy).aggregate(n=Max("number"))["n"] or 0
+        try:
+            with transaction.atomic():
+                snapshot_id = StrategyVersion.objects.create(
+                    strategy=strategy, number=number + 1, blob=encode_snapshot(payload), content_hash=content_hash
+                ).id
+        except IntegrityError:
+            # Another request published first, maybe this same checklist.
+            snapshot_id = published.values_list("id", flat=True).first()
+
+    snapshot = (snapshot_id, sum(len(steps) for _, _, steps in payload["s"]))
+    cache.set(key, snapshot, SNAPSHOT_ID_CACHE_TIMEOUT)
+    return snapshot
+
+
+def publish_version(strategy: Strategy) -> int:
+    """
+    Id of the StrategyVersion for the strategy's current version.
+    """
+    return current_snapshot(strategy)[0]
+
+
+@lru_cache(maxsize=256)
+def _decoded_template(snapshot_id: int, blob: bytes) -> tuple:
+    storage = StepImage._meta.get_field("image").storage
+    template = []
+    for section_id, section_name, steps in decode_snapshot(blob)["s"]:
+        step_rows = []
+        for step_id, title, description, required, images in steps:
+            step = SimpleNamespace(id=step_id, title=title, description=description, required=required)
+            image_rows = [
+                SimpleNamespace(image=SimpleNamespace(name=name, url=storage.url(name)), caption=caption)
+                for name, caption in images
+            ]
+            step_rows.append({"step": step, "images": image_rows, "has_images": bool(image_rows)})
+        template.append({"section": SimpleNamespace(id=section_id, name=section_name), "steps": step_rows})
+    return tuple(template)
+
+
+def snapshot_template(snapshot: StrategyVersion) -> tuple:
+    """
+    Decoded checklist for a snapshot, memoized per process (snapshots never change).
+    """
+    return _decoded_template(snapshot.id, bytes(snapshot.blob))
+
+
+def run_template(run: SessionRun) -> tuple:
+    """
+    Checklist a run was started against. Select the run with
+    select_related("snapshot") so this is a single-row read.
+    """
+    if run.snapshot_id is None:
+        run.snapshot_id = publish_version(run.strategy)
+        SessionRun.objects.filter(pk=run.pk).update(snapshot_id=run.snapshot_id)
+    return snapshot_template(run.snapshot)
+
+
+def template_steps(template):
+    for section_row in template:
+        for step_row in section_row["steps"]:
+            yield section_row["section"], step_row["step"]
@@ -0,0 +1,207 @@
+"""
+Cross-user statistics for the staff coach dashboard.
+
+Everything is a grouped aggregate, so the query count does not depend on
+the number of traders:
+  1. runs per user: count, reviewed, checklist compliance from the
+     denormalized SessionRun.checked_count/step_count (StepCheck is never read);
+  2. trades per user: count, wins, total/average R, average win and loss;
+  3. max drawdown per user: running SUM of R, then its running MAX (the
+     peak), then MAX(peak - cumulative) per user, all in window functions,
+     so only one row per trader comes back.
+Results are cached for COACH_CACHE_SECONDS per window.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Avg, Count, F, Max, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from .archive import archived_checked_step_ids, snapshot_step_ids
+from .checklists import snapshot_template, template_steps
+from .models import SessionRun, StepCheck, StrategyVersion, Trade
+from .routers import analytics_reads
+
+COACH_CACHE_SECONDS = 300
+SORT_KEYS = ("username", "runs", "compliance", "trades", "trades_per_week", "expectancy", "total_r", "max_drawdown")
+
+
+def trader_stats(days: int | None = 30) -> list[dict]:
+    """
+    One row per trader with a run in the window (None: all time).
+    """
+    key = f"journal:coach:{days or 'all'}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = _build_trader_stats(days)
+        cache.set(key, rows, COACH_CACHE_SECONDS)
+    return rows
+
+
+@analytics_reads()
+def _build_trader_stats(days: int | None) -> list[dict]:
+    runs = SessionRun.objects.all()
+    trades = Trade.objects.all()
+    if days:
+        since = timezone.now() - timedelta(days=days)
+        runs = runs.filter(started_at__gte=since)
+        trades = trades.filter(session_run__started_at__gte=since)
+
+    rows = {}
+    run_totals = (
+        runs.values("user_id", "user__username")
+        .annotate(
+            runs=Count("id"),
+            reviewed=Count("id", filter=Q(completed=True)),
+            checked=Sum("checked_count"),
+            steps=Sum("step_count"),
+            last_run=Max("started_at"),
+        )
+        .order_by()
+    )
+    for row in run_totals:
+        rows[row["user_id"]] = {
+            "user_id": row["user_id"],
+            "username": row["user__username"],
+            "runs": row["runs"],
+            "reviewed": row["reviewed"],
+            "compliance": round(100 * row["checked"] / row["steps"]) if row["steps"] else None,
+            "last_run": row["last_run"],
+            "trades": 0,
+            "wins": 0,
+            "win_rate": None,
+            "total_r": Decimal("0"),
+            "expectancy": None,
+            "avg_win": None,
+            "avg_loss": None,
+            "max_drawdown": Decimal("0"),
+        }
+
+    trade_totals = (
+        trades.values("session_run__user_id")
+        .annotate(
+            trades=Count("id"),
+            wins=Count("id", filter=Q(result_r__gt=0)),
+            total_r=Sum("result_r"),
+            expectancy=Avg("result_r"),
+            avg_win=Avg("result_r", filter=Q(result_r__gt=0)),
+            avg_loss=Avg("result_r", filter=Q(result_r__lte=0)),
+        )
+        .order_by()
+    )
+    for row in trade_totals:
+        stats = rows.get(row["session_run__user_id"])
+        if stats is None:
+            continue
+        stats.update(
+            trades=row["trades"],
+            wins=row["wins"],
+            win_rate=round(100 * row["wins"] / row["trades"]),
+            total_r=row["total_r"],
+            expectancy=_r(row["expectancy"]),
+            avg_win=_r(row["avg_win"]),
+            avg_loss=_r(row["avg_loss"]),
+        )
+
+    for user_id, drawdown in _max_drawdowns(trades).items():
+        if user_id in rows:
+            rows[user_id]["max_drawdown"] = drawdown
+
+    weeks = (days or _span_days(runs)) / 7
+    for stats in rows.values():
+        stats["trades_per_week"] = round(stats["trades"] / weeks, 1) if weeks else None
+    return sorted(rows.values(), key=lambda r: r["username"])
+
+
+def _r(value):
+    return None if value is None else Decimal(value).quantize(Decimal("0.01"))
+
+
+def _max_drawdowns(trades) -> dict:
+    """
+    Largest peak-to-trough fall of cumulative R per user, starting from 0R.
+    The ORM cannot window over a window, so the running sum is built as a
+    queryset and wrapped in SQL that takes the running peak and the maximum.
+    """
+    order = ["entry_time", "id"]
+    cumulative = (
+        trades.annotate(
+            trader_id=F("session_run__user_id"),
+            cum_r=Window(Sum("result_r"), partition_by="session_run__user_id", order_by=order),
+            seq=Window(RowNumber(), partition_by="session_run__user_id", order_by=order),
+        )
+        .order_by()
+        .values_list("trader_id", "cum_r", "seq")
+    )
+    connection = connections[cumulative.db]
+    inner_sql, params = cumulative.query.get_compiler(connection=connection).as_sql()
+    sql = f"""
+        SELECT trader_id, MAX(peak - cum_r), MIN(cum_r)
+        FROM (
+            SELECT trader_id, cum_r, MAX(cum_r) OVER (PARTITION BY trader_id ORDER BY seq) AS peak
+            FROM ({inner_sql}) cumulative
+        ) peaks
+        GROUP BY trader_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    # Below the starting 0R, the fall is measured from 0 rather than from a lower peak.
+    return {
+        user_id: _r(max(Decimal("0"), Decimal(str(from_peak)), -Decimal(str(lowest))))
+        for user_id, from_peak, lowest in rows
+    }
+
+
+def _span_days(runs) -> int:
+    first = runs.order_by("started_at").values_list("started_at", flat=True).first()
+    return max((timezone.now() - first).days, 7) if first else 0
+
+
+def sort_stats(rows: list[dict], sort: str) -> list[dict]:
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in SORT_KEYS:
+        return rows
+    present = [r for r in rows if r[key] is not None]
+    missing = [r for r in rows if r[key] is None]
+    return sorted(present, key=lambda r: r[key], reverse=descending) + missing
+
+
+def backfill_run_counts(batch_size: int = 1000) -> int:
+    """
+    Fill SessionRun.checked_count/step_count for runs saved before they existed.
+    """
+    checked = (
+        StepCheck.objects.filter(session_run=OuterRef("pk"), checked=True)
+        .order_by()
+        .values("session_run")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    updated = SessionRun.objects.filter(archived_checks__isnull=True).update(
+        checked_count=Coalesce(Subquery(checked), 0)
+    )
+
+    # Archived runs keep their checks in a bitmap on the row.
+    archived = SessionRun.objects.filter(archived_checks__isnull=False).select_related("snapshot", "strategy")
+    batch = []
+    for run in archived.iterator(chunk_size=batch_size):
+        run.checked_count = len(archived_checked_step_ids(run.archived_checks, snapshot_step_ids(run)))
+        batch.append(run)
+        if len(batch) >= batch_size:
+            SessionRun.objects.bulk_update(batch, ["checked_count"])
+            updated += len(batch)
+            batch = []
+    SessionRun.objects.bulk_update(batch, ["checked_count"])
+    updated += len(batch)
+
+    # Step totals depend only on the snapshot, and there are few of those.
+    snapshot_ids = SessionRun.objects.exclude(snapshot=None).values_list("snapshot_id", flat=True).distinct()
+    for snapshot in StrategyVersion.objects.filter(pk__in=list(snapshot_ids)):
+        step_count = sum(1 for _ in template_steps(snapshot_template(snapshot)))
+        SessionRun.objects.filter(snapshot=snapshot).update(step_count=step_count)
+    return updated
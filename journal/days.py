@@ -0,0 +1,139 @@
+"""
+Compact day state for the day page, and the one-request day save.
+
+State (GET /api/day/<y>/<m>/<d>/):
+    {"date": "YYYY-MM-DD", "updated": iso or null,
+     "form": {field: value, ...},
+     "slots": {timeframe: [[concept_id, note], ...]},   only non-empty timeframes
+     "attachments": [[url, name], ...],
+     "concepts": concept library version (fetch /api/concepts/?v=<it> when it changes)}
+
+Save (POST to the same URL) takes {"form": {...}, "slots": {...}} with
+either key optional, validates both and writes the journal fields and the
+slot rows in one transaction.
+"""
+from django.db import IntegrityError, transaction
+from django.forms.models import model_to_dict
+
+from .cache_versions import CONCEPTS, model_version
+from .forms import DayJournalForm
+from .models import Attachment, Concept, DayJournal, JournalSlotItem, Timeframe
+
+FORM_FIELDS = DayJournalForm._meta.fields
+VALID_TIMEFRAMES = {tf for tf, _ in Timeframe.choices}
+
+
+class InvalidSlots(ValueError):
+    pass
+
+
+class UnknownConcepts(InvalidSlots):
+    pass
+
+
+def day_state(user, dt) -> dict:
+    journal = DayJournal.objects.filter(user=user, date=dt).first()
+    state = {
+        "date": dt.isoformat(),
+        "updated": None,
+        "form": model_to_dict(journal or DayJournal(user=user, date=dt), fields=FORM_FIELDS),
+        "slots": {},
+        "attachments": [],
+        "concepts": model_version(CONCEPTS),
+    }
+    if journal is None:
+        return state
+
+    state["updated"] = journal.updated_at.isoformat()
+    items = JournalSlotItem.objects.filter(journal=journal).order_by("timeframe", "order")
+    for timeframe, concept_id, note in items.values_list("timeframe", "concept_id", "note"):
+        state["slots"].setdefault(timeframe, []).append([concept_id, note])
+    attachments = Attachment.objects.filter(journal=journal).order_by("created_at", "id")
+    storage = Attachment._meta.get_field("file").storage
+    state["attachments"] = [
+        [storage.url(name), original] for name, original in attachments.values_list("file", "original_name")
+    ]
+    return state
+
+
+def clean_slots(slots) -> list[tuple[str, int, int, str]]:
+    """
+    Validate a {timeframe: [{"concept_id", "note"} or [concept_id, note], ...]} payload.
+    Returns (timeframe, order, concept_id, note) rows; unknown timeframes are skipped.
+    """
+    if not isinstance(slots, dict):
+        raise InvalidSlots("Invalid slots payload")
+    rows = []
+    for timeframe, items in slots.items():
+        if timeframe not in VALID_TIMEFRAMES or not isinstance(items, list):
+            continue
+        for idx, obj in enumerate(items):
+            if isinstance(obj, dict):
+                concept_id, note = obj.get("concept_id"), obj.get("note")
+            elif isinstance(obj, list) and obj:
+                concept_id, note = obj[0], obj[1] if len(obj) > 1 else ""
+            else:
+                continue
+            if not concept_id:
+                continue
+            try:
+                concept_id = int(concept_id)
+            except (TypeError, ValueError):
+                raise InvalidSlots(f"Invalid concept id {concept_id!r}")
+            if note is not None and not isinstance(note, str):
+                raise InvalidSlots(f"Invalid note for concept {concept_id}")
+            rows.append((timeframe, idx, concept_id, (note or "")[:240]))
+
+    wanted = {row[2] for row in rows}
+    active = set(Concept.objects.filter(pk__in=wanted, is_active=True).values_list("id", flat=True))
+    if wanted - active:
+        raise UnknownConcepts(f"Unknown concepts: {sorted(wanted - active)}")
+    return rows
+
+
+def replace_slots(journal: DayJournal, rows) -> None:
+    JournalSlotItem.objects.filter(journal=journal).delete()
+    JournalSlotItem.objects.bulk_create(
+        JournalSlotItem(journal=journal, timeframe=timeframe, order=order, concept_id=concept_id, note=note)
+        for timeframe, order, concept_id, note in rows
+    )
+
+
+def save_day(user, dt, payload: dict, retry: bool = True) -> tuple[DayJournal | None, dict]:
+    """
+    Apply a day save. Returns (journal, {}) or (None, errors) with nothing written.
+    """
+    rows = None
+    if "slots" in payload:
+        try:
+            rows = clean_slots(payload["slots"])
+        except InvalidSlots as exc:
+            return None, {"slots": [str(exc)]}
+
+    journal = DayJournal.objects.filter(user=user, date=dt).first() or DayJournal(user=user, date=dt)
+    form = None
+    if "form" in payload:
+        if not isinstance(payload["form"], dict):
+            return None, {"form": ["Invalid form payload"]}
+        form = DayJournalForm({**model_to_dict(journal, fields=FORM_FIELDS), **payload["form"]}, instance=journal)
+        if not form.is_valid():
+            return None, form.errors.get_json_data()
+
+    # Validation is done and every statement below writes, so the transaction
+    # takes the write lock on its first statement instead of upgrading later.
+    try:
+        with transaction.atomic():
+            if form is not None:
+                journal = form.save()
+            elif journal.pk is None:
+                journal.save()
+            else:
+                journal.save(update_fields=["updated_at"])
+            if rows is not None:
+                replace_slots(journal, rows)
+    except IntegrityError:
+        # A concurrent save created the day first; apply this one on top of it.
+        if not retry or journal.pk is not None:
+            raise
+        return save_day(user, dt, payload, retry=False)
+    return journal, {}
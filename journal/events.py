@@ -0,0 +1,87 @@
+"""
+Append-only run event log: batched writes, timeline replay and derived metrics.
+"""
+from datetime import timedelta
+
+from .models import RunEvent, RunEventAction, SessionRun
+
+
+def record_events(events: list[RunEvent]) -> None:
+    """
+    Write a batch of events in one INSERT. Call inside the same transaction
+    as the checklist/review write the events describe.
+    """
+    if events:
+        RunEvent.objects.bulk_create(events)
+
+
+def checklist_events(run: SessionRun, before: dict, after: dict, now) -> list[RunEvent]:
+    """
+    Diff two {step_id: (checked, notes)} maps into unsaved events.
+    """
+    events = []
+    for step_id, (checked, notes) in after.items():
+        old_checked, old_notes = before.get(step_id, (False, ""))
+        if checked != old_checked:
+            action = RunEventAction.CHECKED if checked else RunEventAction.UNCHECKED
+            events.append(RunEvent(session_run=run, step_id=step_id, action=action, occurred_at=now))
+        if notes != old_notes:
+            events.append(RunEvent(session_run=run, step_id=step_id, action=RunEventAction.NOTE, occurred_at=now))
+    return events
+
+
+def replay_run(run: SessionRun, events=None) -> list[dict]:
+    """
+    Rebuild a run's timeline from its events.
+
+    Returns one row per event, in the order the events occurred, with its
+    offset from the run start and the number of steps checked right after
+    it, so the order and pace in which confluences were ticked can be read
+    back even after later unchecks.
+    """
+    if events is None:
+        events = list(run.events.order_by("occurred_at", "id"))
+
+    checked = set()
+    timeline = []
+    for event in events:
+        if event.action == RunEventAction.CHECKED:
+            checked.add(event.step_id)
+        elif event.action == RunEventAction.UNCHECKED:
+            checked.discard(event.step_id)
+
+        timeline.append(
+            {
+                "at": event.occurred_at,
+                "offset": event.occurred_at - run.started_at,
+                "action": event.action,
+                "label": event.get_action_display(),
+                "step_id": event.step_id,
+                "checked_count": len(checked),
+            }
+        )
+    return timeline
+
+
+def time_to_entry(run: SessionRun, events=None) -> timedelta | None:
+    """
+    Time from the first checklist tick (or the run start, if nothing was
+    ticked) to the current trade entry. None if no entry was logged or the
+    trade was removed since.
+    """
+    if events is None:
+        events = list(run.events.order_by("id"))
+
+    # The latest recorded entry wins, whatever time it is backdated to.
+    entry = None
+    for event in sorted(events, key=lambda e: e.id):
+        if event.action == RunEventAction.ENTRY:
+            entry = event.occurred_at
+        elif event.action == RunEventAction.ENTRY_REMOVED:
+            entry = None
+    if entry is None:
+        return None
+
+    ticks = [e.occurred_at for e in events if e.action == RunEventAction.CHECKED]
+    start = min(ticks) if ticks else run.started_at
+    return max(entry - start, timedelta(0))
@@ -31,11 +31,16 @@ class StartSessionRunForm(forms.ModelForm):
 
     class Meta:
         model = SessionRun
-        fields = ["strategy", "symbol"]
+        # strategy is set in save(): as a model field, validation would look it up a second time.
+        fields = ["symbol"]
         widgets = {
             "symbol": forms.TextInput(attrs={"placeholder": "MNQ, SI, NQ, ES...", "autofocus": True}),
         }
 
+    def save(self, commit=True):
+        self.instance.strategy = self.cleaned_data["strategy"]
+        return super().save(commit)
+
 
 class SessionRunReviewForm(forms.ModelForm):
     class Meta:
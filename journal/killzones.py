@@ -0,0 +1,174 @@
+"""
+New York time buckets for runs and trades.
+
+Every SessionRun (started_at) and Trade (entry_time) stores, in New York
+time and so correct across DST changes:
+  trading_date    the futures trading day; it rolls at 18:00, so an evening
+                  Asia trade belongs to the next day's date;
+  market_session  Asia 18:00-02:00, London 02:00-08:00, NY 08:00-17:00,
+                  Closed 17:00-18:00;
+  killzone        London open 02:00-05:00, NY AM 08:30-11:00,
+                  NY lunch 12:00-13:30, NY PM 13:30-16:00, else blank;
+  session_minute  minutes since the start of market_session.
+The columns are set in pre_save (journal.signals). Rows written around
+save() -- bulk_create, queryset.update, older data -- are filled by
+backfill_buckets(). Time-of-day analytics then GROUP BY the stored columns
+instead of converting timestamps in Python.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Killzone, MarketSession, SessionRun, Trade
+from .routers import analytics_reads
+
+MARKET_TZ = ZoneInfo("America/New_York")
+TRADING_DAY_START = time(18)
+BUCKET_FIELDS = ["trading_date", "market_session", "killzone", "session_minute"]
+SESSION_SLOT_MINUTES = 30
+
+SESSION_WINDOWS = [
+    (MarketSession.ASIA, time(18), time(2)),
+    (MarketSession.LONDON, time(2), time(8)),
+    (MarketSession.NY, time(8), time(17)),
+    (MarketSession.CLOSED, time(17), time(18)),
+]
+KILLZONE_WINDOWS = [
+    (Killzone.LONDON_OPEN, time(2), time(5)),
+    (Killzone.NY_AM, time(8, 30), time(11)),
+    (Killzone.NY_LUNCH, time(12), time(13, 30)),
+    (Killzone.NY_PM, time(13, 30), time(16)),
+]
+
+
+def _minute(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def _build_minute_table() -> list[tuple[str, str, int]]:
+    """
+    (session, killzone, session_minute) for every minute of the New York day.
+    """
+    table = []
+    for minute in range(24 * 60):
+        session, session_minute = "", None
+        for name, start, end in SESSION_WINDOWS:
+            offset = (minute - _minute(start)) % (24 * 60)
+            if offset < (_minute(end) - _minute(start)) % (24 * 60):
+                session, session_minute = name, offset
+                break
+        killzone = next(
+            (name for name, start, end in KILLZONE_WINDOWS if _minute(start) <= minute < _minute(end)), ""
+        )
+        table.append((session, killzone, session_minute))
+    return table
+
+
+MINUTE_TABLE = _build_minute_table()
+
+
+def market_buckets(moment: datetime) -> dict:
+    local = moment.astimezone(MARKET_TZ)
+    session, killzone, session_minute = MINUTE_TABLE[local.hour * 60 + local.minute]
+    trading_date = local.date()
+    if local.time() >= TRADING_DAY_START:
+        trading_date += timedelta(days=1)
+    return {
+        "trading_date": trading_date,
+        "market_session": session,
+        "killzone": killzone,
+        "session_minute": session_minute,
+    }
+
+
+def apply_buckets(instance, moment: datetime | None) -> None:
+    if moment is None:
+        return
+    for field, value in market_buckets(moment).items():
+        setattr(instance, field, value)
+
+
+def _backfill(queryset, time_field: str, batch_size: int) -> int:
+    model = queryset.model
+    updated = 0
+    last_pk = 0
+    # Page by primary key rather than holding a cursor open across the updates.
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).order_by("pk").values_list("pk", time_field)[:batch_size])
+        if not rows:
+            return updated
+        model.objects.bulk_update([model(pk=pk, **market_buckets(moment)) for pk, moment in rows], BUCKET_FIELDS)
+        updated += len(rows)
+        last_pk = rows[-1][0]
+
+
+def backfill_buckets(everything: bool = False, batch_size: int = 1000) -> tuple[int, int]:
+    """
+    Fill the bucket columns; by default only rows that have none yet.
+    Returns (runs, trades) updated.
+    """
+    runs = SessionRun.objects.all()
+    trades = Trade.objects.all()
+    if not everything:
+        runs = runs.filter(trading_date__isnull=True)
+        trades = trades.filter(trading_date__isnull=True)
+    return _backfill(runs, "started_at", batch_size), _backfill(trades, "entry_time", batch_size)
+
+
+def _trade_rows(trades, group_by: str) -> list[dict]:
+    rows = (
+        trades.values(group_by)
+        .annotate(
+            trades=Count("id"),
+            wins=Count("id", filter=Q(result_r__gt=0)),
+            total_r=Coalesce(Sum("result_r"), Decimal("0")),
+            avg_r=Avg("result_r"),
+        )
+        .order_by(group_by)
+    )
+    return [
+        {
+            "key": row[group_by],
+            "trades": row["trades"],
+            "wins": row["wins"],
+            "win_rate": round(100 * row["wins"] / row["trades"]),
+            "total_r": row["total_r"],
+            "avg_r": Decimal(row["avg_r"]).quantize(Decimal("0.01")),
+        }
+        for row in rows
+    ]
+
+
+@analytics_reads()
+def killzone_stats(user_id: int, session: str = MarketSession.NY, since=None) -> dict:
+    """
+    Trade outcomes by killzone, by session, and by half hour of one session.
+    Three grouped queries on the stored buckets.
+    """
+    trades = Trade.objects.filter(session_run__user_id=user_id, trading_date__isnull=False)
+    if since is not None:
+        trades = trades.filter(trading_date__gte=since)
+
+    labels = dict(Killzone.choices)
+    killzones = {row["key"]: row for row in _trade_rows(trades, "killzone")}
+    by_killzone = [
+        {**killzones[key], "label": labels.get(key, "Outside killzones")}
+        for key in [*labels, ""]
+        if key in killzones
+    ]
+
+    session_labels = dict(MarketSession.choices)
+    sessions = {row["key"]: row for row in _trade_rows(trades, "market_session")}
+    by_session = [{**sessions[key], "label": session_labels[key]} for key in session_labels if key in sessions]
+
+    slots = _trade_rows(
+        trades.filter(market_session=session).annotate(slot=F("session_minute") / SESSION_SLOT_MINUTES), "slot"
+    )
+    start = next(_minute(s) for name, s, _ in SESSION_WINDOWS if name == session)
+    for row in slots:
+        minute = (start + row["key"] * SESSION_SLOT_MINUTES) % (24 * 60)
+        row["label"] = f"{minute // 60:02d}:{minute % 60:02d}"
+    return {"by_killzone": by_killzone, "by_session": by_session, "by_slot": slots}
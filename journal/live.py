@@ -0,0 +1,191 @@
+"""
+Live run sync: Server-Sent Event streams of checklist deltas.
+
+The RunEvent log is the source of truth. A stream just sends the current
+state of every step touched by events newer than the last one it sent,
+using the RunEvent id as the SSE id. When the browser reconnects it sends
+Last-Event-ID, so the stream resumes without gaps.
+
+Ids are handed out before commit, so an event can become visible after one
+with a higher id (see journal.bitmaps). Each read therefore also covers the
+ID_SAFETY_WINDOW ids below the cursor and skips the ids already sent. A
+stream keeps those ids in memory and the polling client sends them back; a
+reconnecting stream has lost them and sends the window's steps again, which
+is harmless because a delta carries each step's full state.
+
+Streams do not poll the database in a tight loop. They are woken in two ways:
+  * in-process pub/sub: publish_run() sets an asyncio.Event for every
+    stream of that run served by this process;
+  * cross-process: publish_run() also touches LIVE_SIGNAL_DIR/<run_id>, and
+    streams in other workers stat that file a few times a second.
+A slow safety poll covers a missed wakeup.
+
+A stream ends after STREAM_MAX_SECONDS; the browser reconnects with
+Last-Event-ID. Reviewing a run deletes its signal file (forget_run), and
+prune_signals() removes the files of runs abandoned before review.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .bitmaps import ID_SAFETY_WINDOW
+from .models import RunEvent, RunEventAction, StepCheck
+
+WAKE_CHECK_SECONDS = 0.25
+SAFETY_POLL_SECONDS = 10
+HEARTBEAT_SECONDS = 15
+RETRY_MS = 3000
+STREAM_MAX_SECONDS = 300
+CHECKLIST_ACTIONS = (RunEventAction.CHECKED, RunEventAction.UNCHECKED, RunEventAction.NOTE)
+
+_subscribers = {}
+_lock = threading.Lock()
+
+
+def _signal_path(run_id: int) -> Path:
+    return Path(settings.LIVE_SIGNAL_DIR) / str(run_id)
+
+
+def _signal_mtime(run_id: int) -> int:
+    try:
+        return os.stat(_signal_path(run_id)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def publish_run(run_id: int) -> None:
+    """
+    Wake every stream of this run. Call after the checklist write commits.
+    """
+    with _lock:
+        waiters = list(_subscribers.get(run_id, ()))
+    for loop, event in waiters:
+        loop.call_soon_threadsafe(event.set)
+
+    path = _signal_path(run_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def forget_run(run_id: int) -> None:
+    _signal_path(run_id).unlink(missing_ok=True)
+
+
+def prune_signals(max_age_seconds: int) -> int:
+    """
+    Delete signal files not touched for max_age_seconds. Returns the number removed.
+    """
+    directory = Path(settings.LIVE_SIGNAL_DIR)
+    if not directory.is_dir():
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in directory.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+class _Subscription:
+    def __init__(self, run_id: int):
+        self.run_id = run_id
+        self.event = asyncio.Event()
+        self._entry = (asyncio.get_running_loop(), self.event)
+
+    def __enter__(self):
+        with _lock:
+            _subscribers.setdefault(self.run_id, set()).add(self._entry)
+        return self
+
+    def __exit__(self, *exc):
+        with _lock:
+            waiters = _subscribers.get(self.run_id)
+            if waiters is not None:
+                waiters.discard(self._entry)
+                if not waiters:
+                    del _subscribers[self.run_id]
+
+
+async def latest_event_id(run_id: int) -> int:
+    latest = await RunEvent.objects.filter(session_run_id=run_id).order_by("-id").values_list("id", flat=True).afirst()
+    return latest or 0
+
+
+async def run_delta(run_id: int, after_id: int, seen=frozenset()) -> tuple[int, dict | None, set]:
+    """
+    (newest event id, delta, sent ids) for checklist events after after_id,
+    plus any in the window below it that are not in seen; delta is None if there were none.
+    Delta: {"steps": [{"s": step_id, "c": 0/1, "n": notes, "t": "HH:MM:SS" or ""}], "checked": total checked}
+    """
+    events = RunEvent.objects.filter(
+        session_run_id=run_id, pk__gt=after_id - ID_SAFETY_WINDOW, action__in=CHECKLIST_ACTIONS
+    )
+    last_id = after_id
+    sent = set()
+    step_ids = set()
+    async for event_id, step_id in events.order_by("id").values_list("id", "step_id"):
+        last_id = max(last_id, event_id)
+        sent.add(event_id)
+        if event_id not in seen:
+            step_ids.add(step_id)
+    sent = {event_id for event_id in sent if event_id > last_id - ID_SAFETY_WINDOW}
+    if not step_ids:
+        return last_id, None, sent
+
+    states = {step_id: {"s": step_id, "c": 0, "n": "", "t": ""} for step_id in step_ids}
+    checks = StepCheck.objects.filter(session_run_id=run_id, step_id__in=step_ids)
+    async for step_id, checked, notes, checked_at in checks.values_list("step_id", "checked", "notes", "checked_at"):
+        states[step_id].update(
+            c=int(checked),
+            n=notes,
+            t=timezone.localtime(checked_at).strftime("%H:%M:%S") if checked and checked_at else "",
+        )
+    checked_total = await StepCheck.objects.filter(session_run_id=run_id, checked=True).acount()
+    return last_id, {"steps": sorted(states.values(), key=lambda s: s["s"]), "checked": checked_total}, sent
+
+
+def _sse(event_id: int, data: dict) -> str:
+    return f"id: {event_id}\nevent: delta\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def run_stream(run_id: int, after_id: int):
+    """
+    Async iterator of SSE frames for one run, starting after event after_id.
+    """
+    with _Subscription(run_id) as subscription:
+        yield f"retry: {RETRY_MS}\n\n"
+        seen_mtime = _signal_mtime(run_id)
+        last_query = last_write = opened = time.monotonic()
+        check = True
+        sent = set()
+
+        while time.monotonic() - opened < STREAM_MAX_SECONDS:
+            if check:
+                subscription.event.clear()
+                after_id, delta, sent = await run_delta(run_id, after_id, sent)
+                last_query = time.monotonic()
+                if delta is not None:
+                    yield _sse(after_id, delta)
+                    last_write = last_query
+
+            try:
+                await asyncio.wait_for(subscription.event.wait(), WAKE_CHECK_SECONDS)
+                check = True
+            except asyncio.TimeoutError:
+                mtime = _signal_mtime(run_id)
+                check = mtime != seen_mtime or time.monotonic() - last_query > SAFETY_POLL_SECONDS
+                seen_mtime = mtime
+
+            if time.monotonic() - last_write > HEARTBEAT_SECONDS:
+                yield ": ping\n\n"
+                last_write = time.monotonic()
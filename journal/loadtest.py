@@ -0,0 +1,356 @@
+"""
+Concurrent-trader load generator.
+
+Each simulated trader runs the day loop the UI drives: start a run, save
+the checklist a few times, load the day and save its concept slots
+(save_slots_api) and submit the review with a trade. Traders run on a
+thread pool, either in process
+through django.test.Client ("client" transport, every thread with its own
+DB connection) or over HTTP against a running server ("http" transport).
+Latencies, errors and lock-contention failures ("database is locked",
+deadlocks, serialization failures) are collected per endpoint.
+
+The harness creates and deletes loadtest-* users and writes runs, days and
+trades for them, so it refuses to run against a database whose name does
+not mark it as a scratch copy (SCRATCH_DATABASE_PREFIXES) unless told to.
+"""
+import http.cookiejar
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, connections
+from django.test import Client
+from django.utils import timezone
+
+from .models import Concept, Step, Strategy, Timeframe
+
+USERNAME_PREFIX = "loadtest-"
+# Database names (sqlite: the file name) that mark a throwaway copy. Django's
+# test databases are in memory or named test_*.
+SCRATCH_DATABASE_PREFIXES = ("loadtest", "test_", "file:memorydb")
+PASSWORD = "loadtest-password"
+LOCK_MARKERS = (
+    "database is locked",
+    "database table is locked",
+    "deadlock detected",
+    "could not serialize access",
+    "lock timeout",
+    "canceling statement due to lock timeout",
+)
+
+
+@dataclass
+class Scenario:
+    users: int = 10
+    duration: float = 30.0
+    think_time: float = 0.5
+    checklist_saves: int = 3
+    check_probability: float = 0.6
+    slot_items: int = 6
+    review_probability: float = 0.9
+    strategy_id: int | None = None
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    seconds: float
+    status: int
+    lock_error: bool = False
+
+
+@dataclass
+class Results:
+    samples: list = field(default_factory=list)
+    started: float = 0.0
+    finished: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, sample: Sample) -> None:
+        with self._lock:
+            self.samples.append(sample)
+
+    def summary(self) -> dict:
+        elapsed = max(self.finished - self.started, 1e-9)
+        by_endpoint = defaultdict(list)
+        for sample in self.samples:
+            by_endpoint[sample.endpoint].append(sample)
+
+        rows = {}
+        for endpoint, samples in sorted(by_endpoint.items()):
+            latencies = sorted(s.seconds for s in samples)
+            errors = sum(1 for s in samples if s.status >= 500 or s.status == 0)
+            locks = sum(1 for s in samples if s.lock_error)
+            rows[endpoint] = {
+                "requests": len(samples),
+                "throughput": round(len(samples) / elapsed, 2),
+                "p50_ms": _percentile_ms(latencies, 50),
+                "p90_ms": _percentile_ms(latencies, 90),
+                "p99_ms": _percentile_ms(latencies, 99),
+                "max_ms": round(latencies[-1] * 1000, 1),
+                "error_rate": round(errors / len(samples), 4),
+                "lock_rate": round(locks / len(samples), 4),
+            }
+        total = len(self.samples)
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "throughput": round(total / elapsed, 2),
+            "endpoints": rows,
+        }
+
+
+def _percentile_ms(sorted_values, percentile) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index] * 1000, 1)
+
+
+def _is_lock_error(text: str) -> bool:
+    text = text.lower()
+    return any(marker in text for marker in LOCK_MARKERS)
+
+
+# Transports
+
+
+class ClientTransport:
+    """
+    In-process requests through the test client, logged in without a password round trip.
+    """
+
+    def __init__(self, user):
+        self.client = Client(raise_request_exception=True)
+        self.client.force_login(user)
+
+    def request(self, method: str, path: str, data=None, json_body=None) -> tuple[int, str, str]:
+        try:
+            if json_body is not None:
+                response = self.client.post(path, json.dumps(json_body), content_type="application/json")
+            elif method == "POST":
+                response = self.client.post(path, data or {})
+            else:
+                response = self.client.get(path)
+        except Exception as exc:
+            return 0, str(exc), ""
+        body = "" if response.streaming else response.content[:2000].decode("utf-8", "replace")
+        return response.status_code, body, response.get("Location", "")
+
+    def close(self) -> None:
+        connections.close_all()
+
+
+class HttpTransport:
+    """
+    Real HTTP against a running server, with a cookie jar and CSRF tokens like a browser.
+    """
+
+    def __init__(self, base_url: str, username: str):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect())
+        self.request("GET", "/accounts/login/")
+        status, _, _ = self.request("POST", "/accounts/login/", {"username": username, "password": PASSWORD})
+        if status != 302:
+            raise RuntimeError(f"Login as {username} failed with HTTP {status}.")
+
+    def _csrf_token(self) -> str:
+        return next((c.value for c in self.cookies if c.name == "csrftoken"), "")
+
+    def request(self, method: str, path: str, data=None, json_body=None) -> tuple[int, str, str]:
+        headers = {"Referer": self.base_url + "/"}
+        payload = None
+        if method == "POST":
+            headers["X-CSRFToken"] = self._csrf_token()
+            if json_body is not None:
+                payload = json.dumps(json_body).encode("utf-8")
+                headers["Content-Type"] = "application/json"
+            else:
+                fields = {**(data or {}), "csrfmiddlewaretoken": self._csrf_token()}
+                payload = urllib.parse.urlencode(fields, doseq=True).encode("utf-8")
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        req = urllib.request.Request(self.base_url + path, data=payload, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                return response.status, response.read(2000).decode("utf-8", "replace"), ""
+        except urllib.error.HTTPError as exc:
+            location = exc.headers.get("Location", "")
+            return exc.code, exc.read(2000).decode("utf-8", "replace"), location
+        except OSError as exc:
+            return 0, str(exc), ""
+
+    def close(self) -> None:
+        pass
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+# Scenario
+
+
+def prepare_users(count: int) -> list:
+    User = get_user_model()
+    users = []
+    for i in range(count):
+        user, created = User.objects.get_or_create(username=f"{USERNAME_PREFIX}{i}")
+        if created:
+            user.set_password(PASSWORD)
+            user.save()
+        users.append(user)
+    return users
+
+
+def cleanup_users() -> int:
+    return get_user_model().objects.filter(username__startswith=USERNAME_PREFIX).delete()[0]
+
+
+class Trader:
+    def __init__(self, index: int, transport, scenario: Scenario, results: Results, fixtures: dict):
+        self.index = index
+        self.transport = transport
+        self.scenario = scenario
+        self.results = results
+        self.fixtures = fixtures
+        self.random = random.Random(index)
+        self.day = 0
+
+    def call(self, endpoint: str, method: str, path: str, data=None, json_body=None) -> tuple[int, str]:
+        started = time.perf_counter()
+        status, body, location = self.transport.request(method, path, data, json_body)
+        seconds = time.perf_counter() - started
+        self.results.add(Sample(endpoint, seconds, status, lock_error=status in (0, 500) and _is_lock_error(body)))
+        return status, location
+
+    def think(self) -> None:
+        if self.scenario.think_time:
+            time.sleep(self.random.expovariate(1 / self.scenario.think_time))
+
+    def run_day(self) -> None:
+        scenario = self.scenario
+        status, location = self.call(
+            "start_run", "POST", "/runs/start/", {"strategy": self.fixtures["strategy_id"], "symbol": "NQ"}
+        )
+        match = re.search(r"/runs/(\d+)/", location)
+        if status != 302 or match is None:
+            return
+        run_path = match.group(0)
+        self.think()
+
+        step_ids = self.fixtures["step_ids"]
+        for _ in range(scenario.checklist_saves):
+            data = {
+                f"step_{step_id}_checked": "on"
+                for step_id in step_ids
+                if self.random.random() < scenario.check_probability
+            }
+            if step_ids:
+                data[f"step_{self.random.choice(step_ids)}_notes"] = f"load note {self.random.randint(1, 999)}"
+            self.call("run_detail", "POST", run_path, data)
+            self.think()
+
+        # Each trader day gets its own journal date, so slot saves contend on the table, not one row.
+        self.day += 1
+        day = date.today() - timedelta(days=self.day)
+        timeframes = [value for value, _ in Timeframe.choices]
+        slots = defaultdict(list)
+        for _ in range(scenario.slot_items):
+            slots[self.random.choice(timeframes)].append(
+                {"concept_id": self.random.choice(self.fixtures["concept_ids"]), "note": "load"}
+            )
+        day_path = f"/api/day/{day.year}/{day.month}/{day.day}/"
+        self.call("day_state", "GET", day_path)
+        self.call("save_slots", "POST", f"{day_path}save-slots/", json_body={"slots": slots})
+        self.think()
+
+        if self.random.random() < scenario.review_probability:
+            entry = timezone.localtime().replace(second=0, microsecond=0).strftime("%Y-%m-%dT%H:%M")
+            self.call(
+                "run_review",
+                "POST",
+                f"{run_path}review/",
+                {
+                    "trade_taken": "on",
+                    "day_notes": "load test",
+                    "direction": "LONG",
+                    "entry_time": entry,
+                    "stop": "10",
+                    "target": "20",
+                    "result_r": str(self.random.choice([-1, -1, 2, 3])),
+                    "notes": "",
+                },
+            )
+            self.think()
+
+
+def is_scratch_database(settings_dict=None) -> bool:
+    name = str((settings_dict or connection.settings_dict)["NAME"])
+    return name == ":memory:" or os.path.basename(name).startswith(SCRATCH_DATABASE_PREFIXES)
+
+
+def check_database(allow_live_db: bool = False) -> None:
+    if not allow_live_db and not is_scratch_database():
+        raise ValueError(
+            f"Refusing to load {connection.settings_dict['NAME']}: point the default database at a scratch copy "
+            f"(a name starting with {' or '.join(SCRATCH_DATABASE_PREFIXES[:2])}) or pass --allow-live-db."
+        )
+
+
+def load_fixtures(scenario: Scenario) -> dict:
+    strategies = Strategy.objects.filter(is_active=True)
+    if scenario.strategy_id is not None:
+        strategies = strategies.filter(pk=scenario.strategy_id)
+    strategy = strategies.order_by("id").first()
+    if strategy is None:
+        raise ValueError("No active strategy to run against.")
+    concept_ids = list(Concept.objects.filter(is_active=True).values_list("id", flat=True))
+    if not concept_ids:
+        raise ValueError("No active concepts; run `manage.py seed_concepts` first.")
+    return {
+        "strategy_id": strategy.id,
+        "step_ids": list(Step.objects.filter(section__strategy=strategy).values_list("id", flat=True)),
+        "concept_ids": concept_ids,
+    }
+
+
+def run_load(scenario: Scenario, base_url: str | None = None, allow_live_db: bool = False) -> dict:
+    """
+    Drive scenario.users traders for scenario.duration seconds and return the summary.
+    """
+    check_database(allow_live_db)
+    fixtures = load_fixtures(scenario)
+    users = prepare_users(scenario.users)
+    results = Results()
+    deadline = time.monotonic() + scenario.duration
+
+    def trader_main(index: int) -> None:
+        close_old_connections()
+        user = users[index]
+        transport = HttpTransport(base_url, user.username) if base_url else ClientTransport(user)
+        trader = Trader(index, transport, scenario, results, fixtures)
+        try:
+            while time.monotonic() < deadline:
+                trader.run_day()
+        finally:
+            transport.close()
+
+    results.started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=scenario.users) as pool:
+        for future in [pool.submit(trader_main, i) for i in range(scenario.users)]:
+            future.result()
+    results.finished = time.perf_counter()
+    return results.summary()
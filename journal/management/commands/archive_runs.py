@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.archive import archive_candidates, archive_run, restore_run
+from journal.models import SessionRun, StepCheck
+
+
+class Command(BaseCommand):
+    help = "Pack the StepChecks of old completed runs into their run row (cold storage)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=30, help="Only runs started this long ago (default 30).")
+        parser.add_argument("--limit", type=int, help="Archive at most this many runs.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many runs would be archived.")
+        parser.add_argument("--restore", type=int, metavar="RUN_ID", help="Move one run's checks back into StepCheck.")
+
+    def handle(self, *args, **options):
+        if options["restore"] is not None:
+            run = SessionRun.objects.filter(pk=options["restore"]).first()
+            if run is None:
+                raise CommandError(f"Run {options['restore']} not found.")
+            restored = restore_run(run)
+            self.stdout.write(self.style.SUCCESS(f"Restored run {run.pk}.") if restored else f"Run {run.pk} is not archived.")
+            return
+
+        run_ids = archive_candidates(options["older_than_days"]).order_by("id").values_list("id", flat=True)
+        if options["limit"]:
+            run_ids = run_ids[: options["limit"]]
+        run_ids = list(run_ids)
+        rows = StepCheck.objects.filter(session_run_id__in=run_ids).count()
+        if options["dry_run"]:
+            self.stdout.write(f"Would archive {len(run_ids)} runs ({rows} StepCheck rows).")
+            return
+
+        archived = 0
+        for i, run_id in enumerate(run_ids, start=1):
+            archived += archive_run(SessionRun(pk=run_id))
+            if i % 500 == 0:
+                self.stdout.write(f"{i}/{len(run_ids)} runs")
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} runs, removed {rows} StepCheck rows."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from journal.killzones import backfill_buckets
+
+
+class Command(BaseCommand):
+    help = "Fill the New York trading date, session and killzone columns on runs and trades"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recompute every row, not only unfilled ones.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows updated per statement.")
+
+    def handle(self, *args, **options):
+        runs, trades = backfill_buckets(everything=options["all"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Updated market buckets on {runs} runs and {trades} trades."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from journal.coach import backfill_run_counts
+
+
+class Command(BaseCommand):
+    help = "Fill the denormalized SessionRun checklist counts used by the coach view"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Archived runs updated per statement.")
+
+    def handle(self, *args, **options):
+        updated = backfill_run_counts(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Updated checklist counts on {updated} runs."))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.backups import BackupError, backup_size, create_backup, list_snapshots, load_manifest, prune_backups
+
+
+class Command(BaseCommand):
+    help = "Take an online, incremental, compressed backup of the database and media (journal.backups)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias (default: default).")
+        parser.add_argument("--no-media", action="store_true", help="Back up the database only.")
+        parser.add_argument("--keep", type=int, help="Snapshots to keep (default: BACKUP_KEEP).")
+        parser.add_argument("--list", action="store_true", help="List snapshots instead of taking one.")
+        parser.add_argument("--prune", action="store_true", help="Only apply retention.")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for name in list_snapshots():
+                manifest = load_manifest(name)
+                database = manifest["database"]
+                self.stdout.write(
+                    f"{name}  {database['vendor']}  {database['size'] / 1024 / 1024:.1f} MB db  "
+                    f"{len(manifest['media'])} media files"
+                )
+            self.stdout.write(f"Store size: {backup_size() / 1024 / 1024:.1f} MB")
+            return
+
+        if options["prune"]:
+            if options["keep"] is None:
+                raise CommandError("--prune needs --keep.")
+            pruned = prune_backups(options["keep"])
+            self.stdout.write(f"Removed {pruned['snapshots']} snapshots and {pruned['chunks']} chunks.")
+            return
+
+        started = time.monotonic()
+        try:
+            manifest = create_backup(options["database"], include_media=not options["no_media"], keep=options["keep"])
+        except BackupError as exc:
+            raise CommandError(str(exc))
+        stats, pruned = manifest["stats"], manifest["pruned"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backup {manifest['name']} in {time.monotonic() - started:.1f}s: "
+                f"{stats['written']} new chunks ({stats['written_bytes'] / 1024:.0f} KB compressed), "
+                f"{stats['reused']} unchanged, {len(manifest['media'])} media files. "
+                f"Pruned {pruned['snapshots']} snapshots, {pruned['chunks']} chunks."
+            )
+        )
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.reports import build_dirty_reports, dirty_reports, mark_all_dirty
+
+
+class Command(BaseCommand):
+    help = "Render the weekly/monthly review reports whose runs, trades or journal days changed (run e.g. nightly or on Sundays)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only this username.")
+        parser.add_argument("--limit", type=int, help="Render at most this many reports.")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Mark every period with runs or journal days as changed first (backfill or template change).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many reports are out of date.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user']} not found.")
+
+        if options["all"]:
+            days = mark_all_dirty(user)
+            self.stdout.write(f"Marked periods for {days} active days as changed.")
+
+        if options["dry_run"]:
+            pending = dirty_reports()
+            if user is not None:
+                pending = pending.filter(user=user)
+            self.stdout.write(f"{pending.count()} reports out of date.")
+            return
+
+        built = build_dirty_reports(user=user, limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Rendered {built} reports."))
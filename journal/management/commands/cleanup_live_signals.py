@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from journal.live import prune_signals
+
+
+class Command(BaseCommand):
+    help = "Delete live-sync signal files of runs that were left open without a review"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-hours",
+            type=float,
+            default=24,
+            help="Delete signal files not touched for longer than this (default 24).",
+        )
+
+    def handle(self, *args, **options):
+        removed = prune_signals(int(options["older_than_hours"] * 3600))
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} live signal files."))
@@ -0,0 +1,41 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Backends that keep no rows to delete: the cache expires its own keys, and
+# signed cookies live only in the browser.
+NOTHING_TO_CLEAN = (
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.signed_cookies",
+)
+
+
+class Command(BaseCommand):
+    help = "Delete expired sessions, once or every --interval seconds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and clean up every N seconds (default: run once).",
+        )
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE in NOTHING_TO_CLEAN:
+            self.stdout.write(f"{settings.SESSION_ENGINE} has nothing to clean up.")
+            return
+        engine = import_module(settings.SESSION_ENGINE)
+        while True:
+            started = time.monotonic()
+            engine.SessionStore.clear_expired()
+            self.stdout.write(f"Cleared expired sessions in {time.monotonic() - started:.2f}s.")
+
+            if not options["interval"]:
+                return
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from journal.uploads import cleanup_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Abort resumable uploads that have not received a chunk recently and delete their partial files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-hours",
+            type=float,
+            default=24,
+            help="Abort uploads idle for longer than this (default 24).",
+        )
+
+    def handle(self, *args, **options):
+        aborted = cleanup_stale_uploads(timedelta(hours=options["older_than_hours"]))
+        self.stdout.write(self.style.SUCCESS(f"Aborted {aborted} stale uploads."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from journal.bars import update_trade_excursions
+
+
+class Command(BaseCommand):
+    help = "Compute MFE/MAE, time-to-stop/target and verified R for trades from local bar data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--symbol", help="Only trades on this symbol.")
+        parser.add_argument("--horizon", type=int, default=390, help="Minutes to follow each trade (default 390).")
+        parser.add_argument("--missing", action="store_true", help="Only trades never computed before.")
+
+    def handle(self, *args, **options):
+        updated = update_trade_excursions(
+            symbol=options["symbol"],
+            horizon_minutes=options["horizon"],
+            only_missing=options["missing"],
+        )
+        for symbol, count in sorted(updated.items()):
+            self.stdout.write(f"{symbol}: {count} trades")
+        self.stdout.write(self.style.SUCCESS(f"Done. Updated {sum(updated.values())} trades."))
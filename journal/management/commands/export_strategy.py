@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.bundles import write_bundle
+from journal.models import Concept, Strategy
+
+
+class Command(BaseCommand):
+    help = "Export strategies (sections, steps, example images) as a zip bundle"
+
+    def add_arguments(self, parser):
+        parser.add_argument("strategies", nargs="*", help="Strategy names or ids (default: all).")
+        parser.add_argument("-o", "--output", required=True, help="Bundle file to write (.zip).")
+        parser.add_argument("--concepts", action="store_true", help="Include the concept library.")
+
+    def handle(self, *args, **options):
+        strategies = Strategy.objects.all()
+        if options["strategies"]:
+            ids = [int(value) for value in options["strategies"] if value.isdigit()]
+            names = [value for value in options["strategies"] if not value.isdigit()]
+            strategies = strategies.filter(pk__in=ids) | strategies.filter(name__in=names)
+            found = {str(pk) for pk in strategies.values_list("pk", flat=True)} | set(
+                strategies.values_list("name", flat=True)
+            )
+            missing = [value for value in options["strategies"] if value not in found]
+            if missing:
+                raise CommandError(f"Strategies not found: {', '.join(missing)}")
+
+        concepts = Concept.objects.order_by("name") if options["concepts"] else ()
+        with open(options["output"], "wb") as fileobj:
+            manifest = write_bundle(fileobj, strategies, concepts)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {len(manifest['strategies'])} strategies and {len(manifest['concepts'])} concepts "
+                f"to {options['output']}."
+            )
+        )
@@ -0,0 +1,98 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from journal.checklists import decode_snapshot
+from journal.models import Attachment, StepImage, StrategyVersion
+
+
+def referenced_image_names() -> set[str]:
+    """
+    Every image name a StepImage row, a published snapshot or an Attachment
+    still points at. Past runs render from their snapshot, so its images must
+    outlive the rows; attachments share the same content-addressed store.
+    """
+    names = set(StepImage.objects.values_list("image", flat=True))
+    names.update(Attachment.objects.values_list("file", flat=True))
+    for blob in StrategyVersion.objects.values_list("blob", flat=True).iterator():
+        for _, _, steps in decode_snapshot(blob)["s"]:
+            for *_, images in steps:
+                names.update(name for name, _ in images)
+    return names
+
+
+def is_referenced(name: str) -> bool:
+    # Snapshots are only published from StepImage rows, so a new reference always has a row.
+    return StepImage.objects.filter(image=name).exists() or Attachment.objects.filter(file=name).exists()
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed StepImage blobs that nothing references"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+        parser.add_argument(
+            "--min-age-hours",
+            type=float,
+            default=24,
+            help="Keep blobs younger than this, so uploads whose row is not saved yet survive (default 24).",
+        )
+        parser.add_argument(
+            "--adopt",
+            action="store_true",
+            help="First move StepImages stored under their original name into the content-addressed store.",
+        )
+
+    def handle(self, *args, **options):
+        storage = StepImage._meta.get_field("image").storage
+        if options["adopt"]:
+            self._adopt(storage, options["dry_run"])
+
+        referenced = referenced_image_names()
+        cutoff = time.time() - options["min_age_hours"] * 3600
+        deleted = kept = freed = 0
+        for name, path in storage.iter_blobs():
+            if name in referenced:
+                kept += 1
+                continue
+            stat = os.stat(path)
+            if stat.st_mtime > cutoff:
+                kept += 1
+                continue
+            if not options["dry_run"]:
+                # The scan can take a while: re-check right before deleting, in case
+                # an upload of the same bytes referenced (and touched) the blob since.
+                if is_referenced(name) or os.stat(path).st_mtime > cutoff:
+                    kept += 1
+                    continue
+                os.remove(path)
+            deleted += 1
+            freed += stat.st_size
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {deleted} blobs ({freed / 1024 / 1024:.1f} MB), kept {kept}.")
+        )
+
+    def _adopt(self, storage, dry_run: bool) -> None:
+        legacy = (
+            StepImage.objects.exclude(image__startswith=f"{storage.prefix}/")
+            .exclude(image="")
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        adopted = 0
+        for old_name in list(legacy):
+            if not storage.exists(old_name):
+                self.stderr.write(f"Missing file for {old_name}, skipped.")
+                continue
+            if dry_run:
+                adopted += 1
+                continue
+            with storage.open(old_name, "rb") as f:
+                new_name = storage.save(old_name, f)
+            # The old file stays: published snapshots may still reference it by name.
+            adopted += StepImage.objects.filter(image=old_name).update(image=new_name)
+        verb = "Would adopt" if dry_run else "Adopted"
+        self.stdout.write(f"{verb} {adopted} legacy images.")
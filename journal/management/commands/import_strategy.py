@@ -0,0 +1,26 @@
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.bundles import BundleError, import_bundle
+
+
+class Command(BaseCommand):
+    help = "Import (upsert) strategies and concepts from a zip bundle"
+
+    def add_arguments(self, parser):
+        parser.add_argument("bundle", help="Bundle file written by export_strategy.")
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete sections and steps of the imported strategies that are not in the bundle.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["bundle"], "rb") as fileobj:
+                counts = import_bundle(fileobj, prune=options["prune"])
+        except (OSError, zipfile.BadZipFile, BundleError) as exc:
+            raise CommandError(str(exc))
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Imported {summary}."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.bars import BarFormatError, BarStore
+
+
+class Command(BaseCommand):
+    help = "Merge 1-minute OHLC CSV files into a symbol's memory-mapped bar file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("symbol")
+        parser.add_argument("csv_paths", nargs="+")
+
+    def handle(self, *args, **options):
+        store = BarStore()
+        count = 0
+        for csv_path in options["csv_paths"]:
+            try:
+                count = store.ingest_csv(options["symbol"], csv_path)
+            except (BarFormatError, OSError, ValueError) as exc:
+                raise CommandError(str(exc))
+        path = store.path(options["symbol"])
+        self.stdout.write(self.style.SUCCESS(f"Done. {path.name} now holds {count} bars."))
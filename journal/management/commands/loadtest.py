@@ -0,0 +1,74 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from journal.loadtest import Scenario, check_database, cleanup_users, run_load
+
+
+class Command(BaseCommand):
+    help = "Simulate concurrent traders (start run, checklist saves, slot saves, review) and report per-endpoint stats"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Concurrent traders (default 10).")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run (default 30).")
+        parser.add_argument(
+            "--think-time", type=float, default=0.5, help="Mean pause between a trader's actions in seconds (default 0.5)."
+        )
+        parser.add_argument("--checklist-saves", type=int, default=3, help="Checklist saves per run (default 3).")
+        parser.add_argument("--slot-items", type=int, default=6, help="Concepts placed per slot save (default 6).")
+        parser.add_argument("--review-probability", type=float, default=0.9)
+        parser.add_argument("--strategy", type=int, help="Strategy id (default: first active strategy).")
+        parser.add_argument("--base-url", help="Load a running server over HTTP instead of the in-process test client.")
+        parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+        parser.add_argument("--keep-data", action="store_true", help="Keep the loadtest-* users and their runs.")
+        parser.add_argument(
+            "--allow-live-db",
+            action="store_true",
+            help="Run even though the default database is not named as a scratch copy (loadtest*, test_*).",
+        )
+
+    def handle(self, *args, **options):
+        scenario = Scenario(
+            users=options["users"],
+            duration=options["duration"],
+            think_time=options["think_time"],
+            checklist_saves=options["checklist_saves"],
+            slot_items=options["slot_items"],
+            review_probability=options["review_probability"],
+            strategy_id=options["strategy"],
+        )
+        # Before anything is written, including the cleanup below.
+        try:
+            check_database(options["allow_live_db"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if not options["base_url"] and "testserver" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        try:
+            summary = run_load(scenario, base_url=options["base_url"], allow_live_db=options["allow_live_db"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if not options["keep_data"]:
+                cleanup_users()
+
+        summary["database"] = connection.vendor
+        summary["users"] = scenario.users
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        self.stdout.write(
+            f"{summary['database']}: {summary['users']} traders, {summary['requests']} requests in "
+            f"{summary['elapsed_s']}s ({summary['throughput']} req/s)\n"
+        )
+        header = f"{'endpoint':<12} {'reqs':>6} {'req/s':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'errors':>7} {'locks':>7}"
+        self.stdout.write(header)
+        for endpoint, row in summary["endpoints"].items():
+            self.stdout.write(
+                f"{endpoint:<12} {row['requests']:>6} {row['throughput']:>7} {row['p50_ms']:>8} {row['p90_ms']:>8} "
+                f"{row['p99_ms']:>8} {row['max_ms']:>8} {row['error_rate']:>7.2%} {row['lock_rate']:>7.2%}"
+            )
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+
+# Runs in a fresh interpreter so imports, setup and first requests are really cold.
+CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+timings = {"setup": time.perf_counter() - started}
+
+options = json.loads(sys.argv[1])
+if options["warm"]:
+    from journal.warmup import warmup
+    started = time.perf_counter()
+    warmup()
+    timings["warmup"] = time.perf_counter() - started
+
+from journal.management.commands.profile_startup import time_requests
+timings["requests"] = time_requests(options["urls"], options["user"])
+print(json.dumps(timings))
+"""
+
+
+def time_requests(urls, username: str | None = None) -> list[list]:
+    """
+    GET each URL twice as username (default: the first superuser) and
+    return [url, attempt, status, seconds] rows. Logging in and the requests
+    themselves write to the database (session, last_login, queued tasks),
+    so everything runs in one transaction that is rolled back.
+    """
+    if "testserver" not in settings.ALLOWED_HOSTS:
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+    requests = []
+    with transaction.atomic():
+        users = get_user_model().objects.order_by("-is_superuser", "id")
+        user = users.filter(username=username).first() if username else users.first()
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        for url in urls:
+            for attempt in ("first", "second"):
+                started = time.perf_counter()
+                status = client.get(url).status_code
+                requests.append([url, attempt, status, time.perf_counter() - started])
+        transaction.set_rollback(True)
+    return requests
+
+
+class Command(BaseCommand):
+    help = "Report import, django.setup() and first-request timings of a cold process"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", action="append", dest="urls", help="URL to request (repeatable).")
+        parser.add_argument("--user", help="Log in as this username (default: first superuser).")
+        parser.add_argument("--warm", action="store_true", help="Run journal.warmup before the requests.")
+        parser.add_argument("--top", type=int, default=15, help="Slowest imports to list (default 15).")
+
+    def handle(self, *args, **options):
+        urls = options["urls"] or ["/", "/strategies/", "/concepts/", "/legacy/calendar/"]
+        child_options = {"urls": urls, "user": options["user"], "warm": options["warm"]}
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "tradejournal.settings")}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, json.dumps(child_options)],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr else "Child process failed.")
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(f"django.setup()  {timings['setup'] * 1000:8.1f} ms")
+        if "warmup" in timings:
+            self.stdout.write(f"warmup          {timings['warmup'] * 1000:8.1f} ms")
+
+        self.stdout.write("\nRequests:")
+        for url, attempt, status, seconds in timings["requests"]:
+            self.stdout.write(f"  {attempt:<6} {status}  {seconds * 1000:8.1f} ms  {url}")
+
+        self.stdout.write(f"\nSlowest imports (cumulative, top {options['top']}):")
+        for micros, module in self._slowest_imports(result.stderr, options["top"]):
+            self.stdout.write(f"  {micros / 1000:8.1f} ms  {module}")
+
+    def _slowest_imports(self, stderr: str, top: int) -> list[tuple[int, str]]:
+        rows = []
+        for line in stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, module = line[len("import time:"):].split("|", 2)
+            # Only top-level imports: nested ones are indented and already counted in their parent.
+            if not module.startswith("  "):
+                rows.append((int(cumulative), module.strip()))
+        return sorted(rows, reverse=True)[:top]
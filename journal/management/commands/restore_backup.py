@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.backups import BackupError, list_snapshots, restore_backup, verify_backup
+
+
+class Command(BaseCommand):
+    help = "Verify a backup, or restore the database and media from it (stop the app before restoring)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", nargs="?", help="Snapshot name (default: the newest; see `backup --list`).")
+        parser.add_argument("--verify", action="store_true", help="Only check that the backup is complete and intact.")
+        parser.add_argument("--all", action="store_true", help="With --verify, check every snapshot.")
+        parser.add_argument("--database-path", help="Write the database here instead of over the live one.")
+        parser.add_argument("--media-root", help="Restore media here instead of MEDIA_ROOT.")
+        parser.add_argument("--no-media", action="store_true", help="Restore the database only.")
+        parser.add_argument("--force", action="store_true", help="Required to overwrite the live database.")
+
+    def handle(self, *args, **options):
+        names = list_snapshots()
+        if not names:
+            raise CommandError("No backups found.")
+        if options["verify"] and options["all"]:
+            targets = names
+        else:
+            targets = [options["name"] or names[-1]]
+
+        try:
+            if options["verify"]:
+                for name in targets:
+                    result = verify_backup(name)
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"{name}: OK ({result['database_bytes'] / 1024 / 1024:.1f} MB db, "
+                            f"{result['media_files']} media files)"
+                        )
+                    )
+                return
+
+            if not options["database_path"] and not options["force"]:
+                raise CommandError("Restoring replaces the live database; pass --force, or --database-path.")
+            name = targets[0]
+            verify_backup(name)
+            result = restore_backup(
+                name,
+                database_path=options["database_path"],
+                media_root=options["media_root"],
+                restore_media=not options["no_media"],
+            )
+        except BackupError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Restored {name}: database -> {result['database']}, "
+                f"{result['media_restored']} media files written, {result['media_unchanged']} already current."
+            )
+        )
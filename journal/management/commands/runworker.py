@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+
+
+def _worker_id(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def _process_main(index: int, stop, poll_interval: float, once: bool) -> None:
+    # Spawned processes start from a clean interpreter; journal.tasks needs the app registry.
+    import django
+
+    django.setup()
+    from journal.tasks import work
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(_worker_id(index), stop, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = "Run background tasks from the journal_task table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=1, help="Tasks run in parallel (default 1).")
+        parser.add_argument("--mode", choices=["threads", "processes"], default="threads")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds between polls of an empty queue.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        from journal.tasks import requeue_stale
+
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale tasks.")
+
+        concurrency = max(options["concurrency"], 1)
+        self.stdout.write(f"Worker started: {concurrency} {options['mode']}.")
+
+        if options["mode"] == "processes":
+            ctx = multiprocessing.get_context("spawn")
+            stop = ctx.Event()
+            workers = [
+                ctx.Process(target=_process_main, args=(i, stop, options["poll"], options["once"]))
+                for i in range(concurrency)
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(target=self._thread_main, args=(i, stop, options["poll"], options["once"]))
+                for i in range(concurrency)
+            ]
+
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after current tasks...")
+            stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS("Worker stopped."))
+
+    def _thread_main(self, index, stop, poll_interval, once):
+        from django.db import connection
+        from journal.tasks import work
+
+        try:
+            work(_worker_id(index), stop, poll_interval, once)
+        finally:
+            connection.close()
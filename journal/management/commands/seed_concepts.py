@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from journal.cache_versions import CONCEPTS, bump_model_version
 from journal.models import Concept
 
 DEFAULT_CONCEPTS = [
@@ -32,9 +33,10 @@ class Command(BaseCommand):
     help = "Seed default ICT concepts into Concept library"
 
     def handle(self, *args, **options):
-        created = 0
-        for name in DEFAULT_CONCEPTS:
-            obj, was_created = Concept.objects.get_or_create(name=name)
-            if was_created:
-                created += 1
+        before = Concept.objects.count()
+        Concept.objects.bulk_create([Concept(name=name) for name in DEFAULT_CONCEPTS], ignore_conflicts=True)
+        created = Concept.objects.count() - before
+        if created:
+            # bulk_create skips the post_save signal that normally bumps this.
+            bump_model_version(CONCEPTS)
         self.stdout.write(self.style.SUCCESS(f"Done. Created {created} concepts."))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.models import Strategy
+from journal.montecarlo import simulate, strategy_r_values
+
+
+class Command(BaseCommand):
+    help = "Monte Carlo equity simulation from a strategy's recorded trade R results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("strategy", help="Strategy id or exact name.")
+        parser.add_argument("--user", help="Only this username's trades (default: all users).")
+        parser.add_argument("--paths", type=int, default=20000)
+        parser.add_argument("--trades", type=int, default=100, help="Trades per simulated path.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--ruin", type=float, default=20.0, help="Ruin threshold in R below the start.")
+        parser.add_argument("--workers", type=int, default=settings.MONTE_CARLO_WORKERS)
+
+    def handle(self, *args, **options):
+        lookup = {"pk": int(options["strategy"])} if options["strategy"].isdigit() else {"name": options["strategy"]}
+        strategy = Strategy.objects.filter(**lookup).first()
+        if strategy is None:
+            raise CommandError(f"Strategy {options['strategy']!r} not found.")
+
+        user_id = None
+        if options["user"]:
+            user_id = get_user_model().objects.filter(username=options["user"]).values_list("id", flat=True).first()
+            if user_id is None:
+                raise CommandError(f"User {options['user']!r} not found.")
+
+        r_values = strategy_r_values(strategy.id, user_id)
+        if not r_values.size:
+            raise CommandError("No trades recorded for this strategy.")
+
+        result = simulate(
+            r_values,
+            n_paths=options["paths"],
+            n_trades=options["trades"],
+            seed=options["seed"],
+            ruin_r=options["ruin"],
+            workers=options["workers"],
+        )
+
+        self.stdout.write(f"{strategy.name}: {result['sample_size']} trades, mean {result['mean_r']}R")
+        self.stdout.write(f"Risk of ruin (-{result['ruin_r']}R): {result['risk_of_ruin']:.2%}")
+        for p, value in result["drawdown_percentiles"]:
+            self.stdout.write(f"Max drawdown p{p}: {value}R")
+        for p, value in result["final_r_percentiles"]:
+            self.stdout.write(f"Final equity p{p}: {value}R")
+        for length, count, share in result["losing_streaks"]:
+            self.stdout.write(f"Longest losing streak {length}: {share:.2%}")
+        self.stdout.write(self.style.SUCCESS("Done."))
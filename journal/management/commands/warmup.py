@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from journal.warmup import warmup
+
+
+class Command(BaseCommand):
+    help = "Precompile templates and prime URL/model caches (what WARMUP_ON_STARTUP does at boot)"
+
+    def handle(self, *args, **options):
+        for step, (count, seconds) in warmup().items():
+            self.stdout.write(f"{step:<10} {count:>5}  {seconds * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS("Warm."))
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RunEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "action",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "Checked"),
+                            (2, "Unchecked"),
+                            (3, "Note edited"),
+                            (4, "Reviewed"),
+                            (5, "Trade entry"),
+                        ]
+                    ),
+                ),
+                ("occurred_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "session_run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="events", to="journal.sessionrun"
+                    ),
+                ),
+                (
+                    "step",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="journal.step",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+    ]
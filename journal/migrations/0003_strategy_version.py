@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0002_runevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sessionrun",
+            name="strategy_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="strategy",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
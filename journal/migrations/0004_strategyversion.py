@@ -0,0 +1,93 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+import json
+import zlib
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def pin_existing_runs(apps, schema_editor):
+    """
+    Publish the current checklist of every strategy that already has runs and
+    pin those runs to it. Same blob format as journal.checklists.encode_snapshot.
+    """
+    SessionRun = apps.get_model("journal", "SessionRun")
+    Section = apps.get_model("journal", "Section")
+    Strategy = apps.get_model("journal", "Strategy")
+    StrategyVersion = apps.get_model("journal", "StrategyVersion")
+
+    strategy_ids = SessionRun.objects.filter(snapshot__isnull=True).values_list("strategy_id", flat=True).distinct()
+    for strategy in Strategy.objects.filter(pk__in=list(strategy_ids)):
+        payload = []
+        sections = Section.objects.filter(strategy=strategy).prefetch_related("steps__images").order_by("order", "id")
+        for section in sections:
+            steps = []
+            for step in sorted(section.steps.all(), key=lambda s: (s.order, s.id)):
+                images = [
+                    [img.image.name, img.caption] for img in sorted(step.images.all(), key=lambda i: (i.order, i.id))
+                ]
+                steps.append([step.id, step.title, step.description, step.required, images])
+            payload.append([section.id, section.name, steps])
+
+        blob = zlib.compress(json.dumps({"v": 1, "s": payload}, separators=(",", ":")).encode("utf-8"), 9)
+        snapshot = StrategyVersion.objects.create(strategy=strategy, number=strategy.version, blob=blob)
+        SessionRun.objects.filter(strategy=strategy, snapshot__isnull=True).update(
+            snapshot=snapshot, strategy_version=strategy.version
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0003_strategy_version"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="stepcheck",
+            options={"ordering": ["id"]},
+        ),
+        migrations.AlterField(
+            model_name="stepcheck",
+            name="step",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="checks",
+                to="journal.step",
+            ),
+        ),
+        migrations.CreateModel(
+            name="StrategyVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("number", models.PositiveIntegerField()),
+                ("blob", models.BinaryField()),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "strategy",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="versions", to="journal.strategy"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["strategy_id", "-number"],
+                "unique_together": {("strategy", "number")},
+            },
+        ),
+        migrations.AddField(
+            model_name="sessionrun",
+            name="snapshot",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="session_runs",
+                to="journal.strategyversion",
+            ),
+        ),
+        migrations.RunPython(pin_existing_runs, migrations.RunPython.noop),
+    ]
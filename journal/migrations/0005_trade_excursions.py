@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0004_strategyversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trade",
+            name="excursions_computed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="mae_r",
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="mfe_r",
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="time_to_stop",
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="time_to_target",
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="verified_r",
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0006_task"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sessionrun",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="sessionrun",
+            name="archived_checks",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+import journal.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0007_sessionrun_archived_checks"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="stepimage",
+            name="image",
+            field=models.ImageField(storage=journal.storage.step_image_storage, upload_to="step_images/"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0008_stepimage_content_addressed"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="dayjournal",
+            name="date",
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="sessionrun",
+            name="started_at",
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name="stepcheck",
+            name="checked_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="trade",
+            name="entry_time",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0010_attachments_uploads"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("period", models.CharField(choices=[("week", "Weekly"), ("month", "Monthly")], max_length=10)),
+                ("start", models.DateField()),
+                ("end", models.DateField()),
+                ("changed_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("generated_at", models.DateTimeField(blank=True, null=True)),
+                ("path", models.CharField(blank=True, default="", max_length=200)),
+                ("summary", models.JSONField(blank=True, default=dict)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-start", "period"],
+                "unique_together": {("user", "period", "start")},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0011_report_snapshots"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sessionrun",
+            name="checked_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="sessionrun",
+            name="step_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0012_run_checklist_counts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sessionrun",
+            name="killzone",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("LONDON_OPEN", "London open"),
+                    ("NY_AM", "NY AM"),
+                    ("NY_LUNCH", "NY lunch"),
+                    ("NY_PM", "NY PM"),
+                ],
+                default="",
+                editable=False,
+                max_length=12,
+            ),
+        ),
+        migrations.AddField(
+            model_name="sessionrun",
+            name="market_session",
+            field=models.CharField(
+                blank=True,
+                choices=[("ASIA", "Asia"), ("LONDON", "London"), ("NY", "New York"), ("CLOSED", "Closed")],
+                default="",
+                editable=False,
+                max_length=8,
+            ),
+        ),
+        migrations.AddField(
+            model_name="sessionrun",
+            name="session_minute",
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="sessionrun",
+            name="trading_date",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="killzone",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("LONDON_OPEN", "London open"),
+                    ("NY_AM", "NY AM"),
+                    ("NY_LUNCH", "NY lunch"),
+                    ("NY_PM", "NY PM"),
+                ],
+                default="",
+                editable=False,
+                max_length=12,
+            ),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="market_session",
+            field=models.CharField(
+                blank=True,
+                choices=[("ASIA", "Asia"), ("LONDON", "London"), ("NY", "New York"), ("CLOSED", "Closed")],
+                default="",
+                editable=False,
+                max_length=8,
+            ),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="session_minute",
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="trade",
+            name="trading_date",
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="sessionrun",
+            index=models.Index(fields=["user", "trading_date"], name="journal_run_trading_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="sessionrun",
+            index=models.Index(fields=["user", "market_session", "killzone"], name="journal_run_bucket_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(fields=["market_session", "killzone"], name="journal_trade_bucket_idx"),
+        ),
+    ]
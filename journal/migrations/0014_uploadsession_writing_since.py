@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0013_market_buckets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="writing_since",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
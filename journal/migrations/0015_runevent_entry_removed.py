@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0014_uploadsession_writing_since"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="runevent",
+            name="action",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "Checked"),
+                    (2, "Unchecked"),
+                    (3, "Note edited"),
+                    (4, "Reviewed"),
+                    (5, "Trade entry"),
+                    (6, "Trade removed"),
+                ]
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-19
+
+import hashlib
+import zlib
+
+from django.db import migrations, models
+
+
+def hash_snapshots(apps, schema_editor):
+    """
+    Same hash as journal.checklists.snapshot_hash: sha256 of the uncompressed JSON.
+    """
+    StrategyVersion = apps.get_model("journal", "StrategyVersion")
+    for snapshot in StrategyVersion.objects.only("id", "blob").iterator():
+        content_hash = hashlib.sha256(zlib.decompress(bytes(snapshot.blob))).hexdigest()
+        StrategyVersion.objects.filter(pk=snapshot.pk).update(content_hash=content_hash)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0015_runevent_entry_removed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="strategyversion",
+            name="content_hash",
+            field=models.CharField(default="", editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(hash_snapshots, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="strategyversion",
+            index=models.Index(fields=["strategy", "content_hash"], name="journal_snapshot_hash_idx"),
+        ),
+    ]
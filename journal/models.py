@@ -1,7 +1,11 @@
+import uuid
+
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from .storage import attachment_storage, step_image_storage
+
 
 class Concept(models.Model):
     """
@@ -19,12 +23,22 @@ class Strategy(models.Model):
     name = models.CharField(max_length=120, unique=True)
     description = models.TextField(blank=True, default="")
     is_active = models.BooleanField(default=True)
+    # Bumped with F() whenever a section, step or step image of this strategy changes.
+    version = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
 
+    def save(self, *args, **kwargs):
+        # Never write version back from an instance: a stale one would roll the counter back.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields if not field.primary_key and field.name != "version"
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return self.name
 
@@ -59,7 +73,7 @@ class Step(models.Model):
 
 class StepImage(models.Model):
     step = models.ForeignKey(Step, on_delete=models.CASCADE, related_name="images")
-    image = models.ImageField(upload_to="step_images/")
+    image = models.ImageField(upload_to="step_images/", storage=step_image_storage)
     caption = models.CharField(max_length=180, blank=True, default="")
     order = models.PositiveIntegerField(default=0)
 
@@ -70,6 +84,34 @@ class StepImage(models.Model):
         return f"{self.step.title} image {self.id}"
 
 
+class StrategyVersion(models.Model):
+    """
+    Immutable, published snapshot of a strategy's sections, steps and example images.
+    The checklist is stored as zlib-compressed compact JSON (see journal.checklists).
+    Numbers count a strategy's snapshots in publishing order; the same checklist
+    (same content_hash) is only published once.
+    """
+    strategy = models.ForeignKey(Strategy, on_delete=models.CASCADE, related_name="versions")
+    number = models.PositiveIntegerField()
+    blob = models.BinaryField()
+    # sha256 of the uncompressed JSON.
+    content_hash = models.CharField(max_length=64, editable=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["strategy_id", "-number"]
+        unique_together = ("strategy", "number")
+        indexes = [models.Index(fields=["strategy", "content_hash"], name="journal_snapshot_hash_idx")]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Strategy versions are immutable once published.")
+        super().save(*args, **kwargs)
+
+    def __str__(self) -> str:
+        return f"{self.strategy.name} v{self.number}"
+
+
 class Timeframe(models.TextChoices):
     DAILY = "D", "Daily"
     H4 = "4H", "4H"
@@ -84,7 +126,7 @@ class DayJournal(models.Model):
     One journal per user per calendar date.
     """
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    date = models.DateField()
+    date = models.DateField(db_index=True)
 
     session = models.CharField(max_length=40, default="NY")
     symbol = models.CharField(max_length=20, blank=True, default="")
@@ -125,36 +167,116 @@ class JournalSlotItem(models.Model):
         return f"{self.journal.date} {self.timeframe}: {self.concept.name}"
 
 
+class MarketSession(models.TextChoices):
+    ASIA = "ASIA", "Asia"
+    LONDON = "LONDON", "London"
+    NY = "NY", "New York"
+    CLOSED = "CLOSED", "Closed"
+
+
+class Killzone(models.TextChoices):
+    LONDON_OPEN = "LONDON_OPEN", "London open"
+    NY_AM = "NY_AM", "NY AM"
+    NY_LUNCH = "NY_LUNCH", "NY lunch"
+    NY_PM = "NY_PM", "NY PM"
+
+
 class SessionRun(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="session_runs")
     strategy = models.ForeignKey(Strategy, on_delete=models.PROTECT, related_name="session_runs")
-    started_at = models.DateTimeField(default=timezone.now)
+    strategy_version = models.PositiveIntegerField(default=0, editable=False)
+    snapshot = models.ForeignKey(
+        StrategyVersion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="session_runs",
+    )
+    started_at = models.DateTimeField(default=timezone.now, db_index=True)
     ended_at = models.DateTimeField(null=True, blank=True)
     symbol = models.CharField(max_length=20, blank=True, default="")
     day_notes = models.TextField(blank=True, default="")
     trade_taken = models.BooleanField(default=False)
     completed = models.BooleanField(default=False)
+    # Packed StepCheck state once the run is archived (see journal.archive).
+    archived_checks = models.BinaryField(null=True, blank=True, editable=False)
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Checklist totals kept on the run so cross-user aggregates (journal.coach)
+    # never touch StepCheck. Old runs: `manage.py backfill_run_counts`.
+    checked_count = models.PositiveIntegerField(default=0, editable=False)
+    step_count = models.PositiveIntegerField(default=0, editable=False)
+    # New York time buckets of started_at, set on save (journal.killzones).
+    # Old runs: `manage.py backfill_market_buckets`.
+    trading_date = models.DateField(null=True, blank=True, editable=False)
+    market_session = models.CharField(max_length=8, choices=MarketSession.choices, blank=True, default="", editable=False)
+    killzone = models.CharField(max_length=12, choices=Killzone.choices, blank=True, default="", editable=False)
+    session_minute = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["user", "trading_date"], name="journal_run_trading_date_idx"),
+            models.Index(fields=["user", "market_session", "killzone"], name="journal_run_bucket_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.username} - {self.strategy.name} ({self.started_at:%Y-%m-%d})"
 
 
 class StepCheck(models.Model):
+    """
+    Checklist state for one step of a run. Rows are sparse: a step that was
+    never touched has no row and reads as unchecked with no notes.
+    """
     session_run = models.ForeignKey(SessionRun, on_delete=models.CASCADE, related_name="step_checks")
-    step = models.ForeignKey(Step, on_delete=models.CASCADE, related_name="checks")
+    # No FK constraint: deleting a step must not rewrite the history of past runs,
+    # which render from their pinned StrategyVersion instead of the live tables.
+    step = models.ForeignKey(Step, on_delete=models.DO_NOTHING, db_constraint=False, related_name="checks")
     checked = models.BooleanField(default=False)
-    checked_at = models.DateTimeField(null=True, blank=True)
+    checked_at = models.DateTimeField(null=True, blank=True, db_index=True)
     notes = models.CharField(max_length=300, blank=True, default="")
 
     class Meta:
         unique_together = ("session_run", "step")
-        ordering = ["step__section__order", "step__order", "id"]
+        ordering = ["id"]
+
+    def __str__(self) -> str:
+        return f"{self.session_run_id} - step {self.step_id}"
+
+
+class RunEventAction(models.IntegerChoices):
+    CHECKED = 1, "Checked"
+    UNCHECKED = 2, "Unchecked"
+    NOTE = 3, "Note edited"
+    REVIEWED = 4, "Reviewed"
+    ENTRY = 5, "Trade entry"
+    ENTRY_REMOVED = 6, "Trade removed"
+
+
+class RunEvent(models.Model):
+    """
+    Append-only log of what happened during a session run, in the order it happened.
+    Rows are never updated; replay them with journal.events.replay_run.
+    """
+    session_run = models.ForeignKey(SessionRun, on_delete=models.CASCADE, related_name="events")
+    # No FK constraint: history must survive a step being edited or deleted later.
+    step = models.ForeignKey(
+        Step,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    action = models.PositiveSmallIntegerField(choices=RunEventAction.choices)
+    occurred_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["id"]
 
     def __str__(self) -> str:
-        return f"{self.session_run_id} - {self.step.title}"
+        return f"{self.session_run_id} {self.get_action_display()} {self.step_id or ''}".rstrip()
 
 
 class TradeDirection(models.TextChoices):
@@ -165,14 +287,152 @@ class TradeDirection(models.TextChoices):
 class Trade(models.Model):
     session_run = models.OneToOneField(SessionRun, on_delete=models.CASCADE, related_name="trade")
     direction = models.CharField(max_length=5, choices=TradeDirection.choices)
-    entry_time = models.DateTimeField()
+    entry_time = models.DateTimeField(db_index=True)
     stop = models.DecimalField(max_digits=12, decimal_places=4)
     target = models.DecimalField(max_digits=12, decimal_places=4)
     result_r = models.DecimalField(max_digits=8, decimal_places=2)
     notes = models.TextField(blank=True, default="")
 
+    # Filled from local bar data by `manage.py compute_excursions` (journal.bars).
+    mfe_r = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, editable=False)
+    mae_r = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, editable=False)
+    verified_r = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, editable=False)
+    time_to_stop = models.DurationField(null=True, blank=True, editable=False)
+    time_to_target = models.DurationField(null=True, blank=True, editable=False)
+    excursions_computed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # New York time buckets of entry_time, set on save (journal.killzones).
+    trading_date = models.DateField(null=True, blank=True, editable=False, db_index=True)
+    market_session = models.CharField(max_length=8, choices=MarketSession.choices, blank=True, default="", editable=False)
+    killzone = models.CharField(max_length=12, choices=Killzone.choices, blank=True, default="", editable=False)
+    session_minute = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ["-entry_time"]
+        indexes = [models.Index(fields=["market_session", "killzone"], name="journal_trade_bucket_idx")]
 
     def __str__(self) -> str:
         return f"Trade {self.session_run_id} {self.direction} {self.result_r}R"
+
+
+class TaskStatus(models.TextChoices):
+    QUEUED = "queued", "Queued"
+    RUNNING = "running", "Running"
+    DONE = "done", "Done"
+    FAILED = "failed", "Failed"
+
+
+class Task(models.Model):
+    """
+    A unit of background work, claimed and run by `manage.py runworker`.
+    See journal.tasks for the registry, enqueueing and claiming.
+    """
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=TaskStatus.choices, default=TaskStatus.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=100, blank=True, default="")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="tasks",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [models.Index(fields=["status", "run_after"], name="journal_task_claim_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+class Attachment(models.Model):
+    """
+    A screenshot attached to a trade or a journal day, uploaded through
+    the resumable upload API (journal.uploads).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="attachments")
+    trade = models.ForeignKey(Trade, on_delete=models.CASCADE, null=True, blank=True, related_name="attachments")
+    journal = models.ForeignKey(
+        DayJournal, on_delete=models.CASCADE, null=True, blank=True, related_name="attachments"
+    )
+    file = models.FileField(upload_to="attachments/", storage=attachment_storage)
+    original_name = models.CharField(max_length=200, blank=True, default="")
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    size = models.PositiveIntegerField(default=0)
+    sha256 = models.CharField(max_length=64)
+    caption = models.CharField(max_length=180, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+
+    def __str__(self) -> str:
+        return self.original_name or self.file.name
+
+
+class UploadSession(models.Model):
+    """
+    An in-progress chunked upload. Chunks are appended to a partial file at
+    `received`; a client that lost its connection asks for `received` and
+    continues from there. `writing_since` marks a request writing a chunk or
+    completing the upload; `attachment` is set once it is complete.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    trade = models.ForeignKey(Trade, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    journal = models.ForeignKey(DayJournal, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    filename = models.CharField(max_length=200)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received = models.PositiveIntegerField(default=0)
+    writing_since = models.DateTimeField(null=True, blank=True)
+    attachment = models.OneToOneField(Attachment, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
+class ReportPeriod(models.TextChoices):
+    WEEK = "week", "Weekly"
+    MONTH = "month", "Monthly"
+
+
+class ReportSnapshot(models.Model):
+    """
+    A pre-rendered weekly or monthly review (see journal.reports). The HTML
+    lives under REPORT_ROOT; the row is dirty while changed_at is newer than
+    generated_at.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="report_snapshots")
+    period = models.CharField(max_length=10, choices=ReportPeriod.choices)
+    start = models.DateField()
+    end = models.DateField()
+    changed_at = models.DateTimeField(default=timezone.now)
+    generated_at = models.DateTimeField(null=True, blank=True)
+    path = models.CharField(max_length=200, blank=True, default="")
+    # Headline numbers for the report list, so it never opens the files.
+    summary = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        unique_together = ("user", "period", "start")
+        ordering = ["-start", "period"]
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.generated_at is None or self.changed_at > self.generated_at
+
+    def __str__(self) -> str:
+        return f"{self.user_id} {self.period} {self.start}"
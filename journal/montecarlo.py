@@ -0,0 +1,118 @@
+"""
+Monte Carlo equity simulation over a strategy's historical R distribution.
+
+Paths are generated in fixed-size batches, each with its own child of one
+SeedSequence, so results depend only on (seed, paths, trades, batch size)
+and not on how many worker processes ran them. Batches are fanned out
+over a ProcessPoolExecutor; the batch function is pure numpy so it can run
+in a spawned worker without Django being set up. Workers are spawned, not
+forked, so they never inherit a copy of the caller's threads, locks or
+database connections.
+"""
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DRAWDOWN_PERCENTILES = (50, 75, 90, 95, 99)
+FINAL_R_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_BATCH_SIZE = 2000
+SIMULATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _simulate_batch(args) -> dict:
+    r_values, n_paths, n_trades, seed_seq, ruin_r = args
+    rng = np.random.default_rng(seed_seq)
+    draws = rng.choice(r_values, size=(n_paths, n_trades))
+
+    equity = np.zeros((n_paths, n_trades + 1))
+    np.cumsum(draws, axis=1, out=equity[:, 1:])
+    peaks = np.maximum.accumulate(equity, axis=1)
+    max_drawdown = (peaks - equity).max(axis=1)
+    ruined = equity.min(axis=1) <= -ruin_r
+
+    # Longest losing streak per path: running loss count minus its value at the last win.
+    losses = (draws < 0).astype(np.int32)
+    running = np.cumsum(losses, axis=1)
+    at_last_win = np.maximum.accumulate(np.where(losses == 0, running, 0), axis=1)
+    longest_losing = (running - at_last_win).max(axis=1)
+
+    return {
+        "max_drawdown": max_drawdown,
+        "final_r": equity[:, -1],
+        "ruined": int(ruined.sum()),
+        "longest_losing": longest_losing,
+    }
+
+
+def _percentiles(values, percentiles) -> list[tuple]:
+    return [(p, round(float(v), 2)) for p, v in zip(percentiles, np.percentile(values, percentiles))]
+
+
+def simulate(r_values, n_paths: int = 20000, n_trades: int = 100, seed: int = 0, ruin_r: float = 20.0,
+             workers: int | None = None, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Resample r_values (with replacement) into n_paths equity curves of
+    n_trades each. Returns drawdown/final-R percentiles (in R), risk of ruin
+    (share of paths that ever fall ruin_r below the start) and the
+    distribution of the longest losing streak.
+    """
+    r_values = np.asarray(r_values, dtype=np.float64)
+    if r_values.size == 0:
+        raise ValueError("No R values to simulate from.")
+
+    sizes = [batch_size] * (n_paths // batch_size)
+    if n_paths % batch_size:
+        sizes.append(n_paths % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(r_values, size, n_trades, seed_seq, ruin_r) for size, seed_seq in zip(sizes, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        batches = [_simulate_batch(task) for task in tasks]
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as pool:
+            batches = list(pool.map(_simulate_batch, tasks))
+
+    max_drawdown = np.concatenate([b["max_drawdown"] for b in batches])
+    final_r = np.concatenate([b["final_r"] for b in batches])
+    longest_losing = np.concatenate([b["longest_losing"] for b in batches])
+    streak_counts = np.bincount(longest_losing)
+
+    return {
+        "paths": int(n_paths),
+        "trades_per_path": int(n_trades),
+        "seed": int(seed),
+        "sample_size": int(r_values.size),
+        "mean_r": round(float(r_values.mean()), 3),
+        "ruin_r": float(ruin_r),
+        "risk_of_ruin": round(sum(b["ruined"] for b in batches) / n_paths, 4),
+        "drawdown_percentiles": _percentiles(max_drawdown, DRAWDOWN_PERCENTILES),
+        "final_r_percentiles": _percentiles(final_r, FINAL_R_PERCENTILES),
+        "losing_streaks": [
+            (length, int(count), round(count / n_paths, 4)) for length, count in enumerate(streak_counts) if count
+        ],
+    }
+
+
+def strategy_r_values(strategy_id: int, user_id: int | None = None):
+    from .models import Trade
+    from .routers import analytics_reads
+
+    trades = Trade.objects.filter(session_run__strategy_id=strategy_id)
+    if user_id is not None:
+        trades = trades.filter(session_run__user_id=user_id)
+    # Stable order so the same trades always give the same seeded paths.
+    r_values = trades.order_by("id").values_list("result_r", flat=True)
+    with analytics_reads():
+        return np.array([float(r) for r in r_values], dtype=np.float64)
+
+
+def simulation_cache_key(r_values, **params) -> str:
+    digest = hashlib.sha256(np.ascontiguousarray(r_values).tobytes())
+    for name in sorted(params):
+        digest.update(f"|{name}={params[name]}".encode())
+    return f"journal:montecarlo:{digest.hexdigest()}"
@@ -0,0 +1,220 @@
+"""
+Pre-rendered weekly and monthly review reports.
+
+Runs belong to the week and month of their New York trading day
+(SessionRun.trading_date, see journal.killzones). Saving a SessionRun --
+including the review that closes it -- a Trade or a DayJournal marks that
+week and month as changed (mark_dirty, wired in journal.signals).
+Starting a run and checklist saves while it is open do not; the run and
+its compliance are picked up when it is reviewed. build_dirty_reports() re-renders
+only the periods changed since they were last generated, and writes each
+report's HTML to REPORT_ROOT/<user_id>/<period>-<start>.html. Opening a
+report reads that file and touches no journal tables; a dirty one is shown
+as last generated while the view queues reports.build.
+
+The generation start time is stored as generated_at, so a change that
+lands while a report is being built leaves it dirty for the next pass.
+"""
+import calendar
+import os
+import tempfile
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .archive import load_checks
+from .checklists import run_template, template_steps
+from .killzones import MARKET_TZ, TRADING_DAY_START, market_buckets
+from .models import DayJournal, ReportPeriod, ReportSnapshot, SessionRun
+from .routers import analytics_reads
+
+
+def period_bounds(period: str, day: date) -> tuple[date, date]:
+    if period == ReportPeriod.WEEK:
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    return start, start.replace(day=calendar.monthrange(start.year, start.month)[1])
+
+
+def mark_dirty(user_id: int, days) -> None:
+    """
+    Flag the week and month of every given day as changed for this user.
+    """
+    now = timezone.now()
+    rows = {}
+    for day in days:
+        for period in ReportPeriod.values:
+            start, end = period_bounds(period, day)
+            rows[(period, start)] = ReportSnapshot(
+                user_id=user_id, period=period, start=start, end=end, changed_at=now
+            )
+    if rows:
+        ReportSnapshot.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=["user", "period", "start"],
+            update_fields=["changed_at"],
+        )
+
+
+def run_trading_date(trading_date, started_at) -> date:
+    # Rows saved before the bucket columns existed may not be backfilled yet.
+    return trading_date or market_buckets(started_at)["trading_date"]
+
+
+def mark_run_dirty(run_id: int) -> None:
+    row = SessionRun.objects.filter(pk=run_id).values_list("user_id", "trading_date", "started_at").first()
+    if row is not None:
+        mark_dirty(row[0], [run_trading_date(row[1], row[2])])
+
+
+def mark_all_dirty(user=None) -> int:
+    """
+    Flag every period that has runs or journal days (after a deploy, or to backfill).
+    """
+    runs = SessionRun.objects.all()
+    journals = DayJournal.objects.all()
+    if user is not None:
+        runs = runs.filter(user=user)
+        journals = journals.filter(user=user)
+    days = defaultdict(set)
+    for user_id, trading_date, started_at in runs.values_list("user_id", "trading_date", "started_at").iterator():
+        days[user_id].add(run_trading_date(trading_date, started_at))
+    for user_id, day in journals.values_list("user_id", "date").iterator():
+        days[user_id].add(day)
+    for user_id, user_days in days.items():
+        mark_dirty(user_id, user_days)
+    return sum(len(d) for d in days.values())
+
+
+def dirty_reports():
+    return ReportSnapshot.objects.filter(Q(generated_at__isnull=True) | Q(changed_at__gt=F("generated_at")))
+
+
+def build_report_context(snapshot: ReportSnapshot) -> dict:
+    # Not-yet-backfilled runs fall back to the New York day of their start time.
+    start_dt = datetime.combine(snapshot.start - timedelta(days=1), TRADING_DAY_START, tzinfo=MARKET_TZ)
+    end_dt = datetime.combine(snapshot.end, TRADING_DAY_START, tzinfo=MARKET_TZ)
+    in_period = Q(trading_date__range=(snapshot.start, snapshot.end)) | Q(
+        trading_date__isnull=True, started_at__gte=start_dt, started_at__lt=end_dt
+    )
+    runs = (
+        SessionRun.objects.filter(in_period, user_id=snapshot.user_id)
+        .select_related("strategy", "snapshot", "trade")
+        .prefetch_related("step_checks")
+        .order_by("started_at")
+    )
+
+    run_rows = []
+    by_strategy = defaultdict(lambda: {"runs": 0, "trades": 0, "total_r": Decimal("0")})
+    results = []
+    checked_total = steps_total = 0
+    for run in runs:
+        steps = sum(1 for _ in template_steps(run_template(run)))
+        checked = sum(1 for check in load_checks(run) if check.checked)
+        trade = getattr(run, "trade", None)
+        checked_total += checked
+        steps_total += steps
+        strategy = by_strategy[run.strategy.name]
+        strategy["runs"] += 1
+        if trade is not None:
+            results.append(trade.result_r)
+            strategy["trades"] += 1
+            strategy["total_r"] += trade.result_r
+        run_rows.append(
+            {
+                "run": run,
+                "checked": checked,
+                "steps": steps,
+                "compliance": round(100 * checked / steps) if steps else None,
+                "trade": trade,
+            }
+        )
+
+    improvements = (
+        DayJournal.objects.filter(user_id=snapshot.user_id, date__range=(snapshot.start, snapshot.end))
+        .exclude(what_to_improve="")
+        .order_by("date")
+        .values_list("date", "what_to_improve")
+    )
+    total_r = sum(results, Decimal("0"))
+    summary = {
+        "runs": len(run_rows),
+        "completed": sum(1 for row in run_rows if row["run"].completed),
+        "trades": len(results),
+        "wins": sum(1 for r in results if r > 0),
+        "total_r": str(total_r),
+        "avg_r": str(round(total_r / len(results), 2)) if results else None,
+        "compliance": round(100 * checked_total / steps_total) if steps_total else None,
+    }
+    return {
+        "snapshot": snapshot,
+        "summary": summary,
+        "run_rows": run_rows,
+        "strategies": sorted(by_strategy.items()),
+        "best_r": max(results) if results else None,
+        "worst_r": min(results) if results else None,
+        "improvements": list(improvements),
+    }
+
+
+def report_path(snapshot: ReportSnapshot) -> Path:
+    return Path(settings.REPORT_ROOT) / str(snapshot.user_id) / f"{snapshot.period}-{snapshot.start:%Y-%m-%d}.html"
+
+
+def generate_report(snapshot: ReportSnapshot) -> ReportSnapshot:
+    started = timezone.now()
+    with analytics_reads():
+        context = build_report_context(snapshot)
+        html = render_to_string("journal/report.html", context)
+
+    path = report_path(snapshot)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write beside the target and rename, so readers never see a half-written report.
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as temp:
+            temp.write(html)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    relative = path.relative_to(settings.REPORT_ROOT).as_posix()
+    ReportSnapshot.objects.filter(pk=snapshot.pk).update(
+        generated_at=started, path=relative, summary=context["summary"]
+    )
+    snapshot.generated_at, snapshot.path, snapshot.summary = started, relative, context["summary"]
+    return snapshot
+
+
+def read_report(snapshot: ReportSnapshot) -> str | None:
+    """
+    The stored HTML, even if the period changed since (see is_dirty), or None
+    if it was never generated. Rebuilding is left to the reports.build task.
+    """
+    path = Path(settings.REPORT_ROOT) / snapshot.path if snapshot.path else None
+    if path is None or not path.is_file():
+        return None
+    return path.read_text(encoding="utf-8")
+
+
+def build_dirty_reports(user=None, limit: int | None = None) -> int:
+    snapshots = dirty_reports().order_by("start")
+    if user is not None:
+        snapshots = snapshots.filter(user=user)
+    if limit is not None:
+        snapshots = snapshots[:limit]
+    built = 0
+    for snapshot in snapshots:
+        generate_report(snapshot)
+        built += 1
+    return built
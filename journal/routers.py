@@ -0,0 +1,105 @@
+"""
+Send heavy analytics reads to a separate read-only connection.
+
+Code that scans many rows for analytics, reports or exports wraps its
+queries in `with analytics_reads():` (or decorates a function with it).
+When the "analytics" alias is configured (TC_ANALYTICS_READS, see
+settings), AnalyticsRouter sends those reads to it, so a long scan never
+holds the connection or locks that checklist and day saves are waiting on.
+Without the alias everything stays on "default".
+
+The analytics connection may lag the primary (a Postgres standby), so reads
+stay on the primary when they must see a recent write:
+  - inside a transaction on the primary;
+  - for a model this context wrote in the last ANALYTICS_REPLICA_LAG_SECONDS;
+  - for ANALYTICS_REPLICA_LAG_SECONDS after any request by this browser that
+    wrote. ReadYourWritesMiddleware records that in a cookie.
+Writes always go to the primary.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ANALYTICS_DB = "analytics"
+PIN_COOKIE = "tc_primary_until"
+
+_analytics = ContextVar("analytics_reads", default=False)
+# model label -> time.monotonic() of this context's last write to it
+_recent_writes = ContextVar("recent_writes", default=None)
+# time.time() until which this request reads only from the primary
+_pinned_until = ContextVar("pinned_until", default=0.0)
+
+
+@contextmanager
+def analytics_reads():
+    token = _analytics.set(True)
+    try:
+        yield
+    finally:
+        _analytics.reset(token)
+
+
+def analytics_configured() -> bool:
+    return ANALYTICS_DB in connections.settings
+
+
+def _note_write(model) -> None:
+    writes = _recent_writes.get()
+    if writes is None:
+        writes = {}
+        _recent_writes.set(writes)
+    writes[model._meta.label] = time.monotonic()
+
+
+def _needs_primary(model) -> bool:
+    if time.time() < _pinned_until.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return True
+    written = (_recent_writes.get() or {}).get(model._meta.label)
+    return written is not None and time.monotonic() - written < settings.ANALYTICS_REPLICA_LAG_SECONDS
+
+
+class AnalyticsRouter:
+    def db_for_read(self, model, **hints):
+        if not _analytics.get() or not analytics_configured() or _needs_primary(model):
+            return None
+        return ANALYTICS_DB
+
+    def db_for_write(self, model, **hints):
+        _note_write(model)
+        # Explicit, so rows read through the analytics connection still save to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db == ANALYTICS_DB else None
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pin a browser's analytics reads to the primary for a while after it writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0.0
+        writes_token = _recent_writes.set({})
+        pinned_token = _pinned_until.set(pinned_until)
+        try:
+            response = self.get_response(request)
+            if _recent_writes.get() and analytics_configured():
+                lag = settings.ANALYTICS_REPLICA_LAG_SECONDS
+                response.set_cookie(PIN_COOKIE, f"{time.time() + lag:.3f}", max_age=lag, httponly=True, samesite="Lax")
+            return response
+        finally:
+            _pinned_until.reset(pinned_token)
+            _recent_writes.reset(writes_token)
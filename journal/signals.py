@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .cache_versions import CONCEPTS, STRATEGIES, bump_model_version
+from .killzones import apply_buckets
+from .models import Concept, DayJournal, Section, SessionRun, Step, StepImage, Strategy, Trade
+from .reports import mark_dirty, mark_run_dirty, run_trading_date
+
+
+def _bump_strategy_versions(strategy_ids) -> None:
+    Strategy.objects.filter(pk__in=strategy_ids).update(version=F("version") + 1)
+
+
+def library_bulk_changed(strategy_ids=(), concepts: bool = False) -> None:
+    """
+    Do what the save signals below would have done, for bulk writes
+    (bulk_create, queryset update/delete) that skip them.
+    """
+    if strategy_ids:
+        _bump_strategy_versions(strategy_ids)
+    bump_model_version(STRATEGIES)
+    if concepts:
+        bump_model_version(CONCEPTS)
+
+
+@receiver([post_save, post_delete], sender=Section)
+def section_changed(sender, instance, **kwargs):
+    _bump_strategy_versions([instance.strategy_id])
+
+
+@receiver([post_save, post_delete], sender=Step)
+def step_changed(sender, instance, **kwargs):
+    strategy_id = Section.objects.filter(pk=instance.section_id).values_list("strategy_id", flat=True).first()
+    if strategy_id is not None:
+        _bump_strategy_versions([strategy_id])
+
+
+@receiver([post_save, post_delete], sender=StepImage)
+def step_image_changed(sender, instance, **kwargs):
+    strategy_id = (
+        Step.objects.filter(pk=instance.step_id).values_list("section__strategy_id", flat=True).first()
+    )
+    if strategy_id is not None:
+        _bump_strategy_versions([strategy_id])
+
+
+@receiver([post_save, post_delete], sender=Strategy)
+@receiver([post_save, post_delete], sender=Section)
+@receiver([post_save, post_delete], sender=Step)
+@receiver([post_save, post_delete], sender=StepImage)
+def strategy_library_changed(sender, **kwargs):
+    bump_model_version(STRATEGIES)
+
+
+@receiver([post_save, post_delete], sender=Concept)
+def concept_library_changed(sender, **kwargs):
+    bump_model_version(CONCEPTS)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(pre_save, sender=SessionRun)
+def run_buckets(sender, instance, **kwargs):
+    apply_buckets(instance, instance.started_at)
+
+
+@receiver(pre_save, sender=Trade)
+def trade_buckets(sender, instance, **kwargs):
+    apply_buckets(instance, instance.entry_time)
+
+
+# SessionRun fields that reports show or group by.
+REPORT_RUN_FIELDS = {"user", "strategy", "snapshot", "started_at", "trading_date", "symbol", "completed"}
+
+
+@receiver([post_save, post_delete], sender=SessionRun)
+def run_report_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # A run that was just started has nothing to report until it is reviewed,
+    # and saves such as archiving (journal.archive) do not change what is shown.
+    if created or (update_fields is not None and not REPORT_RUN_FIELDS.intersection(update_fields)):
+        return
+    mark_dirty(instance.user_id, [run_trading_date(instance.trading_date, instance.started_at)])
+
+
+@receiver([post_save, post_delete], sender=Trade)
+def trade_report_changed(sender, instance, **kwargs):
+    mark_run_dirty(instance.session_run_id)
+
+
+@receiver([post_save, post_delete], sender=DayJournal)
+def journal_report_changed(sender, instance, **kwargs):
+    mark_dirty(instance.user_id, [instance.date])
@@ -1,27 +1,183 @@
+// Day page: rendered from the compact day state (/api/day/Y/M/D/) and the
+// cached concept library (/api/concepts/?v=N). Switching days and saving are
+// one request each.
+let currentState = null;
+let conceptsVersion = null;
+const conceptNames = new Map();
+let dirty = false;
+
+function dayPath(template, isoDate) {
+  const [y, m, d] = isoDate.split("-").map(Number);
+  return template.replace("2000/1/1/", `${y}/${m}/${d}/`);
+}
+
+function shiftDate(isoDate, days) {
+  const dt = new Date(`${isoDate}T12:00:00`);
+  dt.setDate(dt.getDate() + days);
+  const pad = n => String(n).padStart(2, "0");
+  return `${dt.getFullYear()}-${pad(dt.getMonth() + 1)}-${pad(dt.getDate())}`;
+}
+
+function setStatus(text) {
+  document.getElementById("saveStatus").textContent = text;
+}
+
+function makeCard(conceptId, note, removable) {
+  const card = document.createElement("div");
+  card.className = "card p-2 mb-2 concept-card";
+  card.setAttribute("data-concept-id", conceptId);
+
+  const header = document.createElement("div");
+  header.className = "d-flex align-items-center justify-content-between";
+  const title = document.createElement("div");
+  title.className = "d-flex align-items-center gap-2";
+  const handle = document.createElement("span");
+  handle.className = "drag-handle";
+  handle.textContent = "::";
+  const name = document.createElement("strong");
+  name.textContent = conceptNames.get(conceptId) || `Concept ${conceptId}`;
+  title.append(handle, name);
+  header.appendChild(title);
+  if (removable) addRemoveButton(header);
+
+  const input = document.createElement("input");
+  input.className = "form-control form-control-sm mt-2 slot-note";
+  input.placeholder = "Optional note (why/where/how)";
+  input.value = note || "";
+
+  card.append(header, input);
+  return card;
+}
+
+function addRemoveButton(header) {
+  const removeBtn = document.createElement("button");
+  removeBtn.type = "button";
+  removeBtn.className = "btn btn-sm btn-outline-danger remove-btn";
+  removeBtn.textContent = "Remove";
+  header.appendChild(removeBtn);
+}
+
 function getCardData(cardEl) {
   const conceptId = parseInt(cardEl.getAttribute("data-concept-id"), 10);
   const noteInput = cardEl.querySelector(".slot-note");
-  const note = noteInput ? noteInput.value : "";
-  return { concept_id: conceptId, note };
+  return [conceptId, noteInput ? noteInput.value : ""];
 }
 
-function buildSlotsPayload() {
+function buildPayload() {
   const slots = {};
   document.querySelectorAll(".timeframe-slot").forEach(slotEl => {
     const tf = slotEl.getAttribute("data-timeframe");
-    const cards = Array.from(slotEl.querySelectorAll(".concept-card"));
-    slots[tf] = cards.map(getCardData);
+    slots[tf] = Array.from(slotEl.querySelectorAll(".concept-card")).map(getCardData);
   });
-  return { slots };
+
+  const formEl = document.getElementById("journalForm");
+  const form = {};
+  Object.keys(currentState.form).forEach(name => {
+    const field = formEl.elements[name];
+    if (!field) return;
+    form[name] = field.type === "checkbox" ? field.checked : field.value;
+  });
+  return { form, slots };
+}
+
+async function loadConcepts(version) {
+  if (version === conceptsVersion) return;
+  // The versioned URL is cached by the browser for good; a new version is a new URL.
+  const resp = await fetch(`${CONCEPTS_URL}?v=${version}`, { credentials: "same-origin" });
+  if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+  const data = await resp.json();
+  conceptNames.clear();
+  const libraryEl = document.getElementById("library");
+  libraryEl.replaceChildren();
+  data.concepts.forEach(([id, name]) => {
+    conceptNames.set(id, name);
+    libraryEl.appendChild(makeCard(id, "", false));
+  });
+  conceptsVersion = version;
+}
+
+function renderAttachments(state) {
+  const widget = document.querySelector(".upload-widget");
+  if (!widget) return;
+  widget.dataset.date = state.date;
+  const list = widget.querySelector(".attachment-list");
+  list.replaceChildren();
+  if (!state.attachments.length) {
+    const empty = document.createElement("div");
+    empty.className = "small-muted attachment-empty";
+    empty.textContent = "No screenshots yet.";
+    list.appendChild(empty);
+  }
+  state.attachments.forEach(([url, name]) => {
+    const link = document.createElement("a");
+    link.href = url;
+    link.target = "_blank";
+    link.rel = "noopener";
+    const img = document.createElement("img");
+    img.src = url;
+    img.alt = name;
+    img.className = "rounded border";
+    img.style.height = "96px";
+    link.appendChild(img);
+    list.appendChild(link);
+  });
+}
+
+async function renderDay(state) {
+  await loadConcepts(state.concepts);
+  currentState = state;
+  document.getElementById("dayTitle").textContent = state.date;
+
+  document.querySelectorAll(".timeframe-slot").forEach(slotEl => {
+    const items = state.slots[slotEl.getAttribute("data-timeframe")] || [];
+    slotEl.replaceChildren(...items.map(([conceptId, note]) => makeCard(conceptId, note, true)));
+  });
+
+  const formEl = document.getElementById("journalForm");
+  Object.entries(state.form).forEach(([name, value]) => {
+    const field = formEl.elements[name];
+    if (!field) return;
+    if (field.type === "checkbox") field.checked = Boolean(value);
+    else field.value = value ?? "";
+  });
+
+  renderAttachments(state);
+  dirty = false;
+  setStatus(state.updated ? "" : "(new day)");
+}
+
+async function showDay(isoDate, push) {
+  if (dirty && !confirm("Discard unsaved changes?")) return;
+  const resp = await fetch(dayPath(DAY_API_TEMPLATE, isoDate), { credentials: "same-origin" });
+  if (!resp.ok) {
+    setStatus("Could not load day.");
+    return;
+  }
+  await renderDay(await resp.json());
+  if (push) history.pushState({ date: isoDate }, "", dayPath(DAY_URL_TEMPLATE, isoDate));
 }
 
-function attachRemoveButtons(container) {
-  container.querySelectorAll(".remove-btn").forEach(btn => {
-    btn.addEventListener("click", () => {
-      const card = btn.closest(".concept-card");
-      if (card) card.remove();
-    });
+async function saveDay() {
+  setStatus("Saving...");
+  const resp = await fetch(dayPath(DAY_API_TEMPLATE, currentState.date), {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      "X-CSRFToken": CSRF_TOKEN
+    },
+    credentials: "same-origin",
+    body: JSON.stringify(buildPayload())
   });
+
+  if (!resp.ok) {
+    const data = await resp.json().catch(() => ({}));
+    const messages = Object.values(data.errors || {}).flat().map(e => e.message || e);
+    setStatus(`Save failed. ${messages.join(" ")}`);
+    return;
+  }
+  currentState.updated = (await resp.json()).updated;
+  dirty = false;
+  setStatus("Saved.");
 }
 
 function makeSortableLibrary(libraryEl) {
@@ -41,49 +197,46 @@ function makeSortableSlot(slotEl) {
     animation: 150,
     onAdd: function (evt) {
       // When cloned from library, add a remove button if missing
-      const card = evt.item;
-      if (!card.querySelector(".remove-btn")) {
-        const header = card.querySelector(".d-flex.align-items-center.justify-content-between");
-        if (header) {
-          const removeBtn = document.createElement("button");
-          removeBtn.type = "button";
-          removeBtn.className = "btn btn-sm btn-outline-danger remove-btn";
-          removeBtn.textContent = "Remove";
-          header.appendChild(removeBtn);
-        }
-      }
-      attachRemoveButtons(card.parentElement);
-    }
-  });
-}
-
-async function saveSlots() {
-  const payload = buildSlotsPayload();
-
-  const resp = await fetch(SAVE_URL, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-      "X-CSRFToken": CSRF_TOKEN
+      const header = evt.item.querySelector(".d-flex.align-items-center.justify-content-between");
+      if (header && !header.querySelector(".remove-btn")) addRemoveButton(header);
+      dirty = true;
     },
-    body: JSON.stringify(payload)
+    onUpdate: function () {
+      dirty = true;
+    }
   });
-
-  if (!resp.ok) {
-    alert("Save failed. Try again.");
-    return;
-  }
-
-  alert("Saved slots.");
 }
 
 document.addEventListener("DOMContentLoaded", () => {
-  const libraryEl = document.getElementById("library");
-  makeSortableLibrary(libraryEl);
-
+  makeSortableLibrary(document.getElementById("library"));
   document.querySelectorAll(".timeframe-slot").forEach(slotEl => makeSortableSlot(slotEl));
-  attachRemoveButtons(document);
 
-  const saveBtn = document.getElementById("saveBtn");
-  saveBtn.addEventListener("click", saveSlots);
+  const initial = JSON.parse(document.getElementById("dayState").textContent);
+  renderDay(initial).catch(() => setStatus("Could not load the concept library."));
+  history.replaceState({ date: initial.date }, "", window.location.href);
+
+  // Remove buttons are created dynamically, so delegate.
+  document.addEventListener("click", evt => {
+    const btn = evt.target.closest(".timeframe-slot .remove-btn");
+    if (!btn) return;
+    btn.closest(".concept-card").remove();
+    dirty = true;
+  });
+  document.addEventListener("input", evt => {
+    if (evt.target.closest(".timeframe-slot, #journalForm")) dirty = true;
+  });
+
+  document.getElementById("saveBtn").addEventListener("click", saveDay);
+  document.getElementById("journalForm").addEventListener("submit", evt => {
+    evt.preventDefault();
+    saveDay();
+  });
+  document.getElementById("prevDayBtn").addEventListener("click", () => showDay(shiftDate(currentState.date, -1), true));
+  document.getElementById("nextDayBtn").addEventListener("click", () => showDay(shiftDate(currentState.date, 1), true));
+  window.addEventListener("popstate", evt => {
+    if (evt.state && evt.state.date) {
+      dirty = false;
+      showDay(evt.state.date, false);
+    }
+  });
 });
@@ -0,0 +1,113 @@
+// Live checklist: autosave per-step changes and apply deltas pushed by the
+// run's SSE stream, or polled from the delta endpoint where there is no stream.
+(function () {
+  const form = document.getElementById("runForm");
+  if (!form) return;
+  const statusEl = document.getElementById("liveStatus");
+  const checkedEl = document.getElementById("checkedSteps");
+  const csrfToken = form.querySelector("input[name=csrfmiddlewaretoken]").value;
+  const POLL_MS = 3000;
+  let lastEventId = form.getAttribute("data-last-event-id") || "0";
+  // Event ids the delta endpoint already sent (see journal.live).
+  let seenIds = "";
+
+  function setStatus(text, cls) {
+    if (!statusEl) return;
+    statusEl.textContent = text;
+    statusEl.className = `badge ms-1 ${cls}`;
+  }
+
+  // Only the steps touched on this device are sent, so another device's
+  // edits to other steps are never overwritten.
+  let pending = {};
+  let saveTimer = null;
+  async function save() {
+    const steps = Object.values(pending);
+    pending = {};
+    if (!steps.length) return;
+    try {
+      const resp = await fetch(form.action || window.location.href, {
+        method: "POST",
+        body: JSON.stringify({ steps }),
+        headers: {
+          "Content-Type": "application/json",
+          "X-CSRFToken": csrfToken,
+          "X-Requested-With": "fetch"
+        },
+        credentials: "same-origin"
+      });
+      if (!resp.ok) setStatus("save failed", "bg-danger");
+    } catch (err) {
+      setStatus("save failed", "bg-danger");
+    }
+  }
+
+  function queueChange(input, change, delay) {
+    const stepId = parseInt(input.closest("[data-step-id]").getAttribute("data-step-id"), 10);
+    pending[stepId] = Object.assign(pending[stepId] || { s: stepId }, change);
+    clearTimeout(saveTimer);
+    saveTimer = setTimeout(save, delay);
+  }
+
+  form.querySelectorAll("input[type=checkbox]").forEach(input => {
+    input.addEventListener("change", () => queueChange(input, { c: input.checked ? 1 : 0 }, 0));
+  });
+  form.querySelectorAll("input[type=text]").forEach(input => {
+    input.addEventListener("input", () => queueChange(input, { n: input.value }, 800));
+  });
+
+  function applyDelta(delta) {
+    delta.steps.forEach(step => {
+      const row = form.querySelector(`[data-step-id="${step.s}"]`);
+      if (!row) return;
+      const checkbox = row.querySelector("input[type=checkbox]");
+      if (checkbox) checkbox.checked = step.c === 1;
+      const note = row.querySelector("input[type=text]");
+      // Never overwrite a note that is being typed on this device.
+      if (note && document.activeElement !== note) note.value = step.n;
+      const checkedAt = row.querySelector(".checked-at");
+      if (checkedAt) {
+        checkedAt.querySelector("span").textContent = step.t;
+        checkedAt.classList.toggle("d-none", !step.t);
+      }
+    });
+    if (checkedEl) checkedEl.textContent = delta.checked;
+  }
+
+  async function poll() {
+    try {
+      const url = `${form.getAttribute("data-delta-url")}?after=${lastEventId}&seen=${seenIds}`;
+      const resp = await fetch(url, { credentials: "same-origin" });
+      if (resp.ok) {
+        const data = await resp.json();
+        lastEventId = String(data.last);
+        seenIds = data.seen.join(",");
+        if (data.delta) applyDelta(data.delta);
+        setStatus("synced", "bg-info text-dark");
+      }
+    } catch (err) {
+      setStatus("offline", "bg-secondary");
+    }
+    setTimeout(poll, POLL_MS);
+  }
+
+  if (!("EventSource" in window)) {
+    poll();
+    return;
+  }
+  const source = new EventSource(form.getAttribute("data-stream-url"));
+  source.addEventListener("open", () => setStatus("live", "bg-success"));
+  source.addEventListener("error", () => {
+    if (source.readyState === EventSource.CLOSED) {
+      // No stream on this server (it answered 204): poll instead.
+      source.close();
+      poll();
+    } else {
+      setStatus("reconnecting", "bg-warning text-dark");
+    }
+  });
+  source.addEventListener("delta", event => {
+    lastEventId = event.lastEventId || lastEventId;
+    applyDelta(JSON.parse(event.data));
+  });
+})();
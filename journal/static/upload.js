@@ -0,0 +1,137 @@
+// Resumable screenshot uploads: hash, send fixed-size chunks and resume from the server's offset after a drop.
+(function () {
+  const CSRF_COOKIE = "csrftoken";
+  const MAX_RETRIES = 8;
+
+  function csrfToken() {
+    const match = document.cookie.match(new RegExp(`(?:^|; )${CSRF_COOKIE}=([^;]*)`));
+    return match ? decodeURIComponent(match[1]) : "";
+  }
+
+  function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+  }
+
+  async function sha256Hex(file) {
+    const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, "0")).join("");
+  }
+
+  async function api(url, options = {}) {
+    const resp = await fetch(url, {
+      credentials: "same-origin",
+      ...options,
+      headers: { "X-CSRFToken": csrfToken(), ...(options.headers || {}) },
+    });
+    const data = await resp.json().catch(() => ({}));
+    return { resp, data };
+  }
+
+  // Remember sessions by file identity so a reload (or a retry after going offline) resumes.
+  function resumeKey(target, file, sha) {
+    return `tc-upload:${target}:${file.name}:${file.size}:${sha}`;
+  }
+
+  async function openSession(widget, file, sha) {
+    const base = widget.dataset.uploadUrl;
+    const target = widget.dataset.tradeId ? `trade-${widget.dataset.tradeId}` : `day-${widget.dataset.date}`;
+    const key = resumeKey(target, file, sha);
+    const savedId = localStorage.getItem(key);
+    if (savedId) {
+      const { resp, data } = await api(`${base}${savedId}/`);
+      if (resp.ok) return { key, url: `${base}${savedId}/`, state: data };
+      localStorage.removeItem(key);
+    }
+
+    const body = { filename: file.name, size: file.size, sha256: sha, content_type: file.type };
+    if (widget.dataset.tradeId) body.trade_id = Number(widget.dataset.tradeId);
+    else body.date = widget.dataset.date;
+    const { resp, data } = await api(base, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    });
+    if (!resp.ok) throw new Error(data.error || `HTTP ${resp.status}`);
+    localStorage.setItem(key, data.id);
+    return { key, url: `${base}${data.id}/`, state: data };
+  }
+
+  async function sendChunks(session, file, report) {
+    let offset = session.state.offset;
+    const chunkSize = session.state.chunk_size;
+    let failures = 0;
+
+    while (offset < file.size) {
+      report(offset);
+      try {
+        const { resp, data } = await api(session.url, {
+          method: "PUT",
+          headers: { "Upload-Offset": String(offset), "Content-Type": "application/octet-stream" },
+          body: file.slice(offset, offset + chunkSize),
+        });
+        if (resp.ok || resp.status === 409) {
+          // On 409 the server says where it really is; carry on from there.
+          if (typeof data.offset !== "number") throw new Error(data.error || `HTTP ${resp.status}`);
+          offset = data.offset;
+          failures = 0;
+          continue;
+        }
+        throw new Error(data.error || `HTTP ${resp.status}`);
+      } catch (err) {
+        failures += 1;
+        if (failures > MAX_RETRIES) throw err;
+        await sleep(Math.min(30000, 500 * 2 ** failures));
+        // Ask the server what it has before resending.
+        const { resp, data } = await api(session.url).catch(() => ({ resp: { ok: false } }));
+        if (resp.ok) offset = data.offset;
+      }
+    }
+    report(offset);
+  }
+
+  async function uploadFile(widget, file, status) {
+    status.textContent = `${file.name}: hashing...`;
+    const sha = await sha256Hex(file);
+    const session = await openSession(widget, file, sha);
+    await sendChunks(session, file, offset => {
+      status.textContent = `${file.name}: ${Math.floor((offset / file.size) * 100)}%`;
+    });
+    const { resp, data } = await api(`${session.url}complete/`, { method: "POST" });
+    localStorage.removeItem(session.key);
+    if (!resp.ok) throw new Error(data.error || `HTTP ${resp.status}`);
+    return data;
+  }
+
+  function addThumbnail(widget, attachment) {
+    const list = widget.querySelector(".attachment-list");
+    const empty = list.querySelector(".attachment-empty");
+    if (empty) empty.remove();
+    const link = document.createElement("a");
+    link.href = attachment.url;
+    link.target = "_blank";
+    link.rel = "noopener";
+    const img = document.createElement("img");
+    img.src = attachment.url;
+    img.alt = attachment.name;
+    img.className = "rounded border";
+    img.style.height = "96px";
+    link.appendChild(img);
+    list.appendChild(link);
+  }
+
+  document.querySelectorAll(".upload-widget").forEach(widget => {
+    const input = widget.querySelector(".upload-input");
+    const status = widget.querySelector(".upload-status");
+    input.addEventListener("change", async () => {
+      for (const file of Array.from(input.files)) {
+        try {
+          addThumbnail(widget, await uploadFile(widget, file, status));
+          status.textContent = `${file.name}: uploaded`;
+        } catch (err) {
+          status.textContent = `${file.name}: ${err.message} (pick the file again to resume)`;
+        }
+      }
+      input.value = "";
+    });
+  });
+})();
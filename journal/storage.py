@@ -0,0 +1,156 @@
+import gzip
+import hashlib
+import os
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage, storages
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only .gz variants are written.
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed static files (staticfiles.json manifest) plus precompressed
+    .gz and .br siblings written at collectstatic time, for
+    journal.views.static_asset_view to pick from by Accept-Encoding.
+    """
+    compressible_extensions = (".css", ".js", ".json", ".map", ".svg", ".txt", ".webmanifest", ".xml", ".html")
+    min_compress_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(self.compressible_extensions) and self.exists(name):
+                self._write_compressed(name)
+
+    def _write_compressed(self, name: str) -> None:
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < self.min_compress_size:
+            return
+
+        variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=11)))
+
+        for suffix, compressed in variants:
+            if len(compressed) >= len(data):
+                continue
+            path = self.path(name + suffix)
+            with open(path, "wb") as out:
+                out.write(compressed)
+
+    def is_hashed_name(self, name: str) -> bool:
+        return name in self._hashed_names()
+
+    def _hashed_names(self) -> frozenset:
+        names = getattr(self, "_hashed_names_cache", None)
+        if names is None:
+            names = frozenset(self.hashed_files.values())
+            self._hashed_names_cache = names
+        return names
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each unique file once, at cas/<h[:2]>/<sha256><ext>.
+
+    The upload is hashed while it streams into a temporary file next to the
+    blobs, then atomically renamed into place (or dropped if that content is
+    already stored). The name passed in only contributes its extension, so
+    every reference to the same bytes shares one file. Blobs are never
+    deleted on save or row delete; `manage.py gc_step_images` removes the
+    unreferenced ones.
+    """
+    prefix = "cas"
+    temp_dir = ".cas-tmp"
+    chunk_size = 64 * 1024
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save; there is nothing to avoid clashing with.
+        return name
+
+    def _save(self, name, content):
+        os.makedirs(self.path(self.temp_dir), exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.path(self.temp_dir))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in content.chunks(self.chunk_size):
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            final_name = self.blob_name(digest.hexdigest(), name)
+            final_path = self.path(final_name)
+            if self._reuse(final_path):
+                os.remove(temp_path)
+                return final_name
+
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            if self.directory_permissions_mode is not None:
+                os.chmod(os.path.dirname(final_path), self.directory_permissions_mode)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, final_path)
+            return final_name
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def save_verified(self, path: str, sha256: str, original_name: str = "") -> str:
+        """
+        Move an already hashed local file (on the same filesystem) into the
+        store with one rename, instead of copying it through _save.
+        """
+        final_name = self.blob_name(sha256, original_name)
+        final_path = self.path(final_name)
+        if self._reuse(final_path):
+            os.remove(path)
+            return final_name
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        os.replace(path, final_path)
+        return final_name
+
+    def _reuse(self, final_path: str) -> bool:
+        """
+        True if the blob is already stored. Its mtime is refreshed, so
+        gc_step_images --min-age-hours treats a re-referenced blob as new.
+        """
+        try:
+            os.utime(final_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def blob_name(self, sha256: str, original_name: str = "") -> str:
+        ext = os.path.splitext(original_name)[1].lower()[:10]
+        return f"{self.prefix}/{sha256[:2]}/{sha256}{ext}"
+
+    def iter_blobs(self):
+        """
+        Yields (name, absolute path) for every stored blob.
+        """
+        root = self.path(self.prefix)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                yield os.path.relpath(path, self.location).replace(os.sep, "/"), path
+
+
+def step_image_storage():
+    return storages["step_images"]
+
+
+def attachment_storage():
+    return storages["attachments"]
@@ -0,0 +1,301 @@
+"""
+Database-backed background task queue.
+
+Tasks are rows in journal_task; `manage.py runworker` claims and runs them.
+No broker is needed: on PostgreSQL a worker claims with
+SELECT ... FOR UPDATE SKIP LOCKED, elsewhere (SQLite) with one atomic
+UPDATE ... WHERE id = (SELECT ... LIMIT 1) tagged with a unique claim token.
+Failures are retried with exponential backoff up to max_attempts.
+
+While a task runs, a heartbeat thread renews its claim every
+HEARTBEAT_INTERVAL. Workers requeue RUNNING tasks whose claim has not been
+renewed for CLAIM_LEASE (their worker died) every REQUEUE_INTERVAL, or
+mark them failed once they have used up max_attempts.
+"""
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from .analytics import concept_matrix
+from .archive import archive_completed_runs
+from .backups import create_backup
+from .bars import update_trade_excursions
+from .bundles import import_bundle, write_bundle
+from .models import Concept, Strategy, Task, TaskStatus
+from .montecarlo import SIMULATION_CACHE_TIMEOUT, simulate, simulation_cache_key, strategy_r_values
+from .reports import build_dirty_reports
+from .uploads import cleanup_stale_uploads
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 60 * 60
+# A RUNNING task whose claim has not been renewed this long is assumed dead and requeued.
+CLAIM_LEASE = timedelta(minutes=30)
+HEARTBEAT_INTERVAL = CLAIM_LEASE / 6
+REQUEUE_INTERVAL = timedelta(minutes=1)
+
+
+def task(name: str, max_attempts: int = 3):
+    """
+    Register a function as a background task. It is called with the task
+    payload as keyword arguments; its (JSON-serializable) return value is stored.
+    """
+    def decorator(func):
+        TASKS[name] = {"func": func, "max_attempts": max_attempts}
+        return func
+    return decorator
+
+
+def enqueue(name: str, payload: dict | None = None, user=None, delay: timedelta | None = None) -> Task:
+    if name not in TASKS:
+        raise KeyError(f"Unknown task {name!r}")
+    return Task.objects.create(
+        name=name,
+        payload=payload or {},
+        max_attempts=TASKS[name]["max_attempts"],
+        run_after=timezone.now() + (delay or timedelta(0)),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def enqueue_once(name: str, payload: dict | None = None, user=None) -> Task:
+    """
+    Enqueue unless the same task with the same payload is already waiting to run.
+    """
+    queued = Task.objects.filter(name=name, payload=payload or {}, status=TaskStatus.QUEUED).first()
+    return queued or enqueue(name, payload, user)
+
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS))
+
+
+def _ready():
+    return Task.objects.filter(status=TaskStatus.QUEUED, run_after__lte=timezone.now()).order_by("run_after", "id")
+
+
+def claim_next(worker_id: str) -> Task | None:
+    now = timezone.now()
+    # Unique per claim, so a worker can tell its claim from a later one of the same task.
+    token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+    if connection.vendor == "postgresql":
+        with transaction.atomic():
+            claimed = _ready().select_for_update(skip_locked=True).first()
+            if claimed is None:
+                return None
+            claimed.status = TaskStatus.RUNNING
+            claimed.claimed_by = token
+            claimed.claimed_at = now
+            claimed.attempts += 1
+            claimed.save(update_fields=["status", "claimed_by", "claimed_at", "attempts"])
+            return claimed
+
+    updated = Task.objects.filter(
+        pk=Subquery(_ready().values("pk")[:1]),
+        status=TaskStatus.QUEUED,
+    ).update(status=TaskStatus.RUNNING, claimed_by=token, claimed_at=now, attempts=F("attempts") + 1)
+    if not updated:
+        return None
+    return Task.objects.get(claimed_by=token, status=TaskStatus.RUNNING)
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Renews a running task's claim until stopped, so long tasks keep their lease.
+    """
+
+    def __init__(self, claimed: Task):
+        super().__init__(name=f"task-{claimed.pk}-heartbeat", daemon=True)
+        self.claimed = claimed
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(HEARTBEAT_INTERVAL.total_seconds()):
+                try:
+                    _own(self.claimed).update(claimed_at=timezone.now())
+                except DatabaseError:
+                    # Busy database (SQLite): try again on the next beat, well within the lease.
+                    logger.warning("Heartbeat for task #%s failed", self.claimed.pk, exc_info=True)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _own(claimed: Task):
+    # Only touch the row while this claim still holds it; a requeued task may be someone else's now.
+    return Task.objects.filter(pk=claimed.pk, status=TaskStatus.RUNNING, claimed_by=claimed.claimed_by)
+
+
+def run_task(claimed: Task) -> None:
+    entry = TASKS.get(claimed.name)
+    heartbeat = _Heartbeat(claimed)
+    heartbeat.start()
+    try:
+        if entry is None:
+            raise KeyError(f"Unknown task {claimed.name!r}")
+        result = entry["func"](**claimed.payload)
+    except Exception:
+        heartbeat.stop()
+        error = traceback.format_exc()
+        logger.warning("Task %s #%s failed (attempt %s)", claimed.name, claimed.id, claimed.attempts)
+        if entry is not None and claimed.attempts < claimed.max_attempts:
+            status, run_after, finished_at = TaskStatus.QUEUED, timezone.now() + backoff(claimed.attempts), None
+        else:
+            status, run_after, finished_at = TaskStatus.FAILED, claimed.run_after, timezone.now()
+        _own(claimed).update(status=status, run_after=run_after, finished_at=finished_at, error=error[-10000:])
+        return
+    heartbeat.stop()
+
+    _own(claimed).update(status=TaskStatus.DONE, result=result, error="", finished_at=timezone.now())
+
+
+def requeue_stale() -> int:
+    """
+    Requeue tasks whose worker stopped renewing the claim, or fail them once
+    they have used up max_attempts (a task that keeps killing its worker).
+    Returns the number of tasks touched.
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(status=TaskStatus.RUNNING, claimed_at__lt=now - CLAIM_LEASE)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=TaskStatus.FAILED, claimed_by="", finished_at=now, error="Worker lost: claim lease expired."
+    )
+    requeued = stale.filter(attempts__lt=F("max_attempts")).update(
+        status=TaskStatus.QUEUED, claimed_by="", run_after=now
+    )
+    return failed + requeued
+
+
+def work(worker_id: str, stop, poll_interval: float = 1.0, once: bool = False) -> int:
+    """
+    Claim and run tasks until stop (a threading/multiprocessing Event) is set.
+    With once=True, return as soon as the queue is empty. Returns tasks run.
+    """
+    ran = 0
+    next_requeue = 0.0
+    while not stop.is_set():
+        if time.monotonic() >= next_requeue:
+            requeue_stale()
+            next_requeue = time.monotonic() + REQUEUE_INTERVAL.total_seconds()
+        claimed = claim_next(worker_id)
+        if claimed is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_task(claimed)
+        ran += 1
+    return ran
+
+
+def task_status(task_obj: Task) -> dict:
+    return {
+        "id": task_obj.id,
+        "name": task_obj.name,
+        "status": task_obj.status,
+        "attempts": task_obj.attempts,
+        "max_attempts": task_obj.max_attempts,
+        "run_after": task_obj.run_after.isoformat(),
+        "finished_at": task_obj.finished_at.isoformat() if task_obj.finished_at else None,
+        "result": task_obj.result,
+        "error": task_obj.error.strip().splitlines()[-1] if task_obj.error else "",
+    }
+
+
+# Built-in tasks
+
+
+@task("bars.compute_excursions")
+def compute_excursions_task(symbol=None, horizon_minutes=390, only_missing=False, trade_ids=None):
+    return update_trade_excursions(
+        symbol=symbol, horizon_minutes=horizon_minutes, only_missing=only_missing, trade_ids=trade_ids
+    )
+
+
+@task("montecarlo.simulate")
+def simulate_task(strategy_id, user_id=None, paths=20000, trades=100, seed=0, ruin_r=20.0):
+    """
+    Warm the cache entry strategy_simulation_view reads for these parameters.
+    """
+    params = {"paths": int(paths), "trades": int(trades), "seed": int(seed), "ruin_r": float(ruin_r)}
+    r_values = strategy_r_values(strategy_id, user_id)
+    result = simulate(
+        r_values,
+        n_paths=params["paths"],
+        n_trades=params["trades"],
+        seed=params["seed"],
+        ruin_r=params["ruin_r"],
+        workers=settings.MONTE_CARLO_WORKERS,
+    )
+    cache.set(simulation_cache_key(r_values, **params), result, SIMULATION_CACHE_TIMEOUT)
+    return {"risk_of_ruin": result["risk_of_ruin"], "drawdown_percentiles": result["drawdown_percentiles"]}
+
+
+@task("analytics.concept_matrix")
+def concept_matrix_task(user_id):
+    return {"concepts": len(concept_matrix(user_id)["concepts"])}
+
+
+@task("runs.archive")
+def archive_runs_task(older_than_days=30, limit=None):
+    return {"archived": archive_completed_runs(older_than_days=older_than_days, limit=limit)}
+
+
+@task("uploads.cleanup")
+def cleanup_uploads_task():
+    return {"aborted": cleanup_stale_uploads()}
+
+
+@task("reports.build")
+def build_reports_task(limit=None):
+    return {"built": build_dirty_reports(limit=limit)}
+
+
+@task("backups.create", max_attempts=1)
+def backup_task(include_media=True):
+    manifest = create_backup(include_media=include_media)
+    return {"name": manifest["name"], **manifest["stats"]}
+
+
+@task("bundles.export")
+def export_bundle_task(output, strategy_ids=None, concepts=False):
+    """
+    Write a strategy bundle to a path on the worker's filesystem (what
+    `manage.py export_strategy` does). All strategies unless ids are given.
+    """
+    strategies = Strategy.objects.all()
+    if strategy_ids is not None:
+        strategies = strategies.filter(pk__in=strategy_ids)
+    # A retried or failed export never leaves a half-written bundle at output.
+    partial = f"{output}.partial"
+    with open(partial, "wb") as fileobj:
+        manifest = write_bundle(fileobj, strategies, Concept.objects.order_by("name") if concepts else ())
+    os.replace(partial, output)
+    return {"output": output, "strategies": len(manifest["strategies"]), "concepts": len(manifest["concepts"])}
+
+
+@task("bundles.import")
+def import_bundle_task(path, prune=False):
+    """
+    Import a bundle from a path on the worker's filesystem (what
+    `manage.py import_strategy` does). Imports are upserts, so a retry is safe.
+    """
+    with open(path, "rb") as fileobj:
+        return import_bundle(fileobj, prune=prune)
@@ -1,3 +1,1664 @@
-from django.test import TestCase
+import contextvars
+import hashlib
+import io
+import json
+import math
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import Template, engines
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from PIL import Image
+
+from .admin import EstimatedCountPaginator
+from .analytics import build_concept_matrix
+from .archive import (
+    archive_run,
+    archived_checked_step_ids,
+    load_checks,
+    pack_checks,
+    restore_run,
+    snapshot_step_ids,
+    unpack_checks,
+)
+from .backups import BackupError, create_backup, restore_backup, verify_backup
+from .bars import BarStore, compute_excursions
+from .bitmaps import StepBitmapIndex
+from .bundles import BundleError, build_manifest, import_bundle, write_bundle
+from .cache_versions import CONCEPTS, STRATEGIES, model_version
+from .checklists import publish_version
+from .coach import _max_drawdowns, trader_stats
+from .days import save_day
+from .events import replay_run, time_to_entry
+from .killzones import backfill_buckets, market_buckets
+from .loadtest import (
+    ClientTransport,
+    Results,
+    Scenario,
+    Trader,
+    check_database,
+    is_scratch_database,
+    load_fixtures,
+    prepare_users,
+    run_load,
+)
+from .management.commands.profile_startup import time_requests
+from .montecarlo import _simulate_batch, simulate
+from .reports import build_dirty_reports, dirty_reports
+from .routers import ANALYTICS_DB, AnalyticsRouter, analytics_reads
+from .tasks import CLAIM_LEASE, claim_next, enqueue, requeue_stale, run_task, task
+from .views import static_asset_view
+from .warmup import prime_models, prime_urls, warmup
+from .models import (
+    Attachment,
+    Concept,
+    DayJournal,
+    JournalSlotItem,
+    Killzone,
+    MarketSession,
+    ReportSnapshot,
+    RunEvent,
+    RunEventAction,
+    Section,
+    SessionRun,
+    Step,
+    StepCheck,
+    StepImage,
+    Strategy,
+    StrategyVersion,
+    Task,
+    TaskStatus,
+    Trade,
+    UploadSession,
+)
+
+
+# The manifest storage needs collectstatic output, which tests do not have.
+plain_static_files = override_settings(
+    STORAGES={**settings.STORAGES, "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+)
+
+
+def assert_constant_queries(test, add_rows, count_queries) -> None:
+    """
+    Fail unless count_queries() runs as many queries after add_rows(8) as after add_rows(2).
+    """
+    add_rows(2)
+    few = count_queries()
+    add_rows(8)
+    test.assertEqual(count_queries(), few)
+
+
+@plain_static_files
+class AdminChangelistQueryTests(TestCase):
+    """
+    Changelist query counts must not grow with the number of rows shown.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.strategy = Strategy.objects.create(name="Silver Bullet")
+        cls.section = Section.objects.create(strategy=cls.strategy, name="Bias")
+        cls.concept = Concept.objects.create(name="FVG")
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+        self.rows = 0
+
+    def add_rows(self, count: int) -> None:
+        User = get_user_model()
+        for _ in range(count):
+            i = self.rows
+            self.rows += 1
+            user = User.objects.create_user(f"trader{i}")
+            step = Step.objects.create(section=self.section, title=f"Step {i}")
+            run = SessionRun.objects.create(
+                user=user, strategy=self.strategy, started_at=timezone.now() - timedelta(days=i)
+            )
+            StepCheck.objects.create(session_run=run, step=step, checked=True, checked_at=timezone.now())
+            Trade.objects.create(
+                session_run=run,
+                direction="LONG",
+                entry_time=timezone.now(),
+                stop=Decimal("1"),
+                target=Decimal("2"),
+                result_r=Decimal("1.5"),
+            )
+            journal = DayJournal.objects.create(user=user, date=timezone.localdate() - timedelta(days=i))
+            JournalSlotItem.objects.create(journal=journal, timeframe="1H", concept=self.concept)
+            Task.objects.create(name="bars.compute_excursions")
+
+    def changelist_queries(self, model_name: str) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(f"admin:journal_{model_name}_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assert_constant_queries(self, model_name: str) -> None:
+        assert_constant_queries(self, self.add_rows, lambda: self.changelist_queries(model_name))
+
+    def test_dayjournal_changelist(self):
+        self.assert_constant_queries("dayjournal")
+
+    def test_section_changelist(self):
+        self.assert_constant_queries("section")
+
+    def test_step_changelist(self):
+        self.assert_constant_queries("step")
+
+    def test_sessionrun_changelist(self):
+        self.assert_constant_queries("sessionrun")
+
+    def test_stepcheck_changelist(self):
+        self.assert_constant_queries("stepcheck")
+
+    def test_stepcheck_changelist_lists_checks_of_deleted_steps(self):
+        self.add_rows(1)
+        Step.objects.all().delete()
+        response = self.client.get(reverse("admin:journal_stepcheck_changelist"))
+        self.assertEqual(list(response.context["cl"].result_list), list(StepCheck.objects.all()))
+
+    def test_trade_changelist(self):
+        self.assert_constant_queries("trade")
+
+    def test_task_changelist(self):
+        self.assert_constant_queries("task")
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_small_or_filtered_lists_are_counted_exactly(self):
+        for i in range(3):
+            Concept.objects.create(name=f"Concept {i}")
+        self.assertEqual(EstimatedCountPaginator(Concept.objects.order_by("pk"), 2).count, 3)
+        self.assertEqual(EstimatedCountPaginator(Concept.objects.filter(name="Concept 1").order_by("pk"), 2).count, 1)
+
+    def test_large_unfiltered_list_uses_estimate(self):
+        Concept.objects.create(pk=50_000, name="Last")
+        paginator = EstimatedCountPaginator(Concept.objects.order_by("pk"), 100)
+        self.assertEqual(paginator.count, 50_000)
+
+
+@plain_static_files
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+)
+class AuthQueryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("trader", password="pw")
+        self.client.login(username="trader", password="pw")
+
+    def auth_queries(self) -> list[str]:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 200)
+        tables = ("django_session", get_user_model()._meta.db_table)
+        return [q["sql"] for q in ctx.captured_queries if any(table in q["sql"] for table in tables)]
+
+    def test_authenticated_views_skip_session_and_user_queries(self):
+        self.auth_queries()
+        self.assertEqual(self.auth_queries(), [])
+
+    def test_user_save_invalidates_cached_user(self):
+        self.auth_queries()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 302)
+
+
+@plain_static_files
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+class CoachViewTests(TestCase):
+    """
+    The coach view aggregates across users in a fixed number of queries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = get_user_model().objects.create_user("coach", is_staff=True)
+        cls.strategy = Strategy.objects.create(name="Silver Bullet")
+
+    def setUp(self):
+        self.client.force_login(self.coach)
+        # Warm the per-process user cache so only the view's own queries are counted.
+        self.client.get(reverse("dashboard"))
+        self.traders = 0
+
+    def add_trader(self, results, checked=3, steps=4):
+        user = get_user_model().objects.create_user(f"trader{self.traders}")
+        self.traders += 1
+        start = timezone.now() - timedelta(days=len(results) + 1)
+        for i, result_r in enumerate(results):
+            run = SessionRun.objects.create(
+                user=user,
+                strategy=self.strategy,
+                started_at=start + timedelta(days=i),
+                checked_count=checked,
+                step_count=steps,
+            )
+            Trade.objects.create(
+                session_run=run,
+                direction="LONG",
+                entry_time=run.started_at,
+                stop=Decimal("1"),
+                target=Decimal("2"),
+                result_r=Decimal(result_r),
+            )
+        return user
+
+    def coach_queries(self) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("coach"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_traders(self):
+        def add_traders(count):
+            for _ in range(count):
+                self.add_trader(["2", "-1", "0.5"])
+
+        assert_constant_queries(self, add_traders, self.coach_queries)
+
+    def test_stats(self):
+        user = self.add_trader(["2", "-1", "-1", "3"], checked=3, steps=4)
+        (row,) = trader_stats(30)
+        self.assertEqual(row["user_id"], user.id)
+        self.assertEqual(row["compliance"], 75)
+        self.assertEqual(row["trades"], 4)
+        self.assertEqual(row["expectancy"], Decimal("0.75"))
+        self.assertEqual(row["max_drawdown"], Decimal("2"))
+
+    def test_max_drawdown_is_computed_in_the_database(self):
+        cases = {
+            "from a peak": (["1", "2", "-1.5", "0.25", "-2", "3"], Decimal("3.25")),
+            "below the start": (["-0.5", "-1", "0.75", "-1"], Decimal("1.75")),
+            "never down": (["1", "0.5"], Decimal("0")),
+        }
+        users = {name: self.add_trader(results) for name, (results, _) in cases.items()}
+        with self.assertNumQueries(1):
+            drawdowns = _max_drawdowns(Trade.objects.all())
+        for name, (_, expected) in cases.items():
+            with self.subTest(name):
+                self.assertEqual(drawdowns[users[name].id], expected)
+        # Window filters reach the wrapped query: only the last two trades of "from a peak".
+        since = timezone.now() - timedelta(days=4)
+        recent = _max_drawdowns(Trade.objects.filter(session_run__started_at__gte=since))
+        self.assertEqual(recent[users["from a peak"].id], Decimal("2"))
+
+    def test_staff_only(self):
+        self.client.force_login(get_user_model().objects.create_user("someone"))
+        self.assertEqual(self.client.get(reverse("coach")).status_code, 302)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class MarketBucketTests(TestCase):
+    def test_new_york_time_follows_daylight_saving(self):
+        # 09:45 in New York is 13:45 UTC in July and 14:45 UTC in January.
+        for moment in (utc(2026, 7, 15, 13, 45), utc(2026, 1, 15, 14, 45)):
+            buckets = market_buckets(moment)
+            self.assertEqual(buckets["market_session"], MarketSession.NY)
+            self.assertEqual(buckets["killzone"], Killzone.NY_AM)
+            self.assertEqual(buckets["session_minute"], 105)
+
+    def test_trading_date_rolls_at_six_pm(self):
+        self.assertEqual(market_buckets(utc(2026, 1, 15, 22, 59))["trading_date"], date(2026, 1, 15))
+        evening = market_buckets(utc(2026, 1, 15, 23, 30))
+        self.assertEqual(evening["trading_date"], date(2026, 1, 16))
+        self.assertEqual(evening["market_session"], MarketSession.ASIA)
+        self.assertEqual(evening["session_minute"], 30)
+
+    def test_filled_on_save_and_backfilled(self):
+        user = get_user_model().objects.create_user("trader", password="pw")
+        run = SessionRun.objects.create(
+            user=user, strategy=Strategy.objects.create(name="Silver Bullet"), started_at=utc(2026, 3, 9, 6, 15)
+        )
+        trade = Trade.objects.create(
+            session_run=run, direction="LONG", entry_time=utc(2026, 3, 9, 18, 0), stop=1, target=2, result_r=1
+        )
+        run.refresh_from_db()
+        self.assertEqual((run.market_session, run.killzone), (MarketSession.LONDON, Killzone.LONDON_OPEN))
+        self.assertEqual(Trade.objects.get(pk=trade.pk).killzone, Killzone.NY_PM)
+
+        Trade.objects.update(trading_date=None, market_session="", killzone="", session_minute=None)
+        self.assertEqual(backfill_buckets(), (0, 1))
+        self.assertEqual(Trade.objects.get(pk=trade.pk).killzone, Killzone.NY_PM)
+
+
+@mock.patch("journal.routers.analytics_configured", return_value=True)
+class AnalyticsRouterTests(SimpleTestCase):
+    # Each check runs in an empty context, clear of writes noted by earlier tests.
+    def routes(self, models, write=None):
+        def run():
+            router = AnalyticsRouter()
+            if write is not None:
+                self.assertEqual(router.db_for_write(write), "default")
+            outside = router.db_for_read(models[0])
+            with analytics_reads():
+                return outside, [router.db_for_read(model) for model in models]
+
+        return contextvars.Context().run(run)
+
+    def test_only_analytics_reads_leave_the_primary(self, configured):
+        self.assertEqual(self.routes([Trade]), (None, [ANALYTICS_DB]))
+
+    def test_recent_write_pins_that_model(self, configured):
+        self.assertEqual(self.routes([JournalSlotItem, StepCheck], write=JournalSlotItem), (None, [None, ANALYTICS_DB]))
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+class RunArchiveTests(TestCase):
+    """
+    Archived checks read back exactly as the StepCheck rows they replaced.
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_user("trader")
+        strategy = Strategy.objects.create(name="Silver Bullet")
+        section = Section.objects.create(strategy=strategy, name="Bias")
+        self.steps = [Step.objects.create(section=section, title=f"Step {i}", order=i) for i in range(10)]
+        self.run = SessionRun.objects.create(user=user, strategy=strategy, completed=True)
+        checked_at = utc(2026, 1, 15, 14, 45, 30)
+        StepCheck.objects.create(session_run=self.run, step=self.steps[0], checked=True, checked_at=checked_at)
+        StepCheck.objects.create(session_run=self.run, step=self.steps[3], notes="late entry")
+        StepCheck.objects.create(
+            session_run=self.run, step=self.steps[9], checked=True, checked_at=checked_at, notes="swept highs"
+        )
+
+    def rows(self, checks):
+        return sorted((c.step_id, c.checked, c.notes, c.checked_at) for c in checks)
+
+    def test_pack_unpack_round_trip(self):
+        step_ids = snapshot_step_ids(self.run)
+        checks = list(StepCheck.objects.filter(session_run=self.run))
+        # A check for a step outside the snapshot is kept too.
+        checks.append(StepCheck(session_run=self.run, step_id=999, checked=True, notes="", checked_at=None))
+        blob = pack_checks(step_ids, checks)
+        self.assertEqual(self.rows(unpack_checks(self.run, step_ids, blob)), self.rows(checks))
+        self.assertEqual(
+            sorted(archived_checked_step_ids(blob, step_ids)), [self.steps[0].id, self.steps[9].id, 999]
+        )
+
+    def test_archive_and_restore_run(self):
+        before = self.rows(StepCheck.objects.filter(session_run=self.run))
+        self.assertTrue(archive_run(self.run))
+        self.assertFalse(archive_run(self.run))
+        self.assertFalse(StepCheck.objects.filter(session_run=self.run).exists())
+        self.assertEqual(self.rows(load_checks(SessionRun.objects.get(pk=self.run.pk))), before)
+
+        self.assertTrue(restore_run(self.run))
+        run = SessionRun.objects.get(pk=self.run.pk)
+        self.assertIsNone(run.archived_checks)
+        self.assertEqual(self.rows(load_checks(run)), before)
+
+
+@plain_static_files
+@override_settings(UPLOAD_CHUNK_SIZE=4)
+class ChunkedUploadTests(TestCase):
+    """
+    Chunks are accepted only at the current offset, and completing checks the
+    declared sha256 and the image type, once.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.user = get_user_model().objects.create_user("trader")
+        self.client.force_login(self.user)
+        png = io.BytesIO()
+        Image.new("RGB", (2, 2), "red").save(png, "PNG")
+        self.png = png.getvalue()
+
+    def start(self, data: bytes, sha256: str | None = None, content_type: str = "image/png") -> str:
+        payload = {
+            "filename": "chart.png",
+            "size": len(data),
+            "sha256": sha256 or hashlib.sha256(data).hexdigest(),
+            "content_type": content_type,
+            "date": "2026-01-15",
+        }
+        response = self.client.post(reverse("uploads_api"), payload, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def put(self, upload_id: str, offset: int, chunk: bytes):
+        return self.client.put(
+            reverse("upload_detail_api", args=[upload_id]),
+            chunk,
+            content_type="application/octet-stream",
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    def put_from(self, upload_id: str, offset: int, data: bytes) -> None:
+        for start in range(offset, len(data), 4):
+            self.assertEqual(self.put(upload_id, start, data[start : start + 4]).status_code, 200)
+
+    def complete(self, upload_id: str):
+        return self.client.post(reverse("upload_complete_api", args=[upload_id]))
+
+    def test_chunks_must_arrive_at_the_current_offset(self):
+        data = self.png
+        upload_id = self.start(data, content_type="image/jpeg")
+        self.assertEqual(self.put(upload_id, 0, data[:4]).json()["offset"], 4)
+
+        replay = self.put(upload_id, 0, data[:4])
+        self.assertEqual((replay.status_code, replay.json()["offset"]), (409, 4))
+        self.assertEqual(self.complete(upload_id).status_code, 409)
+
+        self.put_from(upload_id, 4, data)
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 201)
+        attachment = Attachment.objects.get(pk=response.json()["id"])
+        self.assertEqual(attachment.journal.date, date(2026, 1, 15))
+        # The type read from the bytes, not the one declared.
+        self.assertEqual(attachment.content_type, "image/png")
+        with attachment.file.open("rb") as stored:
+            self.assertEqual(stored.read(), data)
+
+    def test_second_completion_gets_the_same_attachment(self):
+        upload_id = self.start(self.png)
+        self.put_from(upload_id, 0, self.png)
+        first = self.complete(upload_id).json()
+        self.assertEqual(self.complete(upload_id).json(), first)
+        self.assertEqual(Attachment.objects.count(), 1)
+
+    @mock.patch("journal.uploads.COMPLETE_WAIT_SECONDS", 0)
+    def test_completion_in_progress_elsewhere_is_not_repeated(self):
+        upload_id = self.start(self.png)
+        self.put_from(upload_id, 0, self.png)
+        UploadSession.objects.filter(pk=upload_id).update(writing_since=timezone.now())
+        self.assertEqual(self.complete(upload_id).status_code, 409)
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_checksum_mismatch_restarts_the_upload(self):
+        upload_id = self.start(b"abcd", sha256="0" * 64)
+        self.put(upload_id, 0, b"abcd")
+        response = self.complete(upload_id)
+        self.assertEqual((response.status_code, response.json()["offset"]), (422, 0))
+        self.assertFalse(Attachment.objects.exists())
+        self.assertEqual(self.put(upload_id, 0, b"abcd").json()["offset"], 4)
+
+    def test_bytes_that_are_not_an_image_are_rejected(self):
+        upload_id = self.start(b"<svg/>")
+        self.put_from(upload_id, 0, b"<svg/>")
+        self.assertEqual(self.complete(upload_id).status_code, 415)
+        self.assertFalse(Attachment.objects.exists())
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_invalid_trade_id_is_rejected(self):
+        payload = {"filename": "x.png", "size": 4, "sha256": "0" * 64, "content_type": "image/png", "trade_id": "12x"}
+        response = self.client.post(reverse("uploads_api"), payload, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class BackupRoundTripTests(SimpleTestCase):
+    """
+    A backup verifies, restores byte-for-byte, and only stores what changed.
+    """
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.enterContext(override_settings(BACKUP_ROOT=self.root / "backups", MEDIA_ROOT=self.root / "media"))
+        self.database = self.root / "live.sqlite3"
+        with closing(sqlite3.connect(self.database)) as db, db:
+            db.execute("CREATE TABLE trade (id INTEGER PRIMARY KEY, note TEXT)")
+            db.executemany("INSERT INTO trade (note) VALUES (?)", [(f"trade {i}" * 20,) for i in range(2000)])
+        (self.root / "media" / "cas").mkdir(parents=True)
+        (self.root / "media" / "cas" / "chart.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 40)
+
+    def backup(self) -> dict:
+        # Only the copy reads the file; restores go to explicit paths. Small
+        # chunks, so an edit leaves most of them unchanged.
+        with mock.patch.dict(connection.settings_dict, {"NAME": str(self.database)}), mock.patch(
+            "journal.backups.PAGES_PER_CHUNK", 4
+        ):
+            return create_backup(keep=5)
+
+    def test_verify_and_restore(self):
+        manifest = self.backup()
+        self.assertEqual(verify_backup(manifest["name"])["media_files"], 1)
+
+        target = self.root / "restored" / "db.sqlite3"
+        target.parent.mkdir()
+        # A WAL left by the old database must not be replayed into the restored one.
+        Path(f"{target}-wal").write_bytes(b"stale")
+        restore_backup(manifest["name"], database_path=target, media_root=self.root / "restored-media")
+        self.assertFalse(Path(f"{target}-wal").exists())
+        with closing(sqlite3.connect(target)) as db:
+            self.assertEqual(db.execute("SELECT COUNT(*), SUM(LENGTH(note)) FROM trade").fetchone(), (2000, 377800))
+        restored_chart = self.root / "restored-media" / "cas" / "chart.png"
+        self.assertEqual(restored_chart.read_bytes(), (self.root / "media" / "cas" / "chart.png").read_bytes())
+        self.assertEqual(list((self.root / "restored-media").rglob("*.restore")), [])
+
+    def test_unchanged_data_is_not_stored_again(self):
+        first = self.backup()
+        with closing(sqlite3.connect(self.database)) as db, db:
+            db.execute("UPDATE trade SET note = 'edited' WHERE id = 1")
+        second = self.backup()
+        self.assertEqual(second["stats"]["media_unchanged"], 1)
+        self.assertGreater(second["stats"]["reused"], 0)
+        self.assertLess(second["stats"]["written"], len(first["database"]["chunks"]))
+
+    def test_corrupt_chunk_fails_verification(self):
+        manifest = self.backup()
+        chunk = next((self.root / "backups" / "chunks").glob("*/*.z"))
+        chunk.write_bytes(b"garbage")
+        with self.assertRaises(BackupError):
+            verify_backup(manifest["name"])
+
+
+@task("tests.echo")
+def echo_task(value):
+    return {"value": value}
+
+
+@task("tests.fail", max_attempts=2)
+def failing_task():
+    raise RuntimeError("boom")
+
+
+class TaskQueueTests(TestCase):
+    """
+    Claims are exclusive, failures back off and stale claims are requeued up to max_attempts.
+    """
+
+    def test_claim_is_exclusive_and_result_is_stored(self):
+        queued = enqueue("tests.echo", {"value": 7})
+        claimed = claim_next("worker-1")
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (queued.pk, TaskStatus.RUNNING, 1))
+        self.assertIsNone(claim_next("worker-2"))
+
+        run_task(claimed)
+        done = Task.objects.get(pk=queued.pk)
+        self.assertEqual((done.status, done.result), (TaskStatus.DONE, {"value": 7}))
+
+    def test_failure_backs_off_then_fails(self):
+        queued = enqueue("tests.fail")
+        with self.assertLogs("journal.tasks", "WARNING"):
+            run_task(claim_next("worker-1"))
+        retry = Task.objects.get(pk=queued.pk)
+        self.assertEqual(retry.status, TaskStatus.QUEUED)
+        self.assertGreater(retry.run_after, timezone.now())
+        self.assertIsNone(claim_next("worker-1"))
+
+        Task.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        with self.assertLogs("journal.tasks", "WARNING"):
+            run_task(claim_next("worker-1"))
+        failed = Task.objects.get(pk=queued.pk)
+        self.assertEqual((failed.status, failed.attempts), (TaskStatus.FAILED, 2))
+        self.assertIn("RuntimeError: boom", failed.error)
+
+    def test_stale_claims_are_requeued_until_max_attempts(self):
+        retried = enqueue("tests.fail")
+        exhausted = enqueue("tests.fail")
+        expired = timezone.now() - CLAIM_LEASE - timedelta(minutes=1)
+        Task.objects.filter(pk=retried.pk).update(status=TaskStatus.RUNNING, attempts=1, claimed_at=expired)
+        Task.objects.filter(pk=exhausted.pk).update(status=TaskStatus.RUNNING, attempts=2, claimed_at=expired)
+
+        self.assertEqual(requeue_stale(), 2)
+        self.assertEqual(Task.objects.get(pk=retried.pk).status, TaskStatus.QUEUED)
+        self.assertEqual(Task.objects.get(pk=exhausted.pk).status, TaskStatus.FAILED)
+
+    def test_lost_claim_does_not_overwrite_the_new_one(self):
+        queued = enqueue("tests.echo", {"value": 1})
+        lost = claim_next("worker-1")
+        Task.objects.filter(pk=queued.pk).update(claimed_at=timezone.now() - CLAIM_LEASE - timedelta(minutes=1))
+        requeue_stale()
+        current = claim_next("worker-2")
+
+        run_task(lost)
+        task_row = Task.objects.get(pk=queued.pk)
+        self.assertEqual((task_row.status, task_row.claimed_by), (TaskStatus.RUNNING, current.claimed_by))
+
+
+class SaveDayTests(TestCase):
+    """
+    A day save validates the form and slots first and writes nothing when either is rejected.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("trader")
+        self.fvg = Concept.objects.create(name="FVG")
+        self.day = date(2026, 1, 15)
+
+    def assert_rejected(self, payload, field):
+        journal, errors = save_day(self.user, self.day, payload)
+        self.assertIsNone(journal)
+        self.assertIn(field, errors)
+        self.assertFalse(DayJournal.objects.exists())
+        self.assertFalse(JournalSlotItem.objects.exists())
+
+    def test_invalid_payloads_write_nothing(self):
+        inactive = Concept.objects.create(name="Old", is_active=False)
+        self.assert_rejected({"slots": {"1H": [[inactive.id, ""]]}}, "slots")
+        self.assert_rejected({"slots": {"1H": [[self.fvg.id, 5]]}}, "slots")
+        self.assert_rejected({"slots": {"1H": [["fvg", ""]]}}, "slots")
+        self.assert_rejected({"form": ["not", "a", "dict"]}, "form")
+        self.assert_rejected({"form": {"symbol": "X" * 21}, "slots": {"1H": [[self.fvg.id, ""]]}}, "symbol")
+
+    def test_save_writes_form_and_replaces_slots(self):
+        journal, errors = save_day(
+            self.user,
+            self.day,
+            {"form": {"symbol": "NQ"}, "slots": {"1H": [[self.fvg.id, "  swept"]], "1W": [[1, ""]]}},
+        )
+        self.assertEqual(errors, {})
+        self.assertEqual(journal.symbol, "NQ")
+        self.assertEqual(list(journal.slot_items.values_list("timeframe", "note")), [("1H", "  swept")])
+
+        journal, errors = save_day(self.user, self.day, {"slots": {"15M": [{"concept_id": self.fvg.id}]}})
+        self.assertEqual(DayJournal.objects.get().symbol, "NQ")
+        self.assertEqual(list(journal.slot_items.values_list("timeframe", "note")), [("15M", "")])
+
+
+class ExcursionTests(SimpleTestCase):
+    def setUp(self):
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        self.open = int(utc(2026, 1, 15, 14, 30).timestamp())
+        ts = [self.open + minute * 60 for minute in range(4)]
+        # The 09:32 bar reaches both the 99 stop and the 102 target.
+        BarStore(tempdir).write(
+            "NQ",
+            ts,
+            [100.0, 100.2, 100.8, 100.0],
+            [100.5, 101.0, 102.5, 103.0],
+            [99.5, 99.8, 98.5, 100.0],
+            [100.2, 100.8, 100.0, 103.0],
+        )
+        self.bars = BarStore(tempdir).load("NQ")
+
+    def excursions(self, entry_ts):
+        return compute_excursions(self.bars, [entry_ts], [1], [99.0], [102.0])
+
+    def test_mid_minute_entry_uses_the_bar_it_falls_in(self):
+        result = self.excursions(self.open + 40)
+        self.assertAlmostEqual(result["mfe_r"][0], 2.5)
+        self.assertAlmostEqual(result["mae_r"][0], 1.5)
+        self.assertEqual(result["seconds_to_stop"][0], 80)
+
+    def test_stop_wins_a_bar_touching_both_levels(self):
+        result = self.excursions(self.open)
+        self.assertEqual(result["verified_r"][0], -1.0)
+        self.assertEqual(result["seconds_to_stop"][0], result["seconds_to_target"][0])
+
+    def test_entry_without_a_bar_has_no_excursions(self):
+        result = self.excursions(self.open + 10 * 60 + 5)
+        self.assertTrue(all(math.isnan(result[key][0]) for key in ("mfe_r", "mae_r", "verified_r")))
+        self.assertEqual(result["seconds_to_stop"][0], -1)
+        self.assertEqual(result["seconds_to_target"][0], -1)
+
+
+@plain_static_files
+class LibraryCacheTests(TestCase):
+    """
+    Library pages are served from fragments keyed on model version counters.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user("trader"))
+        self.step = Step.objects.create(
+            section=Section.objects.create(strategy=Strategy.objects.create(name="Silver Bullet"), name="Bias"),
+            title="Daily bias",
+        )
+
+    def test_fragments_are_reused_until_a_save_bumps_the_version(self):
+        self.assertContains(self.client.get(reverse("strategies")), "Daily bias")
+        # A queryset update skips the signals, so the cached fragment is still served.
+        Step.objects.filter(pk=self.step.pk).update(title="Weekly bias")
+        self.assertContains(self.client.get(reverse("strategies")), "Daily bias")
+
+        self.step.title = "Weekly bias"
+        self.step.save()
+        self.assertContains(self.client.get(reverse("strategies")), "Weekly bias")
+
+    def test_concept_list_follows_concept_saves(self):
+        concept = Concept.objects.create(name="FVG")
+        self.assertContains(self.client.get(reverse("concepts")), "FVG")
+        concept.name = "iFVG"
+        concept.save()
+        self.assertContains(self.client.get(reverse("concepts")), "iFVG")
+
+    def test_matching_etag_is_not_modified(self):
+        # The first response sets the CSRF cookie, which is part of the ETag.
+        self.client.get(reverse("concepts"))
+        etag = self.client.get(reverse("concepts"))["ETag"]
+        self.assertEqual(self.client.get(reverse("concepts"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Concept.objects.create(name="FVG")
+        response = self.client.get(reverse("concepts"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@plain_static_files
+class StrategySnapshotTests(TestCase):
+    """
+    Runs render from the snapshot they pinned, whatever happens to the live checklist.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("trader")
+        self.client.force_login(self.user)
+        self.strategy = Strategy.objects.create(name="Silver Bullet")
+        section = Section.objects.create(strategy=self.strategy, name="Bias")
+        self.sweep = Step.objects.create(section=section, title="Liquidity sweep", order=1)
+        self.fvg = Step.objects.create(section=section, title="FVG", order=2)
+
+    def start_run(self) -> SessionRun:
+        self.client.post(reverse("start_run"), {"strategy": self.strategy.pk, "symbol": "NQ"})
+        return SessionRun.objects.latest("id")
+
+    def test_old_run_keeps_its_checklist(self):
+        run = self.start_run()
+        self.client.post(reverse("run_detail", args=[run.pk]), {f"step_{self.fvg.pk}_checked": "on"})
+
+        self.sweep.title = "Buy-side sweep"
+        self.sweep.save()
+        self.fvg.delete()
+        Step.objects.create(section=self.sweep.section, title="Displacement")
+
+        response = self.client.get(reverse("run_detail", args=[run.pk]))
+        self.assertContains(response, "Liquidity sweep")
+        self.assertContains(response, "FVG")
+        self.assertNotContains(response, "Displacement")
+        # The check of the deleted step is still there and still counted.
+        self.assertEqual((response.context["checked_steps"], response.context["total_steps"]), (1, 2))
+        self.assertTrue(StepCheck.objects.get(session_run=run).checked)
+
+        response = self.client.get(reverse("run_detail", args=[self.start_run().pk]))
+        self.assertContains(response, "Buy-side sweep")
+        self.assertContains(response, "Displacement")
+        self.assertNotContains(response, "FVG")
+
+    def test_each_checklist_is_published_once(self):
+        first = publish_version(self.strategy)
+        cache.clear()
+        self.assertEqual(publish_version(self.strategy), first)
+
+        self.fvg.title = "iFVG"
+        self.fvg.save()
+        self.strategy.refresh_from_db()
+        second = publish_version(self.strategy)
+        self.assertNotEqual(second, first)
+
+        self.fvg.title = "FVG"
+        self.fvg.save()
+        self.strategy.refresh_from_db()
+        self.assertEqual(publish_version(self.strategy), first)
+        self.assertEqual(sorted(StrategyVersion.objects.values_list("number", flat=True)), [1, 2])
+
+    def test_stale_instance_does_not_roll_back_the_version(self):
+        stale = Strategy.objects.get(pk=self.strategy.pk)
+        Step.objects.create(section=self.sweep.section, title="Displacement")
+        stale.description = "Edited in another admin tab"
+        stale.save()
+        self.strategy.refresh_from_db()
+        self.assertEqual(self.strategy.description, "Edited in another admin tab")
+        self.assertGreater(self.strategy.version, stale.version)
+
+
+@plain_static_files
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+class SparseChecklistTests(TestCase):
+    """
+    Starting a run writes only the run; StepCheck rows appear when a step is first touched.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user("trader"))
+        self.strategy = Strategy.objects.create(name="Silver Bullet")
+        section = Section.objects.create(strategy=self.strategy, name="Bias")
+        self.steps = [Step.objects.create(section=section, title=f"Step {i}") for i in range(3)]
+
+    def start_run(self) -> SessionRun:
+        self.client.post(reverse("start_run"), {"strategy": self.strategy.pk, "symbol": "NQ"})
+        return SessionRun.objects.latest("id")
+
+    def toggle(self, run, step, checked):
+        response = self.client.post(
+            reverse("run_detail", args=[run.pk]),
+            {"steps": [{"s": step.pk, "c": checked}]},
+            content_type="application/json",
+            HTTP_X_REQUESTED_WITH="fetch",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_start_is_one_insert(self):
+        # Showing the form publishes the snapshot and warms the session and user caches.
+        self.client.get(reverse("start_run"))
+        # The strategy choice and the run itself.
+        with self.assertNumQueries(2), CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("start_run"), {"strategy": self.strategy.pk, "symbol": "NQ"})
+        self.assertTrue(ctx.captured_queries[1]["sql"].startswith('INSERT INTO "journal_sessionrun"'))
+        run = SessionRun.objects.get()
+        self.assertEqual(run.step_count, 3)
+        self.assertFalse(StepCheck.objects.exists())
+
+    def test_rows_are_written_on_first_touch(self):
+        run = self.start_run()
+        self.toggle(run, self.steps[0], 0)
+        self.assertFalse(StepCheck.objects.exists())
+
+        self.toggle(run, self.steps[0], 1)
+        self.toggle(run, self.steps[0], 0)
+        self.toggle(run, self.steps[1], 1)
+        self.assertEqual(
+            list(StepCheck.objects.order_by("step_id").values_list("step_id", "checked")),
+            [(self.steps[0].pk, False), (self.steps[1].pk, True)],
+        )
+        run.refresh_from_db()
+        self.assertEqual((run.checked_count, run.step_count), (1, 3))
+
+    def test_concurrent_first_toggle_upserts(self):
+        run = self.start_run()
+        step = self.steps[0]
+        filter_checks = StepCheck.objects.filter
+
+        def read_before_the_other_tab_wrote(*args, **kwargs):
+            # The other tab's row lands between this save's read and its write.
+            StepCheck.objects.create(session_run=run, step=step, notes="from the other tab")
+            patched.side_effect = filter_checks
+            return filter_checks(*args, **kwargs)
+
+        with mock.patch.object(StepCheck.objects, "filter", side_effect=read_before_the_other_tab_wrote) as patched:
+            self.toggle(run, step, 1)
+        check = StepCheck.objects.get()
+        self.assertEqual((check.checked, check.notes), (True, "from the other tab"))
+
+
+@plain_static_files
+class ReportSnapshotTests(TestCase):
+    """
+    Report periods are marked dirty by saves that change them and rebuilt by the reports.build task.
+    """
+
+    def setUp(self):
+        # Snapshot ids are cached, and the rows behind them are rolled back after each test.
+        cache.clear()
+        report_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, report_root)
+        self.enterContext(override_settings(REPORT_ROOT=report_root))
+        self.user = get_user_model().objects.create_user("trader")
+        self.client.force_login(self.user)
+        self.strategy = Strategy.objects.create(name="Silver Bullet")
+        # 10:00 in New York, trading day Wednesday 2026-01-14.
+        self.run = SessionRun.objects.create(
+            user=self.user, strategy=self.strategy, started_at=utc(2026, 1, 14, 15), symbol="NQ"
+        )
+
+    def marked(self) -> list:
+        return sorted(ReportSnapshot.objects.values_list("period", "start"))
+
+    def test_only_report_inputs_mark_periods(self):
+        self.assertEqual(self.marked(), [])
+        self.run.archived_at = timezone.now()
+        self.run.save(update_fields=["archived_checks", "archived_at"])
+        self.assertEqual(self.marked(), [])
+
+        self.run.completed = True
+        self.run.save()
+        self.assertEqual(self.marked(), [("month", date(2026, 1, 1)), ("week", date(2026, 1, 12))])
+
+        DayJournal.objects.create(user=self.user, date=date(2026, 2, 2))
+        self.assertIn(("week", date(2026, 2, 2)), self.marked())
+
+    def test_dirty_reports_are_served_stale_and_rebuilt_by_the_task(self):
+        self.run.save()
+        self.assertEqual(build_dirty_reports(), 2)
+        self.assertFalse(dirty_reports().exists())
+        url = reverse("report_detail", args=["week", 2026, 1, 12])
+        self.assertContains(self.client.get(url), "Silver Bullet")
+        self.assertFalse(Task.objects.exists())
+
+        Trade.objects.create(
+            session_run=self.run,
+            direction="LONG",
+            entry_time=self.run.started_at,
+            stop=Decimal("1"),
+            target=Decimal("2"),
+            result_r=Decimal("2.5"),
+        )
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertContains(response, "an update is on its way")
+            self.assertNotContains(response, "2.5")
+        self.assertEqual(Task.objects.get().name, "reports.build")
+
+        run_task(claim_next("worker"))
+        self.assertFalse(dirty_reports().exists())
+        response = self.client.get(url)
+        self.assertNotContains(response, "an update is on its way")
+        self.assertContains(response, "2.5")
+
+    def test_never_generated_report_is_queued(self):
+        self.run.save()
+        response = self.client.get(reverse("report_detail", args=["month", 2026, 1, 1]))
+        self.assertContains(response, "being generated")
+        self.assertEqual(Task.objects.get().name, "reports.build")
+
+
+@plain_static_files
+class RunEventTests(TestCase):
+    """
+    Checklist and review writes append events that replay into the run's timeline.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("trader")
+        self.client.force_login(self.user)
+        strategy = Strategy.objects.create(name="Silver Bullet")
+        section = Section.objects.create(strategy=strategy, name="Bias")
+        self.sweep = Step.objects.create(section=section, title="Liquidity sweep")
+        self.fvg = Step.objects.create(section=section, title="FVG")
+        self.run = SessionRun.objects.create(user=self.user, strategy=strategy, started_at=utc(2026, 1, 14, 15))
+
+    def save_steps(self, *steps):
+        self.client.post(
+            reverse("run_detail", args=[self.run.pk]),
+            {"steps": list(steps)},
+            content_type="application/json",
+            HTTP_X_REQUESTED_WITH="fetch",
+        )
+
+    def review(self, entry_time=None):
+        data = {"day_notes": ""}
+        if entry_time:
+            data.update(
+                trade_taken="on", direction="LONG", entry_time=entry_time, stop="1", target="2", result_r="1.5"
+            )
+        self.assertEqual(self.client.post(reverse("run_review", args=[self.run.pk]), data).status_code, 302)
+
+    def actions(self) -> list:
+        return list(self.run.events.values_list("action", "step_id"))
+
+    def test_toggles_are_logged_and_replayed(self):
+        self.save_steps({"s": self.sweep.pk, "c": 1}, {"s": self.fvg.pk, "c": 1})
+        self.save_steps({"s": self.sweep.pk, "c": 0}, {"s": self.fvg.pk, "n": "1H gap"})
+        # Saving the same state again logs nothing.
+        self.save_steps({"s": self.fvg.pk, "c": 1})
+        self.assertEqual(
+            self.actions(),
+            [
+                (RunEventAction.CHECKED, self.sweep.pk),
+                (RunEventAction.CHECKED, self.fvg.pk),
+                (RunEventAction.UNCHECKED, self.sweep.pk),
+                (RunEventAction.NOTE, self.fvg.pk),
+            ],
+        )
+
+        timeline = replay_run(self.run)
+        self.assertEqual([row["checked_count"] for row in timeline], [1, 2, 1, 1])
+        self.assertEqual(timeline[-1]["checked_count"], StepCheck.objects.filter(checked=True).count())
+
+    def test_latest_entry_wins_and_removal_clears_it(self):
+        self.review("2026-01-14T15:30")
+        self.assertEqual(time_to_entry(self.run), timedelta(minutes=30))
+        self.review("2026-01-14T15:30")
+        # Backdated, but recorded last.
+        self.review("2026-01-14T15:10")
+        self.assertEqual(time_to_entry(self.run), timedelta(minutes=10))
+        self.review()
+        self.assertIsNone(time_to_entry(self.run))
+        self.assertEqual(
+            [action for action, _ in self.actions()],
+            [
+                RunEventAction.REVIEWED,
+                RunEventAction.ENTRY,
+                RunEventAction.REVIEWED,
+                RunEventAction.REVIEWED,
+                RunEventAction.ENTRY,
+                RunEventAction.REVIEWED,
+                RunEventAction.ENTRY_REMOVED,
+            ],
+        )
+
+
+@plain_static_files
+class LiveSyncTests(TestCase):
+    """
+    Checklist deltas for other tabs, over SSE under ASGI and by polling elsewhere.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("trader")
+        self.client.force_login(self.user)
+        section = Section.objects.create(strategy=Strategy.objects.create(name="Silver Bullet"), name="Bias")
+        self.sweep = Step.objects.create(section=section, title="Liquidity sweep")
+        self.fvg = Step.objects.create(section=section, title="FVG")
+        self.run = SessionRun.objects.create(user=self.user, strategy=section.strategy)
+
+    def check(self, step, event_id=None, notes=""):
+        StepCheck.objects.create(
+            session_run=self.run, step=step, checked=True, checked_at=utc(2026, 1, 14, 15), notes=notes
+        )
+        return RunEvent.objects.create(id=event_id, session_run=self.run, step=step, action=RunEventAction.CHECKED)
+
+    def poll(self, after, seen=()):
+        url = reverse("run_delta_api", args=[self.run.pk])
+        return self.client.get(url, {"after": after, "seen": ",".join(map(str, seen))}).json()
+
+    def test_delta_format(self):
+        event = self.check(self.sweep, notes="Asia low")
+        self.assertEqual(
+            self.poll(0),
+            {
+                "last": event.id,
+                "seen": [event.id],
+                "delta": {"steps": [{"s": self.sweep.pk, "c": 1, "n": "Asia low", "t": "15:00:00"}], "checked": 1},
+            },
+        )
+        self.assertIsNone(self.poll(event.id, [event.id])["delta"])
+
+    def test_event_committed_late_with_a_lower_id_is_sent(self):
+        later = self.check(self.sweep, event_id=1000)
+        first = self.poll(0)
+        self.assertEqual(first["last"], later.id)
+
+        # Took its id before `later` but committed after the client read past it.
+        self.check(self.fvg, event_id=900)
+        data = self.poll(first["last"], first["seen"])
+        self.assertEqual(data["last"], later.id)
+        self.assertEqual([step["s"] for step in data["delta"]["steps"]], [self.fvg.pk])
+        self.assertIsNone(self.poll(data["last"], data["seen"])["delta"])
+
+    def test_stream_is_not_served_under_wsgi(self):
+        self.assertEqual(self.client.get(reverse("run_stream", args=[self.run.pk])).status_code, 204)
+
+    async def test_stream_sends_deltas_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        event = await sync_to_async(self.check)(self.sweep)
+        response = await self.async_client.get(reverse("run_stream", args=[self.run.pk]), {"after": 0})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        frames = aiter(response.streaming_content)
+        self.assertEqual(await anext(frames), b"retry: 3000\n\n")
+        frame = (await anext(frames)).decode()
+        await frames.aclose()
+        self.assertTrue(frame.startswith(f"id: {event.id}\nevent: delta\ndata: "))
+        self.assertEqual(json.loads(frame.split("data: ", 1)[1])["checked"], 1)
+
+
+class ConceptMatrixTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("trader")
+        fvg, sweep, bos = (Concept.objects.create(name=name) for name in ("FVG", "Sweep", "BOS"))
+        placements = {
+            date(2026, 1, 13): [("1H", fvg), ("15M", fvg), ("1H", sweep)],
+            date(2026, 1, 14): [("4H", fvg), ("1H", bos)],
+            date(2026, 1, 15): [("D", sweep)],
+        }
+        for day, slots in placements.items():
+            journal = DayJournal.objects.create(user=self.user, date=day)
+            for timeframe, concept in slots:
+                JournalSlotItem.objects.create(journal=journal, timeframe=timeframe, concept=concept)
+
+        strategy = Strategy.objects.create(name="Silver Bullet")
+        # 10:00 New York on the 13th, and 18:30 on the 13th, which is already the 14th's trading day.
+        for entry_time, result_r in ((utc(2026, 1, 13, 15), "-1"), (utc(2026, 1, 13, 23, 30), "2")):
+            run = SessionRun.objects.create(user=self.user, strategy=strategy, started_at=entry_time)
+            Trade.objects.create(
+                session_run=run,
+                direction="LONG",
+                entry_time=entry_time,
+                stop=Decimal("1"),
+                target=Decimal("2"),
+                result_r=Decimal(result_r),
+            )
+
+    def assert_matrix(self):
+        matrix = build_concept_matrix(self.user.id)
+        self.assertEqual(matrix["concepts"], ["FVG", "Sweep", "BOS"])
+        self.assertEqual(matrix["total_days"], 3)
+        self.assertEqual(matrix["days"], [2, 2, 1])
+        self.assertEqual(matrix["cooccurrence"], [[2, 1, 1], [1, 2, 0], [1, 0, 1]])
+        # D, 4H, 1H, 15M, 5M, 1M
+        self.assertEqual(matrix["by_timeframe"], [[0, 1, 1, 1, 0, 0], [1, 0, 1, 0, 0, 0], [0, 0, 1, 0, 0, 0]])
+        self.assertEqual(
+            matrix["outcomes"],
+            [
+                {"trade_days": 2, "total_r": 1.0, "avg_r": 0.5, "winning_days": 1},
+                {"trade_days": 1, "total_r": -1.0, "avg_r": -1.0, "winning_days": 0},
+                {"trade_days": 1, "total_r": 2.0, "avg_r": 2.0, "winning_days": 1},
+            ],
+        )
+
+    def test_matrix(self):
+        self.assert_matrix()
+
+    def test_trades_without_stored_buckets(self):
+        Trade.objects.update(trading_date=None)
+        self.assert_matrix()
+
+
+@plain_static_files
+class StepBitmapIndexTests(TestCase):
+    """
+    Index queries match the same filter over StepCheck, through incremental refreshes and archiving.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("trader")
+        self.client.force_login(self.user)
+        self.strategy = Strategy.objects.create(name="Silver Bullet")
+        section = Section.objects.create(strategy=self.strategy, name="Bias")
+        self.a, self.b, self.c = (Step.objects.create(section=section, title=title) for title in "ABC")
+        self.runs = [
+            SessionRun.objects.create(user=self.user, strategy=self.strategy, completed=True) for _ in range(4)
+        ]
+        for run, result_r in zip(self.runs, ("2", "-1")):
+            Trade.objects.create(
+                session_run=run,
+                direction="LONG",
+                entry_time=timezone.now(),
+                stop=Decimal("1"),
+                target=Decimal("2"),
+                result_r=Decimal(result_r),
+            )
+        self.index = StepBitmapIndex()
+        self.index.rebuild()
+
+    def toggle(self, run, step, checked):
+        self.client.post(
+            reverse("run_detail", args=[run.pk]),
+            {"steps": [{"s": step.pk, "c": checked}]},
+            content_type="application/json",
+            HTTP_X_REQUESTED_WITH="fetch",
+        )
+
+    def filters(self):
+        a, b, c = self.a.pk, self.b.pk, self.c.pk
+        return [
+            {"all_of": [a]},
+            {"all_of": [a], "none_of": [b]},
+            {"any_of": [b, c]},
+            {"none_of": [a]},
+            {"all_of": [a, b], "any_of": [c]},
+        ]
+
+    def orm_matches(self) -> list[list[int]]:
+        checked = {run.pk: set() for run in self.runs}
+        for run_id, step_id in StepCheck.objects.filter(checked=True).values_list("session_run_id", "step_id"):
+            checked[run_id].add(step_id)
+        return [
+            sorted(
+                (
+                    run_id
+                    for run_id, steps in checked.items()
+                    if steps.issuperset(f.get("all_of", ()))
+                    and (not f.get("any_of") or steps.intersection(f["any_of"]))
+                    and not steps.intersection(f.get("none_of", ()))
+                ),
+                reverse=True,
+            )
+            for f in self.filters()
+        ]
+
+    def index_matches(self) -> list[list[int]]:
+        return [self.index.query(self.user.id, self.strategy.id, **f)["run_ids"] for f in self.filters()]
+
+    def test_refresh_follows_toggles(self):
+        for run, steps in zip(self.runs, ([self.a, self.b], [self.a], [self.b, self.c], [])):
+            for step in steps:
+                self.toggle(run, step, 1)
+        self.index.refresh()
+        self.assertEqual(self.index_matches(), self.orm_matches())
+        self.assertEqual(self.index_matches()[0], [self.runs[1].pk, self.runs[0].pk])
+
+        self.toggle(self.runs[0], self.a, 0)
+        self.index.refresh()
+        self.index.refresh()
+        self.assertEqual(self.index_matches(), self.orm_matches())
+
+        stats = self.index.query(self.user.id, self.strategy.id, any_of=[self.a.pk, self.b.pk])["stats"]
+        self.assertEqual((stats["runs"], stats["trades"], stats["wins"]), (3, 2, 1))
+        self.assertEqual(stats["total_r"], Decimal("1.00"))
+
+    def test_late_commit_inside_the_window_is_applied(self):
+        self.toggle(self.runs[0], self.a, 1)
+        self.index.refresh()
+        late_id = self.index.last_event_id - 1
+        # An event that took its id before the last one seen but committed after it.
+        StepCheck.objects.create(session_run=self.runs[3], step=self.c, checked=True)
+        RunEvent.objects.create(id=late_id, session_run=self.runs[3], step=self.c, action=RunEventAction.CHECKED)
+        self.index.refresh()
+        self.assertEqual(self.index_matches(), self.orm_matches())
+        self.assertIn(late_id, self.index.recent_event_ids)
+
+    def test_archived_runs_match_after_a_rebuild(self):
+        self.toggle(self.runs[0], self.a, 1)
+        self.toggle(self.runs[2], self.b, 1)
+        self.toggle(self.runs[2], self.c, 1)
+        expected = self.orm_matches()
+        for run in self.runs:
+            archive_run(run)
+        self.assertFalse(StepCheck.objects.exists())
+        self.index.rebuild()
+        self.assertEqual(self.index_matches(), expected)
+
+
+class StrategyBundleTests(TestCase):
+    """
+    A bundle written by export imports back to the same library, and a bad one writes nothing.
+    """
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.media_root = Path(media_root)
+        Concept.objects.create(name="FVG", description="Fair value gap")
+        self.strategy = Strategy.objects.create(name="Silver Bullet", description="10-11 NY")
+        section = Section.objects.create(strategy=self.strategy, name="Bias", order=1)
+        step = Step.objects.create(section=section, title="Liquidity sweep", description="Above PDH", order=2)
+        StepImage.objects.create(step=step, image=SimpleUploadedFile("sweep.png", b"png bytes"), caption="NQ", order=1)
+        Step.objects.create(section=section, title="Displacement", order=3, required=False)
+
+    def export(self) -> io.BytesIO:
+        bundle = io.BytesIO()
+        write_bundle(bundle, Strategy.objects.all(), Concept.objects.all())
+        bundle.seek(0)
+        return bundle
+
+    def manifest(self) -> dict:
+        return build_manifest(Strategy.objects.all(), Concept.objects.all())[0]
+
+    def test_round_trip(self):
+        bundle = self.export()
+        before = self.manifest()
+        Strategy.objects.all().delete()
+        Concept.objects.all().delete()
+
+        counts = import_bundle(bundle)
+        self.assertEqual((counts["strategies"], counts["steps"], counts["images"]), (1, 2, 1))
+        self.assertEqual(self.manifest(), before)
+
+        # Importing it again changes nothing but the version.
+        version = Strategy.objects.get().version
+        import_bundle(self.export())
+        self.assertEqual(self.manifest(), before)
+        self.assertEqual(Strategy.objects.get().version, version + 1)
+
+    def test_import_bumps_versions_like_a_save(self):
+        strategies, concepts = model_version(STRATEGIES), model_version(CONCEPTS)
+        version = Strategy.objects.get().version
+        import_bundle(self.export())
+        self.assertEqual(Strategy.objects.get().version, version + 1)
+        self.assertNotEqual(model_version(STRATEGIES), strategies)
+        self.assertNotEqual(model_version(CONCEPTS), concepts)
+
+    def test_export_and_import_run_as_tasks(self):
+        output = str(self.media_root / "library.zip")
+        enqueue("bundles.export", {"output": output, "strategy_ids": [self.strategy.pk], "concepts": True})
+        run_task(claim_next("worker-1"))
+        self.assertEqual(Task.objects.get().result, {"output": output, "strategies": 1, "concepts": 1})
+        before = self.manifest()
+
+        Strategy.objects.all().delete()
+        enqueue("bundles.import", {"path": output})
+        run_task(claim_next("worker-1"))
+        imported = Task.objects.get(name="bundles.import")
+        self.assertEqual((imported.status, imported.result["steps"]), (TaskStatus.DONE, 2))
+        self.assertEqual(self.manifest(), before)
+
+    def test_bad_manifest_writes_nothing(self):
+        manifest = self.manifest()
+        manifest["strategies"][0]["name"] = "Unicorn"
+        bad_values = [
+            ("order", "1"),
+            ("order", True),
+            ("required", "yes"),
+            ("description", None),
+        ]
+        for key, value in bad_values:
+            with self.subTest(key=key, value=value):
+                bad = json.loads(json.dumps(manifest))
+                bad["strategies"][0]["sections"][0]["steps"][0][key] = value
+                self.assert_rejected(bad)
+        with self.subTest(key="caption"):
+            bad = json.loads(json.dumps(manifest))
+            bad["strategies"][0]["sections"][0]["steps"][0]["images"][0]["caption"] = 7
+            self.assert_rejected(bad)
+
+    def assert_rejected(self, manifest: dict) -> None:
+        bundle = io.BytesIO()
+        with zipfile.ZipFile(self.export()) as source, zipfile.ZipFile(bundle, "w") as target:
+            for name in source.namelist():
+                if name != "manifest.json":
+                    target.writestr(name, source.read(name))
+            target.writestr("manifest.json", json.dumps(manifest))
+        bundle.seek(0)
+        blobs = sorted(self.media_root.rglob("*"))
+
+        with self.assertRaises(BundleError):
+            import_bundle(bundle)
+        self.assertFalse(Strategy.objects.filter(name="Unicorn").exists())
+        self.assertEqual(sorted(self.media_root.rglob("*")), blobs)
+
+
+class ContentAddressedStorageTests(TestCase):
+    """
+    Blobs are stored once under their sha256, and gc_step_images only deletes the unreferenced ones.
+    """
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.storage = StepImage._meta.get_field("image").storage
+        self.step = Step.objects.create(
+            section=Section.objects.create(strategy=Strategy.objects.create(name="Silver Bullet"), name="Bias"),
+            title="Liquidity sweep",
+        )
+
+    def save(self, data: bytes, name: str = "chart.PNG") -> str:
+        return self.storage.save(name, SimpleUploadedFile(name, data))
+
+    def gc(self, *args) -> None:
+        call_command("gc_step_images", "--min-age-hours=0", *args, stdout=io.StringIO())
+
+    def test_identical_uploads_share_one_blob_named_by_content(self):
+        digest = hashlib.sha256(b"chart").hexdigest()
+        first = self.save(b"chart", "monday.png")
+        self.assertEqual(first, f"cas/{digest[:2]}/{digest}.png")
+        self.assertEqual(self.save(b"chart", "tuesday.PNG"), first)
+        self.assertNotEqual(self.save(b"other chart"), first)
+        self.assertEqual(len(list(self.storage.iter_blobs())), 2)
+
+    def test_gc_deletes_only_unreferenced_blobs(self):
+        by_row = StepImage.objects.create(step=self.step, image=self.save(b"step image")).image.name
+        by_snapshot = StepImage.objects.create(step=self.step, image=self.save(b"old step image"))
+        publish_version(Strategy.objects.get())
+        by_snapshot.delete()
+        by_snapshot = by_snapshot.image.name
+        user = get_user_model().objects.create_user("trader")
+        by_attachment = Attachment.objects.create(user=user, file=self.save(b"screenshot"), sha256="0" * 64).file.name
+        orphan = self.save(b"nothing points here")
+
+        self.gc("--dry-run")
+        self.assertTrue(self.storage.exists(orphan))
+
+        self.gc()
+        for name in (by_row, by_snapshot, by_attachment):
+            self.assertTrue(self.storage.exists(name), name)
+        self.assertFalse(self.storage.exists(orphan))
+
+    def test_gc_keeps_recent_blobs(self):
+        orphan = self.save(b"upload whose row is not saved yet")
+        call_command("gc_step_images", stdout=io.StringIO())
+        self.assertTrue(self.storage.exists(orphan))
+
+
+class MonteCarloTests(TestCase):
+    """
+    Seeded simulations are reproducible however they are batched and fanned
+    out, and only small ones run while the page loads.
+    """
+
+    r_values = [-1.0, -1.0, -0.5, 1.5, 2.0, 3.0]
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("trader")
+        self.client.force_login(self.user)
+        self.strategy = Strategy.objects.create(name="Silver Bullet")
+
+    def test_batch_math(self):
+        r_values = np.array(self.r_values)
+        batch = _simulate_batch((r_values, 50, 30, np.random.SeedSequence(7), 4.0))
+        draws = np.random.default_rng(np.random.SeedSequence(7)).choice(r_values, size=(50, 30))
+        for i, path in enumerate(draws):
+            equity = [0.0, *np.cumsum(path)]
+            streak = longest = 0
+            for r in path:
+                streak = streak + 1 if r < 0 else 0
+                longest = max(longest, streak)
+            self.assertAlmostEqual(batch["final_r"][i], equity[-1])
+            drawdown = max(max(equity[: j + 1]) - e for j, e in enumerate(equity))
+            self.assertAlmostEqual(batch["max_drawdown"][i], drawdown)
+            self.assertEqual(batch["longest_losing"][i], longest)
+        ruined = sum(min(0.0, *np.cumsum(path)) <= -4.0 for path in draws)
+        self.assertEqual(batch["ruined"], ruined)
+
+    def test_seed_is_deterministic_across_batches_and_workers(self):
+        def run(seed=3, workers=1):
+            return simulate(self.r_values, n_paths=5000, n_trades=50, seed=seed, workers=workers, batch_size=2000)
+
+        result = run()
+        self.assertEqual(run(), result)
+        def threads(max_workers, mp_context):
+            return ThreadPoolExecutor(max_workers)
+
+        # Threads stand in for the process pool: the fan-out must not change the result.
+        with mock.patch("journal.montecarlo.ProcessPoolExecutor", threads):
+            self.assertEqual(run(workers=3), result)
+        self.assertNotEqual(run(seed=4), result)
+
+    def test_outcomes_of_a_single_r_value(self):
+        result = simulate([-1.0], n_paths=10, n_trades=30, ruin_r=20, workers=1)
+        self.assertEqual(result["risk_of_ruin"], 1.0)
+        self.assertEqual(result["drawdown_percentiles"][0], (50, 30.0))
+        self.assertEqual(result["losing_streaks"], [(30, 10, 1.0)])
+
+    def add_trades(self) -> None:
+        for result_r in self.r_values:
+            run = SessionRun.objects.create(user=self.user, strategy=self.strategy, started_at=timezone.now())
+            Trade.objects.create(
+                session_run=run,
+                direction="LONG",
+                entry_time=run.started_at,
+                stop=Decimal("1"),
+                target=Decimal("2"),
+                result_r=Decimal(str(result_r)),
+            )
+
+    def get(self, **params):
+        return self.client.get(reverse("strategy_simulation", args=[self.strategy.pk]), params)
+
+    @plain_static_files
+    def test_view_clamps_its_input(self):
+        self.add_trades()
+        response = self.get(paths="abc", trades=5, seed=-1, ruin_r="nan")
+        self.assertEqual(response.context["params"], {"paths": 20000, "trades": 10, "seed": 0, "ruin_r": 20.0})
+        response = self.get(paths=10**9, trades=10**9, seed=2**40, ruin_r="inf")
+        self.assertEqual(
+            response.context["params"], {"paths": 200000, "trades": 1000, "seed": 2**31 - 1, "ruin_r": 1000.0}
+        )
+
+    @plain_static_files
+    def test_large_simulations_go_to_the_task_queue(self):
+        self.add_trades()
+        with mock.patch("journal.views.simulate", wraps=simulate) as simulated:
+            self.assertIsNotNone(self.get(paths=2000, trades=50).context["result"])
+            response = self.get(paths=200000, trades=1000)
+        self.assertEqual(simulated.call_count, 1)
+        self.assertTrue(response.context["too_large"])
+        self.assertIsNone(response.context["result"])
+
+        params = {"paths": 200000, "trades": 1000, "seed": 0, "ruin_r": 20}
+        response = self.client.post(reverse("strategy_simulation", args=[self.strategy.pk]), params)
+        queued = Task.objects.get()
+        self.assertRedirects(response, reverse("task_detail", args=[queued.pk]), fetch_redirect_response=False)
+        self.assertEqual(queued.name, "montecarlo.simulate")
+        params["ruin_r"] = 20.0
+        self.assertEqual(queued.payload, {"strategy_id": self.strategy.pk, "user_id": self.user.pk, **params})
+
+
+class LoadTestTests(TestCase):
+    """
+    The load generator drives the real endpoints, and only against a scratch database.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.strategy = Strategy.objects.create(name="Silver Bullet")
+        Step.objects.create(section=Section.objects.create(strategy=self.strategy, name="Bias"), title="Sweep")
+        Concept.objects.create(name="FVG")
+
+    def test_refuses_a_live_database(self):
+        self.assertTrue(is_scratch_database())
+        live = {**connection.settings_dict, "NAME": "/srv/tradejournal/db.sqlite3"}
+        with mock.patch.dict(connection.settings_dict, live):
+            self.assertFalse(is_scratch_database())
+            with self.assertRaisesMessage(ValueError, "--allow-live-db"):
+                run_load(Scenario(users=1, duration=0))
+            with self.assertRaises(CommandError):
+                call_command("loadtest", "--users=1", "--duration=0", stdout=io.StringIO())
+            check_database(allow_live_db=True)
+        self.assertEqual(get_user_model().objects.count(), 0)
+        self.assertTrue(is_scratch_database({"NAME": "/tmp/loadtest.sqlite3"}))
+
+    @plain_static_files
+    def test_trader_day_saves_slots_through_save_slots_api(self):
+        scenario = Scenario(users=1, think_time=0, slot_items=4, review_probability=1)
+        user = prepare_users(1)[0]
+        results = Results()
+        trader = Trader(0, ClientTransport(user), scenario, results, load_fixtures(scenario))
+        trader.run_day()
+
+        statuses = {sample.endpoint: sample.status for sample in results.samples}
+        self.assertEqual(
+            statuses, {"start_run": 302, "run_detail": 302, "day_state": 200, "save_slots": 200, "run_review": 302}
+        )
+        self.assertEqual(JournalSlotItem.objects.filter(journal__user=user).count(), 4)
+        self.assertTrue(Trade.objects.filter(session_run__user=user).exists())
+        summary = results.summary()
+        self.assertEqual(summary["endpoints"]["run_detail"]["requests"], scenario.checklist_saves)
+        self.assertEqual(summary["endpoints"]["save_slots"]["error_rate"], 0)
+
+
+@plain_static_files
+class WarmupTests(TestCase):
+    """
+    warmup() leaves templates compiled and URL/model caches filled, and
+    profiling first requests leaves no trace in the database.
+    """
+
+    def test_templates_are_compiled_into_the_cached_loader(self):
+        loader = engines["django"].engine.template_loaders[0]
+        loader.reset()
+        timings = warmup()
+        self.assertEqual(set(timings), {"templates", "urls", "models"})
+
+        templates = Path(settings.BASE_DIR, "journal", "templates")
+        journal_templates = {path.relative_to(templates).as_posix() for path in templates.rglob("*.html")}
+        self.assertGreaterEqual(timings["templates"][0], len(journal_templates))
+        self.assertTrue(journal_templates <= {key.split("-")[0] for key in loader.get_template_cache})
+        with mock.patch.object(Template, "compile_nodelist") as compiled:
+            loader.get_template("journal/day.html")
+        compiled.assert_not_called()
+
+    def test_urls_and_models_are_primed(self):
+        self.assertEqual(prime_urls(), len(get_resolver().reverse_dict))
+        self.assertGreater(prime_models(), 0)
+        self.assertIn("concrete_fields", Trade._meta.__dict__)
+
+    def test_command_reports_every_step(self):
+        out = io.StringIO()
+        call_command("warmup", stdout=out)
+        for step in ("templates", "urls", "models", "Warm."):
+            self.assertIn(step, out.getvalue())
+
+    def test_profiled_requests_are_rolled_back(self):
+        user = get_user_model().objects.create_user("admin", is_superuser=True)
+        urls = ["/strategies/", "/concepts/"]
+        rows = time_requests(urls)
+        self.assertEqual(
+            [(url, attempt, status) for url, attempt, status, _ in rows],
+            [(url, attempt, 200) for url in urls for attempt in ("first", "second")],
+        )
+        user.refresh_from_db()
+        self.assertIsNone(user.last_login)
+        self.assertFalse(Session.objects.exists())
+
+
+class StaticAssetViewTests(SimpleTestCase):
+    """
+    Collected static files are served precompressed when accepted, immutable
+    only under content-hashed names, and never from outside STATIC_ROOT.
+    """
+
+    hashed = "js/app.1a2b3c4d5e6f.js"
+
+    def setUp(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.enterContext(override_settings(STATIC_ROOT=str(root / "static")))
+        (root / "static" / "js").mkdir(parents=True)
+        for name, content in [
+            (self.hashed, b"identity"),
+            (f"{self.hashed}.br", b"brotli"),
+            (f"{self.hashed}.gz", b"gzip"),
+            ("js/app.js", b"identity"),
+        ]:
+            (root / "static" / name).write_bytes(content)
+        (root / "secret.txt").write_bytes(b"secret")
+        storage = mock.Mock(is_hashed_name=lambda name: name == self.hashed)
+        self.enterContext(mock.patch("journal.views.staticfiles_storage", storage))
+        self.factory = RequestFactory()
+
+    def get(self, path: str, **headers):
+        return static_asset_view(self.factory.get(f"/static/{path}", headers=headers), path)
+
+    def test_encoding_follows_accept_encoding(self):
+        for accept, encoding, body in [
+            ("gzip, deflate, br", "br", b"brotli"),
+            ("gzip;q=1.0, deflate", "gzip", b"gzip"),
+            ("", None, b"identity"),
+            ("identity", None, b"identity"),
+        ]:
+            with self.subTest(accept=accept):
+                response = self.get(self.hashed, accept_encoding=accept)
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+                self.assertEqual(b"".join(response.streaming_content), body)
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+                self.assertEqual(response["Content-Type"], "text/javascript")
+
+    def test_only_hashed_names_are_immutable(self):
+        self.assertIn("immutable", self.get(self.hashed)["Cache-Control"])
+        unhashed = self.get("js/app.js", accept_encoding="br")
+        self.assertEqual(unhashed["Cache-Control"], "public, max-age=0, must-revalidate")
+        # No .br sibling: served as is.
+        self.assertNotIn("Content-Encoding", unhashed)
+
+    def test_unmodified_file_is_not_sent_again(self):
+        last_modified = self.get(self.hashed)["Last-Modified"]
+        self.assertEqual(self.get(self.hashed, if_modified_since=last_modified).status_code, 304)
+
+    def test_paths_outside_static_root_are_rejected(self):
+        for path in ["../secret.txt", "js/../../secret.txt", "/etc/passwd", "js", "missing.js"]:
+            with self.subTest(path=path), self.assertRaises(Http404):
+                self.get(path)
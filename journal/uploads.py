@@ -0,0 +1,245 @@
+"""
+Resumable chunked uploads for trade and journal screenshots.
+
+    POST   /api/uploads/               {filename, size, sha256, content_type, trade_id | date}
+    GET    /api/uploads/<id>/          -> {"offset": bytes received so far, ...}
+    PUT    /api/uploads/<id>/          raw chunk bytes, header Upload-Offset: <offset>
+    POST   /api/uploads/<id>/complete/ -> the new Attachment
+    DELETE /api/uploads/<id>/          abort
+
+Chunks are streamed from the request into MEDIA_ROOT/.uploads/<id>.part in
+small reads, never buffered whole. A chunk is accepted only at the current
+offset, so a client that lost its connection asks for the offset and
+resends from there. A request claims the offset before it touches the part
+file, so two requests for the same chunk never write it at once.
+
+Completing claims the upload the same way, re-hashes the part file, checks
+it against the declared sha256, reads the image type from the bytes and
+renames the file into the content-addressed store in one step, so a
+half-written file can never be attached. A second completion request gets
+the Attachment the first one created.
+"""
+import hashlib
+import os
+import re
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+
+from .models import Attachment, UploadSession
+
+READ_SIZE = 64 * 1024
+SESSION_TTL = timedelta(days=1)
+# A claim older than this belongs to a request that died mid-chunk.
+CHUNK_LEASE = timedelta(minutes=5)
+# How long a second completion request waits for the first one to finish.
+COMPLETE_WAIT_SECONDS = 5
+ALLOWED_CONTENT_TYPES = ("image/png", "image/jpeg", "image/webp", "image/gif")
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def part_path(upload: UploadSession) -> Path:
+    return Path(settings.MEDIA_ROOT) / ".uploads" / f"{upload.pk}.part"
+
+
+def create_upload(user, filename: str, size, sha256: str, content_type: str, trade=None, journal=None):
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("size must be an integer.")
+    if not 0 < size <= settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"size must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes.")
+    sha256 = (sha256 or "").lower()
+    if not SHA256_RE.match(sha256):
+        raise UploadError("sha256 must be 64 hex characters.")
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise UploadError(f"Unsupported content type {content_type!r}.")
+    if (trade is None) == (journal is None):
+        raise UploadError("Attach to exactly one of a trade or a day.")
+
+    upload = UploadSession.objects.create(
+        user=user,
+        trade=trade,
+        journal=journal,
+        filename=os.path.basename(filename or "screenshot")[:200],
+        content_type=content_type,
+        size=size,
+        sha256=sha256,
+    )
+    path = part_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return upload
+
+
+def _claim(upload: UploadSession, claimed_at, **match) -> bool:
+    """
+    Set writing_since unless another request holds a live claim on the upload.
+    """
+    live = Q(writing_since__gte=claimed_at - CHUNK_LEASE)
+    return bool(UploadSession.objects.filter(pk=upload.pk, **match).exclude(live).update(writing_since=claimed_at))
+
+
+def write_chunk(upload: UploadSession, offset: int, stream, length: int) -> int:
+    """
+    Append length bytes read from stream at offset. Returns the new offset.
+    """
+    if offset != upload.received:
+        raise UploadError(f"Expected offset {upload.received}.", status=409)
+    if length <= 0 or length > settings.UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Chunks must be 1 to {settings.UPLOAD_CHUNK_SIZE} bytes.", status=413)
+    if offset + length > upload.size:
+        raise UploadError("Chunk runs past the declared size.", status=413)
+
+    # Claim the offset first; only the request that holds it writes the part file.
+    claimed_at = timezone.now()
+    if not _claim(upload, claimed_at, received=offset):
+        raise UploadError("Another request is writing this chunk.", status=409)
+
+    claim = UploadSession.objects.filter(pk=upload.pk, received=offset, writing_since=claimed_at)
+    written = 0
+    try:
+        with open(part_path(upload), "r+b") as part:
+            # Drop anything a previous, interrupted request wrote past the committed offset.
+            part.truncate(offset)
+            part.seek(offset)
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                part.write(data)
+                written += len(data)
+    finally:
+        if written != length:
+            claim.update(writing_since=None)
+    if written != length:
+        raise UploadError(f"Chunk ended after {written} of {length} bytes.")
+
+    if not claim.update(received=offset + written, writing_since=None, updated_at=timezone.now()):
+        # The claim expired and another request took over this offset.
+        raise UploadError("Another request wrote this chunk.", status=409)
+    upload.received = offset + written
+    return upload.received
+
+
+def sniff_content_type(path) -> str | None:
+    """
+    The content type of an image Pillow can read, or None.
+    """
+    try:
+        with Image.open(path) as image:
+            image.verify()
+            return Image.MIME.get(image.format)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def _completed(upload: UploadSession) -> Attachment | None:
+    attachment_id = UploadSession.objects.filter(pk=upload.pk).values_list("attachment_id", flat=True).first()
+    return Attachment.objects.filter(pk=attachment_id).first() if attachment_id else None
+
+
+def complete_upload(upload: UploadSession, caption: str = "") -> Attachment:
+    """
+    Verify the part file and turn it into an Attachment. The request that
+    claims completion does the work; a concurrent one waits for it and gets
+    the same Attachment.
+    """
+    if upload.received != upload.size:
+        raise UploadError(f"Upload incomplete: {upload.received} of {upload.size} bytes.", status=409)
+
+    claimed_at = timezone.now()
+    if not _claim(upload, claimed_at, received=upload.size, attachment__isnull=True):
+        deadline = time.monotonic() + COMPLETE_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            attachment = _completed(upload)
+            if attachment is not None:
+                return attachment
+            time.sleep(0.1)
+        raise UploadError("Another request is completing this upload.", status=409)
+
+    claim = UploadSession.objects.filter(pk=upload.pk, writing_since=claimed_at)
+    path = part_path(upload)
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as part:
+            for chunk in iter(lambda: part.read(READ_SIZE), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != upload.sha256:
+            # The bytes on disk are wrong; start over rather than resume.
+            with open(path, "r+b") as part:
+                part.truncate(0)
+            claim.update(received=0)
+            raise UploadError("Checksum mismatch; upload restarted.", status=422)
+
+        # Trust the bytes, not the content type the client declared.
+        content_type = sniff_content_type(path)
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            # The bytes are what the client meant to send, so there is nothing to resume.
+            abort_upload(upload)
+            raise UploadError("Not a PNG, JPEG, WebP or GIF image.", status=415)
+
+        storage = Attachment._meta.get_field("file").storage
+        name = storage.save_verified(str(path), upload.sha256, upload.filename)
+        with transaction.atomic():
+            attachment = Attachment.objects.create(
+                user=upload.user,
+                trade=upload.trade,
+                journal=upload.journal,
+                file=name,
+                original_name=upload.filename,
+                content_type=content_type,
+                size=upload.size,
+                sha256=upload.sha256,
+                caption=caption[:180],
+            )
+            # Kept until cleanup_stale_uploads, so a retried completion finds the attachment.
+            claim.update(attachment=attachment, updated_at=timezone.now())
+        return attachment
+    finally:
+        claim.update(writing_since=None)
+
+
+def abort_upload(upload: UploadSession) -> None:
+    part_path(upload).unlink(missing_ok=True)
+    upload.delete()
+
+
+def cleanup_stale_uploads(ttl: timedelta = SESSION_TTL) -> int:
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - ttl)
+    count = 0
+    for upload in stale:
+        abort_upload(upload)
+        count += 1
+    return count
+
+
+def upload_state(upload: UploadSession) -> dict:
+    return {
+        "id": str(upload.pk),
+        "offset": upload.received,
+        "size": upload.size,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+    }
+
+
+def attachment_data(attachment: Attachment) -> dict:
+    return {
+        "id": attachment.id,
+        "url": attachment.file.url,
+        "name": attachment.original_name,
+        "size": attachment.size,
+        "caption": attachment.caption,
+    }
@@ -4,11 +4,32 @@ from . import views
 urlpatterns = [
     path("", views.dashboard_view, name="dashboard"),
     path("strategies/", views.strategies_view, name="strategies"),
+    path("strategies/<int:strategy_id>/simulation/", views.strategy_simulation_view, name="strategy_simulation"),
     path("runs/start/", views.start_run_view, name="start_run"),
     path("runs/<int:run_id>/", views.run_detail_view, name="run_detail"),
     path("runs/<int:run_id>/review/", views.run_review_view, name="run_review"),
+    path("runs/<int:run_id>/timeline/", views.run_timeline_api, name="run_timeline_api"),
+    path("runs/<int:run_id>/stream/", views.run_stream_view, name="run_stream"),
+    path("runs/<int:run_id>/delta/", views.run_delta_api, name="run_delta_api"),
     path("concepts/", views.concepts_view, name="concepts"),
+    path("api/concepts/", views.concepts_api, name="concepts_api"),
+    path("analytics/checklist/", views.checklist_filter_view, name="checklist_filter"),
+    path("analytics/concepts/", views.concept_analytics_view, name="concept_analytics"),
+    path("analytics/killzones/", views.killzone_analytics_view, name="killzone_analytics"),
+    path("coach/", views.coach_view, name="coach"),
+    path("reports/", views.reports_view, name="reports"),
+    path(
+        "reports/<str:period>/<int:year>/<int:month>/<int:day>/",
+        views.report_detail_view,
+        name="report_detail",
+    ),
+    path("tasks/<int:task_id>/", views.task_detail_view, name="task_detail"),
+    path("api/tasks/<int:task_id>/", views.task_status_api, name="task_status_api"),
+    path("api/uploads/", views.uploads_api, name="uploads_api"),
+    path("api/uploads/<uuid:upload_id>/", views.upload_detail_api, name="upload_detail_api"),
+    path("api/uploads/<uuid:upload_id>/complete/", views.upload_complete_api, name="upload_complete_api"),
     path("legacy/calendar/", views.calendar_view, name="calendar"),
     path("day/<int:year>/<int:month>/<int:day>/", views.day_view, name="day"),
+    path("api/day/<int:year>/<int:month>/<int:day>/", views.day_state_api, name="day_state_api"),
     path("api/day/<int:year>/<int:month>/<int:day>/save-slots/", views.save_slots_api, name="save_slots_api"),
 ]
@@ -1,41 +1,101 @@
 import calendar
+import hashlib
 import json
-from datetime import date
-
+import math
+import mimetypes
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.templatetags.static import static
 from django.utils import timezone
-
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+from django.views.static import was_modified_since
+
+from .analytics import concept_matrix, invalidate_concept_matrix
+from .archive import load_checks, restore_run
+from .bitmaps import get_step_index
+from .cache_versions import CONCEPTS, STRATEGIES, model_version
+from .checklists import current_snapshot, publish_version, run_template, snapshot_template, template_steps
+from .coach import sort_stats, trader_stats
+from .days import InvalidSlots, UnknownConcepts, clean_slots, day_state, replace_slots, save_day
+from .events import checklist_events, record_events, replay_run, time_to_entry
 from .forms import DayJournalForm, SessionRunReviewForm, StartSessionRunForm, TradeForm
+from .killzones import killzone_stats, market_buckets
+from .live import forget_run, latest_event_id, publish_run, run_delta, run_stream
 from .models import (
     Concept,
     DayJournal,
-    JournalSlotItem,
-    Section,
+    MarketSession,
+    RunEvent,
+    RunEventAction,
+    ReportSnapshot,
     SessionRun,
-    Step,
     StepCheck,
     Strategy,
+    StrategyVersion,
+    Task,
     Timeframe,
     Trade,
+    UploadSession,
+)
+from .montecarlo import SIMULATION_CACHE_TIMEOUT, simulate, simulation_cache_key, strategy_r_values
+from .reports import read_report
+from .tasks import enqueue, enqueue_once, task_status
+from .uploads import (
+    UploadError,
+    abort_upload,
+    attachment_data,
+    complete_upload,
+    create_upload,
+    upload_state,
+    write_chunk,
 )
 
+
 def _get_or_create_journal(user, dt: date) -> DayJournal:
     journal, _ = DayJournal.objects.get_or_create(user=user, date=dt)
     return journal
 
 
 def service_worker_view(request):
+    # Tie the cache name to the static manifest so a new deploy gets a fresh cache.
+    version = getattr(staticfiles_storage, "manifest_hash", "") or "dev"
+    precache = ["/", "/runs/start/", "/strategies/", static("app.css"), static("day.js")]
     js = """
+const CACHE_NAME = "tc-%(version)s";
+
 self.addEventListener("install", event => {
   event.waitUntil(
-    caches.open("tc-v1").then(cache => cache.addAll([
-      "/",
-      "/runs/start/",
-      "/strategies/"
-    ]))
+    caches.open(CACHE_NAME).then(cache => cache.addAll(%(precache)s))
+  );
+});
+
+self.addEventListener("activate", event => {
+  event.waitUntil(
+    caches.keys().then(keys => Promise.all(
+      keys.filter(key => key.startsWith("tc-") && key !== CACHE_NAME).map(key => caches.delete(key))
+    ))
   );
 });
 
@@ -45,32 +105,77 @@ self.addEventListener("fetch", event => {
     caches.match(event.request).then(cached => cached || fetch(event.request))
   );
 });
-"""
-    return HttpResponse(js, content_type="application/javascript")
+""" % {"version": version, "precache": json.dumps(precache)}
+    response = HttpResponse(js, content_type="application/javascript")
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+STATIC_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+def static_asset_view(request, path: str):
+    """
+    Serve collected static files without a front-end server. Picks the
+    precompressed .br/.gz sibling written at collectstatic time when the
+    client accepts it, and marks content-hashed names as immutable.
+    """
+    if not settings.STATIC_ROOT:
+        raise Http404("STATIC_ROOT is not configured")
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404("Invalid static path")
+    if not os.path.isfile(fullpath):
+        raise Http404("Static file not found")
+
+    accepted = {
+        part.split(";", 1)[0].strip().lower()
+        for part in request.headers.get("Accept-Encoding", "").split(",")
+    }
+    served_path, encoding = fullpath, None
+    for name, suffix in STATIC_ENCODINGS:
+        if name in accepted and os.path.isfile(fullpath + suffix):
+            served_path, encoding = fullpath + suffix, name
+            break
+
+    stat = os.stat(served_path)
+    if not was_modified_since(request.headers.get("If-Modified-Since"), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type, _ = mimetypes.guess_type(path)
+    response = FileResponse(open(served_path, "rb"), content_type=content_type or "application/octet-stream")
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Vary"] = "Accept-Encoding"
+    if encoding:
+        response["Content-Encoding"] = encoding
+
+    is_hashed = getattr(staticfiles_storage, "is_hashed_name", None)
+    immutable = is_hashed is not None and is_hashed(path.replace(os.sep, "/"))
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    return response
 
 
 def _run_sections_with_checks(run: SessionRun):
-    sections = (
-        Section.objects.filter(strategy=run.strategy)
-        .prefetch_related("steps__images")
-        .order_by("order", "id")
-    )
-    checks_by_step_id = {c.step_id: c for c in run.step_checks.select_related("step").all()}
+    checks_by_step_id = {c.step_id: c for c in load_checks(run)}
     section_rows = []
     total_steps = 0
     checked_steps = 0
 
-    for section in sections:
+    for section_row in run_template(run):
         step_rows = []
-        steps = section.steps.all().order_by("order", "id")
-        for step in steps:
+        for template_row in section_row["steps"]:
+            step = template_row["step"]
             check = checks_by_step_id.get(step.id)
-            images = list(step.images.all())
-            step_rows.append({"step": step, "check": check, "images": images, "has_images": bool(images)})
+            step_rows.append({**template_row, "check": check})
             total_steps += 1
             if check and check.checked:
                 checked_steps += 1
-        section_rows.append({"section": section, "steps": step_rows})
+        section_rows.append({"section": section_row["section"], "steps": step_rows})
 
     return section_rows, total_steps, checked_steps
 
@@ -90,14 +195,33 @@ def dashboard_view(request):
     )
 
 
+def _library_etag(request, name: str) -> str:
+    """
+    ETag for a cached library page: the model version counter plus whatever
+    else is baked into the HTML (user, CSRF secret, static manifest).
+    """
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    parts = [
+        name,
+        str(model_version(name)),
+        str(request.user.pk),
+        hashlib.sha256(csrf_cookie.encode()).hexdigest()[:12],
+        getattr(staticfiles_storage, "manifest_hash", ""),
+    ]
+    return "-".join(parts)
+
+
 @login_required
+@condition(etag_func=lambda request: _library_etag(request, STRATEGIES))
 def strategies_view(request):
+    # Lazy: only evaluated when the cached library fragment has gone stale.
     strategies = (
         Strategy.objects.filter(is_active=True)
-        .prefetch_related("sections__steps__images")
+        .prefetch_related("sections__steps")
         .order_by("name")
     )
-    return render(request, "journal/strategies.html", {"strategies": strategies})
+    context = {"strategies": strategies, "library_version": model_version(STRATEGIES)}
+    return render(request, "journal/strategies.html", context)
 
 
 @login_required
@@ -107,51 +231,139 @@ def start_run_view(request):
         if form.is_valid():
             run = form.save(commit=False)
             run.user = request.user
+            run.strategy_version = run.strategy.version
+            # Published when the form was shown, so this is a cache read and the run is one INSERT.
+            run.snapshot_id, run.step_count = current_snapshot(run.strategy)
             run.save()
-
-            steps = (
-                Step.objects.filter(section__strategy=run.strategy)
-                .select_related("section")
-                .order_by("section__order", "order", "id")
-            )
-            StepCheck.objects.bulk_create(
-                [StepCheck(session_run=run, step=step, checked=False) for step in steps]
-            )
             return redirect("run_detail", run_id=run.id)
     else:
         form = StartSessionRunForm()
+        for strategy in form.fields["strategy"].queryset:
+            current_snapshot(strategy)
 
     return render(request, "journal/start_run.html", {"form": form})
 
 
+def _step_deltas(payload, step_ids: set) -> dict:
+    """
+    {"steps": [{"s": step_id, "c": 0/1, "n": notes}, ...]} with "c" and "n"
+    each optional -> {step_id: (checked or None, notes or None)}.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("steps"), list):
+        raise ValueError("Expected {\"steps\": [...]}")
+    changes = {}
+    for item in payload["steps"]:
+        if not isinstance(item, dict) or item.get("s") not in step_ids:
+            continue
+        checked = bool(item["c"]) if "c" in item else None
+        notes = item["n"].strip()[:300] if isinstance(item.get("n"), str) else None
+        changes[item["s"]] = (checked, notes)
+    return changes
+
+
+def _save_checks(run: SessionRun, changes: dict, step_ids: list[int]) -> list[RunEvent]:
+    """
+    Apply {step_id: (checked, notes)} to the run's sparse StepCheck rows; None
+    keeps the stored value. Returns the recorded events.
+    """
+    checks_by_step_id = {c.step_id: c for c in StepCheck.objects.filter(session_run=run, step_id__in=changes)}
+    now = timezone.now()
+    before = {}
+    after = {}
+    to_create = defaultdict(list)
+    to_update = []
+
+    for step_id, (should_check, notes) in changes.items():
+        # On a conflict with a concurrently created row, only overwrite what this save sets.
+        conflict_fields = (("checked", "checked_at") if should_check is not None else ()) + (
+            ("notes",) if notes is not None else ()
+        )
+        check = checks_by_step_id.get(step_id)
+        old = (check.checked, check.notes) if check is not None else (False, "")
+        should_check = old[0] if should_check is None else should_check
+        notes = old[1] if notes is None else notes
+        after[step_id] = (should_check, notes)
+
+        if check is None:
+            # Sparse: only materialize a row once the step is touched.
+            if should_check or notes:
+                to_create[conflict_fields].append(
+                    StepCheck(
+                        session_run=run,
+                        step_id=step_id,
+                        checked=should_check,
+                        checked_at=now if should_check else None,
+                        notes=notes,
+                    )
+                )
+            continue
+
+        before[step_id] = old
+        if old == (should_check, notes):
+            continue
+        if should_check and not check.checked:
+            check.checked_at = now
+        if not should_check:
+            check.checked_at = None
+        check.checked = should_check
+        check.notes = notes
+        to_update.append(check)
+
+    with transaction.atomic():
+        # A concurrent save (another tab or device) may have created the same rows since
+        # they were read; upsert instead of failing on unique (session_run, step).
+        for conflict_fields, rows in to_create.items():
+            StepCheck.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["session_run", "step"],
+                update_fields=list(conflict_fields),
+            )
+        StepCheck.objects.bulk_update(to_update, ["checked", "checked_at", "notes"])
+        events = checklist_events(run, before, after, now)
+        record_events(events)
+        SessionRun.objects.filter(pk=run.pk).update(
+            checked_count=StepCheck.objects.filter(session_run=run, step_id__in=step_ids, checked=True).count(),
+            step_count=len(step_ids),
+        )
+    return events
+
+
 @login_required
 def run_detail_view(request, run_id: int):
     run = get_object_or_404(
-        SessionRun.objects.select_related("strategy"),
+        SessionRun.objects.select_related("strategy", "snapshot"),
         pk=run_id,
         user=request.user,
     )
 
     if request.method == "POST":
-        checks = StepCheck.objects.filter(session_run=run).select_related("step")
-        now = timezone.now()
-
-        with transaction.atomic():
-            for check in checks:
-                checkbox_key = f"step_{check.step_id}_checked"
-                notes_key = f"step_{check.step_id}_notes"
-                should_check = checkbox_key in request.POST
-                notes = request.POST.get(notes_key, "").strip()[:300]
-
-                if should_check and not check.checked:
-                    check.checked_at = now
-                if not should_check:
-                    check.checked_at = None
+        if run.archived_checks is not None:
+            restore_run(run)
+        step_ids = [step.id for _, step in template_steps(run_template(run))]
+        fetch = request.headers.get("X-Requested-With") == "fetch"
+        if fetch:
+            # Autosave from run.js sends only the steps that changed on this device.
+            try:
+                changes = _step_deltas(json.loads(request.body), set(step_ids))
+            except ValueError:
+                return JsonResponse({"error": "Invalid JSON"}, status=400)
+        else:
+            changes = {
+                step_id: (
+                    f"step_{step_id}_checked" in request.POST,
+                    request.POST.get(f"step_{step_id}_notes", "").strip()[:300],
+                )
+                for step_id in step_ids
+            }
 
-                check.checked = should_check
-                check.notes = notes
-                check.save(update_fields=["checked", "checked_at", "notes"])
+        events = _save_checks(run, changes, step_ids)
+        if events:
+            publish_run(run.id)
 
+        if fetch:
+            # The SSE stream (or the polling fallback) carries the resulting state back to every tab.
+            return JsonResponse({"ok": True, "changes": len(events)})
         if "go_review" in request.POST:
             return redirect("run_review", run_id=run.id)
         return redirect("run_detail", run_id=run.id)
@@ -162,20 +374,66 @@ def run_detail_view(request, run_id: int):
         "section_rows": section_rows,
         "total_steps": total_steps,
         "checked_steps": checked_steps,
+        # The live stream resumes after this event, so nothing between render and connect is lost.
+        "last_event_id": run.events.order_by("-id").values_list("id", flat=True).first() or 0,
     }
     return render(request, "journal/run_detail.html", context)
 
 
+async def _stream_start(request, run_id: int) -> int:
+    user = await request.auser()
+    if not await SessionRun.objects.filter(pk=run_id, user=user).aexists():
+        raise Http404("Run not found")
+    after_id = request.headers.get("Last-Event-ID") or request.GET.get("after")
+    try:
+        return int(after_id)
+    except (TypeError, ValueError):
+        return await latest_event_id(run_id)
+
+
+@login_required
+async def run_stream_view(request, run_id: int):
+    """
+    Server-Sent Events stream of checklist deltas for one run (see journal.live).
+    Only served under ASGI (tradejournal/asgi.py). A WSGI server would buffer
+    the whole stream and hold a worker thread for it, so there the stream
+    answers 204 and run.js polls run_delta_api instead.
+    """
+    after_id = await _stream_start(request, run_id)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(run_stream(run_id, after_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx-style proxies not to buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@login_required
+async def run_delta_api(request, run_id: int):
+    """
+    Polling fallback for the stream: {"last": event id, "seen": [event ids],
+    "delta": delta or null}. The client sends "after" and "seen" back.
+    """
+    after_id = await _stream_start(request, run_id)
+    seen = {int(event_id) for event_id in request.GET.get("seen", "").split(",") if event_id.isdigit()}
+    last_id, delta, sent = await run_delta(run_id, after_id, seen)
+    return JsonResponse({"last": last_id, "seen": sorted(sent), "delta": delta})
+
+
 @login_required
 def run_review_view(request, run_id: int):
     run = get_object_or_404(
-        SessionRun.objects.select_related("strategy").prefetch_related("step_checks__step__section"),
+        SessionRun.objects.select_related("strategy", "snapshot"),
         pk=run_id,
         user=request.user,
     )
     trade_instance = getattr(run, "trade", None)
 
     if request.method == "POST":
+        # Read before validation, which writes the posted values onto the instance.
+        old_entry_time = trade_instance.entry_time if trade_instance else None
         review_form = SessionRunReviewForm(request.POST, instance=run)
         trade_form = TradeForm(request.POST, instance=trade_instance)
 
@@ -186,18 +444,28 @@ def run_review_view(request, run_id: int):
                 if not review.ended_at:
                     review.ended_at = timezone.now()
                 review.save()
+                events = [RunEvent(session_run=run, action=RunEventAction.REVIEWED)]
 
                 if review.trade_taken:
                     if trade_form.is_valid():
                         trade = trade_form.save(commit=False)
                         trade.session_run = run
                         trade.save()
+                        if trade.entry_time != old_entry_time:
+                            events.append(
+                                RunEvent(session_run=run, action=RunEventAction.ENTRY, occurred_at=trade.entry_time)
+                            )
                     else:
                         context = _review_context(run, review_form, trade_form)
                         return render(request, "journal/run_review.html", context)
                 elif trade_instance:
                     trade_instance.delete()
+                    events.append(RunEvent(session_run=run, action=RunEventAction.ENTRY_REMOVED))
+
+                record_events(events)
 
+            forget_run(run.id)
+            invalidate_concept_matrix(request.user.id)
             return redirect("dashboard")
     else:
         review_form = SessionRunReviewForm(instance=run)
@@ -208,19 +476,381 @@ def run_review_view(request, run_id: int):
 
 
 def _review_context(run, review_form, trade_form):
-    checks = (
-        run.step_checks.select_related("step", "step__section")
-        .order_by("step__section__order", "step__order", "id")
-    )
-    checked_count = sum(1 for c in checks if c.checked)
+    checks_by_step_id = {c.step_id: c for c in load_checks(run)}
+    checks = []
+    for section, step in template_steps(run_template(run)):
+        check = checks_by_step_id.get(step.id)
+        checks.append(
+            {
+                "section": section,
+                "step": step,
+                "checked": bool(check and check.checked),
+                "notes": check.notes if check else "",
+            }
+        )
+    checked_count = sum(1 for c in checks if c["checked"])
+    entry = time_to_entry(run)
+    trade = getattr(run, "trade", None)
     return {
         "run": run,
         "checks": checks,
         "checked_count": checked_count,
         "total_count": len(checks),
+        "time_to_entry_minutes": round(entry.total_seconds() / 60, 1) if entry is not None else None,
         "review_form": review_form,
         "trade_form": trade_form,
+        "trade_id": trade.id if trade else None,
+        "attachments": trade.attachments.all() if trade else [],
+    }
+
+
+@login_required
+def run_timeline_api(request, run_id: int):
+    """
+    Replayed event timeline for a run, as compact rows:
+    [offset_seconds, action, step_id, checked_count].
+    """
+    run = get_object_or_404(SessionRun, pk=run_id, user=request.user)
+    events = list(run.events.order_by("occurred_at", "id"))
+    timeline = replay_run(run, events)
+    entry = time_to_entry(run, events)
+    return JsonResponse(
+        {
+            "run_id": run.id,
+            "started_at": run.started_at.isoformat(),
+            "events": [
+                [round(row["offset"].total_seconds(), 3), row["action"], row["step_id"], row["checked_count"]]
+                for row in timeline
+            ],
+            "time_to_entry": entry.total_seconds() if entry is not None else None,
+        }
+    )
+
+
+@login_required
+def checklist_filter_view(request):
+    """
+    "What-if" filter over the checklist: pick steps that must be checked /
+    unchecked and see matching runs with their R stats (journal.bitmaps).
+    """
+    strategies = list(Strategy.objects.filter(is_active=True).order_by("name"))
+    strategy = None
+    strategy_id = request.GET.get("strategy", "")
+    if strategy_id.isdigit():
+        strategy = next((s for s in strategies if s.id == int(strategy_id)), None)
+    if strategy is None and strategies:
+        strategy = strategies[0]
+
+    context = {"strategies": strategies, "strategy": strategy, "mode": request.GET.get("mode", "all")}
+    if strategy is None:
+        return render(request, "journal/checklist_filter.html", context)
+
+    snapshot = StrategyVersion.objects.get(pk=publish_version(strategy))
+    required, excluded = [], []
+    section_rows = []
+    for section_row in snapshot_template(snapshot):
+        step_rows = []
+        for step_row in section_row["steps"]:
+            step = step_row["step"]
+            state = request.GET.get(f"s{step.id}", "")
+            if state == "1":
+                required.append(step.id)
+            elif state == "0":
+                excluded.append(step.id)
+            step_rows.append({"step": step, "state": state})
+        section_rows.append({"section": section_row["section"], "steps": step_rows})
+
+    index = get_step_index()
+    if context["mode"] == "any":
+        result = index.query(request.user.id, strategy.id, any_of=required, none_of=excluded)
+    else:
+        result = index.query(request.user.id, strategy.id, all_of=required, none_of=excluded)
+
+    runs = (
+        SessionRun.objects.filter(pk__in=result["run_ids"][:50])
+        .select_related("trade")
+        .order_by("-started_at")
+    )
+    context.update(
+        {
+            "section_rows": section_rows,
+            "stats": result["stats"],
+            "elapsed_us": result["elapsed_us"],
+            "runs": runs,
+            "has_filter": bool(required or excluded),
+        }
+    )
+    return render(request, "journal/checklist_filter.html", context)
+
+
+@login_required
+def concept_analytics_view(request):
+    """
+    Concept x concept co-occurrence, concept x timeframe frequency and
+    same-day trade outcomes from the user's journal slots.
+    """
+    data = concept_matrix(request.user.id)
+    top = request.GET.get("top", "")
+    top = int(top) if top.isdigit() and int(top) > 0 else 20
+    concepts = data["concepts"][:top]
+    peak_co = max((max(row[:top]) for row in data.get("cooccurrence", [])[:top]), default=0) or 1
+    peak_tf = max((max(row) for row in data.get("by_timeframe", [])[:top]), default=0) or 1
+
+    rows = []
+    for i, name in enumerate(concepts):
+        rows.append(
+            {
+                "name": name,
+                "days": data["days"][i],
+                "cooccurrence": [(v, round(v / peak_co, 2)) for v in data["cooccurrence"][i][:top]],
+                "by_timeframe": [(v, round(v / peak_tf, 2)) for v in data["by_timeframe"][i]],
+                "outcome": data["outcomes"][i],
+            }
+        )
+
+    context = {
+        "concepts": concepts,
+        "timeframes": data["timeframes"],
+        "total_days": data["total_days"],
+        "rows": rows,
+        "show_outcomes": request.GET.get("outcomes") == "1",
+    }
+    return render(request, "journal/concept_analytics.html", context)
+
+
+ANALYTICS_WINDOWS = (30, 90, 365, 0)
+
+
+@login_required
+def killzone_analytics_view(request):
+    """
+    Trade outcomes by killzone, session and half hour, from the stored New
+    York time buckets (journal.killzones).
+    """
+    days = _bounded_int(request.GET.get("days"), 0, 365, 90)
+    if days not in ANALYTICS_WINDOWS:
+        days = 90
+    session = request.GET.get("session", MarketSession.NY)
+    if session not in MarketSession.values:
+        session = MarketSession.NY
+    since = market_buckets(timezone.now())["trading_date"] - timedelta(days=days) if days else None
+    context = {
+        **killzone_stats(request.user.id, session=session, since=since),
+        "days": days,
+        "windows": ANALYTICS_WINDOWS,
+        "session": session,
+        "sessions": MarketSession.choices,
+    }
+    return render(request, "journal/killzone_analytics.html", context)
+
+
+SIMULATION_LIMITS = {"paths": (1000, 200000, 20000), "trades": (10, 1000, 100), "seed": (0, 2**31 - 1, 0)}
+# Largest paths x trades a page load simulates itself; bigger runs go through the task queue.
+INLINE_SIMULATION_CELLS = 20000 * 100
+
+
+def _bounded_int(value, low, high, default):
+    try:
+        return min(max(int(value), low), high)
+    except (TypeError, ValueError):
+        return default
+
+
+@login_required
+def strategy_simulation_view(request, strategy_id: int):
+    """
+    Monte Carlo equity paths resampled from the user's R results on a strategy.
+    Cached on the exact R sample and parameters, so repeat views are free.
+    A GET simulates in the request thread only up to INLINE_SIMULATION_CELLS;
+    larger runs are queued with POST and read back from the cache.
+    """
+    strategy = get_object_or_404(Strategy, pk=strategy_id)
+    data = request.POST if request.method == "POST" else request.GET
+    params = {name: _bounded_int(data.get(name), *limits) for name, limits in SIMULATION_LIMITS.items()}
+    try:
+        ruin_r = float(data.get("ruin_r", 20))
+    except ValueError:
+        ruin_r = 20.0
+    # "nan" parses as a float and passes through min/max unclamped.
+    params["ruin_r"] = min(max(ruin_r, 1.0), 1000.0) if not math.isnan(ruin_r) else 20.0
+
+    if request.method == "POST":
+        queued = enqueue(
+            "montecarlo.simulate",
+            {"strategy_id": strategy.id, "user_id": request.user.id, **params},
+            user=request.user,
+        )
+        return redirect("task_detail", task_id=queued.id)
+
+    r_values = strategy_r_values(strategy.id, request.user.id)
+    result = None
+    too_large = params["paths"] * params["trades"] > INLINE_SIMULATION_CELLS
+    if r_values.size and request.GET.get("background") != "1":
+        key = simulation_cache_key(r_values, **params)
+        result = cache.get(key)
+        if result is None and not too_large:
+            result = simulate(
+                r_values,
+                n_paths=params["paths"],
+                n_trades=params["trades"],
+                seed=params["seed"],
+                ruin_r=params["ruin_r"],
+                workers=1,
+            )
+            cache.set(key, result, SIMULATION_CACHE_TIMEOUT)
+
+    context = {
+        "strategy": strategy,
+        "params": params,
+        "result": result,
+        "too_large": too_large,
+        "sample_size": int(r_values.size),
     }
+    return render(request, "journal/strategy_simulation.html", context)
+
+
+def _visible_task(request, task_id: int) -> Task:
+    tasks = Task.objects.all() if request.user.is_staff else Task.objects.filter(created_by=request.user)
+    return get_object_or_404(tasks, pk=task_id)
+
+
+@login_required
+def task_detail_view(request, task_id: int):
+    task_obj = _visible_task(request, task_id)
+    return render(request, "journal/task_detail.html", {"task": task_obj, "status": task_status(task_obj)})
+
+
+@login_required
+def task_status_api(request, task_id: int):
+    return JsonResponse(task_status(_visible_task(request, task_id)))
+
+
+def _upload_error(exc: UploadError, upload: UploadSession | None = None) -> JsonResponse:
+    data = {"error": str(exc)}
+    if upload is not None:
+        data.update(upload_state(upload))
+    return JsonResponse(data, status=exc.status)
+
+
+@login_required
+def uploads_api(request):
+    """
+    Start a resumable upload (see journal.uploads). JSON body:
+    {"filename", "size", "sha256", "content_type", and "trade_id" or "date": "YYYY-MM-DD"}
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest("POST required")
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+        if not isinstance(payload, dict):
+            raise ValueError
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON")
+
+    trade = journal = None
+    if payload.get("trade_id"):
+        trade_id = payload["trade_id"]
+        if isinstance(trade_id, bool) or not (isinstance(trade_id, int) or str(trade_id).isdigit()):
+            return HttpResponseBadRequest("Invalid trade_id")
+        trade = get_object_or_404(Trade, pk=int(trade_id), session_run__user=request.user)
+    elif payload.get("date"):
+        try:
+            dt = date.fromisoformat(payload["date"])
+        except (TypeError, ValueError):
+            return HttpResponseBadRequest("Invalid date")
+        journal = _get_or_create_journal(request.user, dt)
+
+    try:
+        upload = create_upload(
+            request.user,
+            payload.get("filename", ""),
+            payload.get("size"),
+            payload.get("sha256", ""),
+            payload.get("content_type", ""),
+            trade=trade,
+            journal=journal,
+        )
+    except UploadError as exc:
+        return _upload_error(exc)
+    return JsonResponse(upload_state(upload), status=201)
+
+
+@login_required
+def upload_detail_api(request, upload_id):
+    """
+    GET: current offset. PUT: append the raw request body at the Upload-Offset header. DELETE: abort.
+    """
+    upload = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+
+    if request.method == "GET":
+        return JsonResponse(upload_state(upload))
+    if request.method == "DELETE":
+        abort_upload(upload)
+        return JsonResponse({"ok": True})
+    if request.method != "PUT":
+        return HttpResponseBadRequest("GET, PUT or DELETE required")
+
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return HttpResponseBadRequest("Upload-Offset and Content-Length required")
+    try:
+        # The request itself is the stream; request.body is never touched, so the chunk is not buffered.
+        write_chunk(upload, offset, request, length)
+    except UploadError as exc:
+        upload.refresh_from_db()
+        return _upload_error(exc, upload)
+    return JsonResponse(upload_state(upload))
+
+
+@login_required
+def upload_complete_api(request, upload_id):
+    if request.method != "POST":
+        return HttpResponseBadRequest("POST required")
+    upload = get_object_or_404(UploadSession.objects.select_related("user"), pk=upload_id, user=request.user)
+    try:
+        attachment = complete_upload(upload, caption=request.headers.get("Upload-Caption", ""))
+    except UploadError as exc:
+        # None once an upload that is not an image has been aborted.
+        return _upload_error(exc, UploadSession.objects.filter(pk=upload.pk).first())
+    return JsonResponse(attachment_data(attachment), status=201)
+
+
+COACH_WINDOWS = (7, 30, 90, 365, 0)
+
+
+@staff_member_required
+def coach_view(request):
+    """
+    Staff-only comparison of every trader (see journal.coach for the queries).
+    """
+    days = _bounded_int(request.GET.get("days"), 0, 365, 30)
+    if days not in COACH_WINDOWS:
+        days = 30
+    sort = request.GET.get("sort", "username")
+    rows = sort_stats(trader_stats(days or None), sort)
+    context = {"rows": rows, "days": days, "sort": sort, "windows": COACH_WINDOWS}
+    return render(request, "journal/coach.html", context)
+
+
+@login_required
+def reports_view(request):
+    snapshots = ReportSnapshot.objects.filter(user=request.user).defer("path")
+    return render(request, "journal/reports.html", {"snapshots": snapshots})
+
+
+@login_required
+def report_detail_view(request, period: str, year: int, month: int, day: int):
+    """
+    A stored weekly/monthly report, read from its file. A period that changed
+    since it was generated is shown as it was while a worker rebuilds it.
+    """
+    snapshot = get_object_or_404(ReportSnapshot, user=request.user, period=period, start=date(year, month, day))
+    report_html = read_report(snapshot)
+    if report_html is None or snapshot.is_dirty:
+        enqueue_once("reports.build")
+    return render(request, "journal/report_detail.html", {"snapshot": snapshot, "report_html": report_html})
 
 
 @login_required
@@ -264,44 +894,89 @@ def calendar_view(request):
     }
     return render(request, "journal/calendar.html", context)
 
+
 @login_required
+@condition(etag_func=lambda request: _library_etag(request, CONCEPTS))
 def concepts_view(request):
     concepts = Concept.objects.filter(is_active=True).order_by("name")
-    return render(request, "journal/concepts.html", {"concepts": concepts})
+    context = {"concepts": concepts, "concepts_version": model_version(CONCEPTS)}
+    return render(request, "journal/concepts.html", context)
+
 
 @login_required
 def day_view(request, year: int, month: int, day: int):
+    """
+    The day page shell. The concept library and the day's slots are drawn by
+    day.js from /api/concepts/ and the day-state JSON, so moving to another
+    day or saving is one small request (see journal.days).
+    """
     dt = date(year, month, day)
-    journal = _get_or_create_journal(request.user, dt)
 
     if request.method == "POST":
+        # Plain form post, kept for browsers without JavaScript.
+        journal = _get_or_create_journal(request.user, dt)
         form = DayJournalForm(request.POST, instance=journal)
         if form.is_valid():
             form.save()
             return redirect("day", year=year, month=month, day=day)
     else:
-        form = DayJournalForm(instance=journal)
-
-    concepts = Concept.objects.filter(is_active=True).order_by("name")
-
-    items = JournalSlotItem.objects.filter(journal=journal).select_related("concept")
-    by_tf = {tf: [] for tf, _ in Timeframe.choices}
-    for it in items:
-        by_tf[it.timeframe].append(it)
-    timeframe_rows = [
-        {"value": tf_value, "label": tf_label, "items": by_tf.get(tf_value, [])}
-        for tf_value, tf_label in Timeframe.choices
-    ]
+        journal = DayJournal.objects.filter(user=request.user, date=dt).first()
+        form = DayJournalForm(instance=journal or DayJournal(user=request.user, date=dt))
 
     context = {
         "dt": dt,
-        "journal": journal,
         "form": form,
-        "concepts": concepts,
-        "timeframe_rows": timeframe_rows,
+        "timeframes": Timeframe.choices,
+        "day_state": day_state(request.user, dt),
+        "attachments": journal.attachments.all() if journal else [],
     }
     return render(request, "journal/day.html", context)
 
+
+@login_required
+def day_state_api(request, year: int, month: int, day: int):
+    """
+    GET: the day's state as compact JSON. POST: save journal fields and slots in one transaction.
+    """
+    dt = date(year, month, day)
+    if request.method == "GET":
+        return JsonResponse(day_state(request.user, dt))
+    if request.method != "POST":
+        return HttpResponseBadRequest("GET or POST required")
+
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+        if not isinstance(payload, dict):
+            raise ValueError
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON")
+
+    journal, errors = save_day(request.user, dt, payload)
+    if errors:
+        return JsonResponse({"ok": False, "errors": errors}, status=400)
+    if "slots" in payload:
+        invalidate_concept_matrix(request.user.id)
+    return JsonResponse({"ok": True, "updated": journal.updated_at.isoformat()})
+
+
+@login_required
+@condition(etag_func=lambda request: f"concepts-{model_version(CONCEPTS)}")
+def concepts_api(request):
+    """
+    The active concept library as [[id, name], ...]. Clients request it as
+    ?v=<version from the day state>; that URL never changes content, so it is
+    cached for good and a new version is simply a new URL.
+    """
+    version = model_version(CONCEPTS)
+    concepts = Concept.objects.filter(is_active=True).order_by("name").values_list("id", "name")
+    response = JsonResponse({"v": version, "concepts": [list(c) for c in concepts]})
+    if request.GET.get("v") == str(version):
+        response["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        response["Cache-Control"] = "private, no-cache"
+    return response
+
+
 @login_required
 def save_slots_api(request, year: int, month: int, day: int):
     """
@@ -325,33 +1000,17 @@ def save_slots_api(request, year: int, month: int, day: int):
     except Exception:
         return HttpResponseBadRequest("Invalid JSON")
 
+    try:
+        rows = clean_slots(slots)
+    except UnknownConcepts:
+        raise Http404("Unknown concept")
+    except InvalidSlots as exc:
+        return HttpResponseBadRequest(str(exc))
+
     dt = date(year, month, day)
     journal = _get_or_create_journal(request.user, dt)
-
-    valid_timeframes = {tf for tf, _ in Timeframe.choices}
-
     with transaction.atomic():
-        JournalSlotItem.objects.filter(journal=journal).delete()
-
-        for timeframe, items in slots.items():
-            if timeframe not in valid_timeframes:
-                continue
-            if not isinstance(items, list):
-                continue
-
-            for idx, obj in enumerate(items):
-                concept_id = obj.get("concept_id")
-                note = (obj.get("note") or "")[:240]
-                if not concept_id:
-                    continue
-
-                concept = get_object_or_404(Concept, pk=int(concept_id), is_active=True)
-                JournalSlotItem.objects.create(
-                    journal=journal,
-                    timeframe=timeframe,
-                    concept=concept,
-                    order=idx,
-                    note=note,
-                )
+        replace_slots(journal, rows)
 
+    invalidate_concept_matrix(request.user.id)
     return JsonResponse({"ok": True})
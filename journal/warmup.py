@@ -0,0 +1,72 @@
+"""
+Startup warmup: do the lazy first-request work before the first request.
+
+Django compiles templates, builds the URL resolver and fills model _meta
+caches on first use, so the first hits to a fresh worker pay for all of it.
+warmup() does that work up front. tradejournal/wsgi.py and asgi.py call it
+when WARMUP_ON_STARTUP is set, and `manage.py warmup` runs it by hand.
+"""
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import get_resolver
+
+
+def _template_dirs(engine) -> list[Path]:
+    dirs = [Path(d) for d in engine.dirs]
+    for app_config in apps.get_app_configs():
+        if app_config.name.startswith("django."):
+            continue
+        template_dir = Path(app_config.path) / "templates"
+        if template_dir.is_dir():
+            dirs.append(template_dir)
+    return dirs
+
+
+def precompile_templates() -> int:
+    """
+    Compile every project and journal template into the cached loader.
+    Contrib apps (admin) still compile on first use.
+    """
+    compiled = 0
+    for backend in engines.all():
+        engine = getattr(backend, "engine", None)
+        if engine is None or not any(isinstance(loader, CachedLoader) for loader in engine.template_loaders):
+            continue
+        for template_dir in _template_dirs(engine):
+            for path in sorted(template_dir.rglob("*.html")):
+                engine.get_template(path.relative_to(template_dir).as_posix())
+                compiled += 1
+    return compiled
+
+
+def prime_urls() -> int:
+    resolver = get_resolver()
+    # Accessing reverse_dict populates the resolver (and imports every view module).
+    return len(resolver.reverse_dict)
+
+
+def prime_models() -> int:
+    fields = 0
+    for model in apps.get_models():
+        meta = model._meta
+        fields += len(meta.get_fields())
+        # Cached properties the ORM reads while building every query.
+        for attr in ("concrete_fields", "local_concrete_fields", "related_objects", "fields_map"):
+            getattr(meta, attr)
+    return fields
+
+
+def warmup() -> dict:
+    """
+    Run every warmup step; returns {step: (count, seconds)}.
+    """
+    timings = {}
+    for name, step in (("templates", precompile_templates), ("urls", prime_urls), ("models", prime_models)):
+        started = time.perf_counter()
+        count = step()
+        timings[name] = (count, time.perf_counter() - started)
+    return timings
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +48,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    "journal.routers.ReadYourWritesMiddleware",
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,13 +59,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept per process; runserver's autoreloader
+            # resets this cache when a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -73,13 +83,102 @@ WSGI_APPLICATION = 'tradejournal.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
+# TC_DB_PROFILE=postgres switches to PostgreSQL (needs psycopg), configured
+# through TC_PG_* variables; `manage.py loadtest` compares the two. It only
+# runs against a scratch database, e.g. TC_SQLITE_NAME=loadtest.sqlite3 or
+# TC_PG_NAME=loadtest.
+
+DB_PROFILE = os.environ.get("TC_DB_PROFILE", "sqlite")
+
+if DB_PROFILE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("TC_PG_NAME", "tradejournal"),
+            "USER": os.environ.get("TC_PG_USER", ""),
+            "PASSWORD": os.environ.get("TC_PG_PASSWORD", ""),
+            "HOST": os.environ.get("TC_PG_HOST", ""),
+            "PORT": os.environ.get("TC_PG_PORT", ""),
+            "CONN_MAX_AGE": 60,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('TC_SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+# TC_ANALYTICS_READS=True adds a read-only "analytics" connection. Report,
+# analytics and export scans use it (journal.routers), so they never hold up
+# journal writes:
+#   sqlite    the same file opened read-only; WAL lets readers and the writer
+#             run side by side
+#   postgres  a standby at TC_PG_REPLICA_HOST/PORT (default: the primary,
+#             through a separate read-only connection)
+# Reads that must see a recent write stay on the primary for
+# ANALYTICS_REPLICA_LAG_SECONDS.
+
+ANALYTICS_READS = os.environ.get("TC_ANALYTICS_READS", "False") == "True"
+ANALYTICS_REPLICA_LAG_SECONDS = int(os.environ.get("TC_ANALYTICS_LAG_SECONDS", "5"))
+
+if ANALYTICS_READS and DB_PROFILE == "postgres":
+    DATABASES["analytics"] = {
+        **DATABASES["default"],
+        "HOST": os.environ.get("TC_PG_REPLICA_HOST", DATABASES["default"]["HOST"]),
+        "PORT": os.environ.get("TC_PG_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "OPTIONS": {"options": "-c default_transaction_read_only=on"},
+        "TEST": {"MIRROR": "default"},
+    }
+elif ANALYTICS_READS:
+    DATABASES["default"]["OPTIONS"] = {"init_command": "PRAGMA journal_mode=WAL;"}
+    DATABASES["analytics"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": f"file:{DATABASES['default']['NAME']}?mode=ro",
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["journal.routers.AnalyticsRouter"]
+
+
+# Cache
+# File-based so every worker process sees the same model version counters
+# (journal.cache_versions) that admin saves bump.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
+# `manage.py test` gets a per-process cache, so cached fragments and version
+# counters never leak between test runs and the development server.
+if sys.argv[1:2] == ["test"]:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+# Sessions and authentication
+# TC_SESSION_PROFILE picks where sessions live:
+#   "cached_db"       cache first, django_session only on a miss or a write (default)
+#   "cache"           cache only; clearing the cache logs everyone out
+#   "signed_cookies"  in the signed cookie itself, no server-side state
+#   "db"              django_session on every request
+# Prune stored sessions with `manage.py cleanup_sessions`.
+
+SESSION_PROFILE = os.environ.get("TC_SESSION_PROFILE", "cached_db")
+SESSION_ENGINE = {
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+    "db": "django.contrib.sessions.backends.db",
+}[SESSION_PROFILE]
+
+# request.user is served from a short-lived per-process cache (journal.auth).
+AUTHENTICATION_BACKENDS = ["journal.auth.CachedModelBackend"]
+AUTH_USER_CACHE_SECONDS = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -117,9 +216,61 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "journal" / "static"]
+STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# collectstatic writes content-hashed names, a staticfiles.json manifest and
+# precompressed .gz/.br variants (brotli is optional).
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "journal.storage.CompressedManifestStaticFilesStorage",
+    },
+    # StepImage files and trade/day screenshots, stored once per unique
+    # content under MEDIA_ROOT/cas/.
+    "step_images": {
+        "BACKEND": "journal.storage.ContentAddressedStorage",
+    },
+    "attachments": {
+        "BACKEND": "journal.storage.ContentAddressedStorage",
+    },
+}
+
+# Resumable screenshot uploads (journal.uploads). Partial files live under
+# MEDIA_ROOT/.uploads so finished ones are renamed, not copied, into place.
+UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 512 * 1024
+
+# Serve STATIC_ROOT from Django itself (journal.views.static_asset_view) when
+# there is no front-end server. runserver serves static files itself in DEBUG.
+SERVE_STATIC = not DEBUG
+
+# 1-minute OHLC files written by `manage.py ingest_bars` (journal.bars).
+BAR_STORE_DIR = BASE_DIR / "bars"
+
+# Touched per run by checklist saves so live streams in other worker
+# processes wake up (journal.live).
+LIVE_SIGNAL_DIR = BASE_DIR / "live"
+
+# Pre-rendered weekly/monthly review HTML (journal.reports). Kept out of
+# MEDIA_ROOT because reports are private; views read them after a login check.
+REPORT_ROOT = BASE_DIR / "reports"
+
+# `manage.py backup` snapshots (journal.backups): content-addressed chunks
+# plus one manifest per snapshot; the newest BACKUP_KEEP are kept.
+BACKUP_ROOT = Path(os.environ.get("TC_BACKUP_ROOT", BASE_DIR / "backups"))
+BACKUP_KEEP = int(os.environ.get("TC_BACKUP_KEEP", "14"))
+
+# Precompile templates and build URL/model caches when a WSGI/ASGI worker
+# boots (journal.warmup), instead of on the first requests it serves.
+WARMUP_ON_STARTUP = os.environ.get("TC_WARMUP_ON_STARTUP", str(not DEBUG)) == "True"
+
+# Worker processes for Monte Carlo equity simulations (None = one per CPU).
+MONTE_CARLO_WORKERS = None
+
 LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/accounts/login/"
@@ -15,10 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from journal.views import service_worker_view
+from journal.views import service_worker_view, static_asset_view
 
 urlpatterns = [
     path("sw.js", service_worker_view, name="service_worker"),
@@ -29,3 +29,8 @@ urlpatterns = [
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.SERVE_STATIC:
+    urlpatterns += [
+        re_path(rf"^{settings.STATIC_URL.strip('/')}/(?P<path>.*)$", static_asset_view, name="static_asset"),
+    ]